@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import logging
+
+import click
+from benchpress.lib.history import History
+from benchpress.lib.job import get_target_jobs
+
+from .command import BenchpressCommand
+
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCommand(BenchpressCommand):
+    def populate_parser(self, subparsers):
+        parser = subparsers.add_parser(
+            "history", help="import/export saved job results"
+        )
+        parser.set_defaults(command=self)
+        parser.add_argument("action", choices=["import", "export"])
+        parser.add_argument(
+            "path",
+            help="results directory in the <job_name>/<timestamp>.json layout",
+        )
+        parser.add_argument(
+            "jobs", nargs="*", default=[], help="jobs to export (default: all)"
+        )
+
+    def run(self, args, jobs):
+        history = History(args.results, args.results_backend)
+
+        if args.action == "import":
+            count = history.import_directory(args.path)
+            click.echo("Imported {} results from {}".format(count, args.path))
+            return
+
+        job_names = None
+        if args.jobs:
+            job_names = [
+                job.safe_name for job in get_target_jobs(jobs, args.jobs).values()
+            ]
+        count = history.export_directory(args.path, job_names)
+        click.echo("Exported {} results to {}".format(count, args.path))
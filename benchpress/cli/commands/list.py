@@ -37,14 +37,5 @@ class ListCommand(BenchpressCommand):
         else:
             group_key = None
 
-        job_list = []
-        for job in jobs.values():
-            if not hasattr(job, "config"):
-                continue
-            item = {
-                "name": job.name,
-                "description": job.description,
-                "tags": job.tags,
-            }
-            job_list.append(item)
+        job_list = jobs.job_summaries()
         click.echo(create_job_listing(job_list, TABLE_FORMAT, group_key))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import collections
+import concurrent.futures
+import logging
+import multiprocessing
+import traceback
+
+import click
+import tabulate
+from benchpress.lib import cgroup
+from benchpress.lib.history import History, record_iteration
+from benchpress.lib.job import get_target_jobs
+from benchpress.lib.output_archive import OutputArchive
+from benchpress.lib.parser_factory import ParserFactory
+
+from .command import BenchpressCommand, TABLE_FORMAT
+
+
+logger = logging.getLogger(__name__)
+
+
+def reparse_output(parser_name, path):
+    """Run a fresh parser over an archived output.
+
+    Returns:
+        tuple: (metrics, None) on success, (None, error description) otherwise
+    """
+    try:
+        return OutputArchive(path).replay(ParserFactory.create(parser_name)), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+class ReparseCommand(BenchpressCommand):
+    def populate_parser(self, subparsers):
+        parser = subparsers.add_parser(
+            "reparse",
+            help="parse the archived output of earlier runs again and update "
+            "their saved results",
+        )
+        parser.set_defaults(command=self)
+        parser.add_argument("jobs", nargs="+", help="jobs to reparse")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Reparse every archived run instead of only the most recent one",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            metavar="N",
+            help="Number of parser processes (default: number of CPUs)",
+        )
+
+    def run(self, args, jobs):
+        history = History(args.results, args.results_backend)
+        jobs = get_target_jobs(jobs, args.jobs).values()
+
+        # (job, record, archive path) of every run to reparse
+        runs = []
+        not_archived = collections.Counter()
+        for job in jobs:
+            if job.parser.reads_files:
+                # the files it reads belong to the latest run, if any
+                logger.warning(
+                    'Not reparsing "{}": parser "{}" reads files besides the '
+                    "output".format(job.name, job.parser_name)
+                )
+                continue
+            for record in history.load_records(job, None if args.all else 1):
+                path = history.output_archive_path(
+                    job.safe_name,
+                    record["timestamp"],
+                    record["config"]["uuid"],
+                    record_iteration(record),
+                )
+                if OutputArchive.exists(path):
+                    runs.append((job, record, path))
+                else:
+                    not_archived[job.name] += 1
+
+        results = []
+        if runs:
+            click.echo("Reparsing {} run(s)".format(len(runs)))
+            # workers inherit the registered parser plugins
+            ctx = multiprocessing.get_context("fork")
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=args.processes, mp_context=ctx
+            ) as pool:
+                results = list(
+                    pool.map(
+                        reparse_output,
+                        [job.parser_name for job, _, _ in runs],
+                        [path for _, _, path in runs],
+                    )
+                )
+
+        updated = collections.defaultdict(list)
+        changed = collections.Counter()
+        failed = collections.Counter()
+        for (job, record, path), (metrics, error) in zip(runs, results):
+            if error is not None:
+                logger.error('Failed to reparse "{}": {}'.format(path, error))
+                failed[job.name] += 1
+                continue
+            # the resource usage is not part of the output
+            if cgroup.METRICS_KEY in (record["metrics"] or {}):
+                metrics[cgroup.METRICS_KEY] = record["metrics"][cgroup.METRICS_KEY]
+            if metrics != record["metrics"]:
+                changed[job.name] += 1
+            record["metrics"] = metrics
+            updated[job.name].append(record)
+
+        table = []
+        for job in jobs:
+            if updated[job.name]:
+                history.update_records(job, updated[job.name])
+            table.append(
+                [
+                    job.name,
+                    len(updated[job.name]),
+                    changed[job.name],
+                    failed[job.name],
+                    not_archived[job.name],
+                ]
+            )
+        headers = ["Job", "Reparsed", "Changed", "Failed", "Not archived"]
+        click.echo(tabulate.tabulate(table, headers, tablefmt=TABLE_FORMAT))
+        if sum(failed.values()) > 0:
+            exit(1)
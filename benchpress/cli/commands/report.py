@@ -35,23 +35,25 @@ class ReportCommand(BenchpressCommand):
 
         jobs = get_target_jobs(jobs, args.jobs).values()
 
-        history = History(args.results)
+        history = History(args.results, args.results_backend)
 
         for job in jobs:
             logger.info('Reporting result for "%s"', job.name)
 
-            results = history.load_historical_results(job)
-            if len(results) == 0:
-                logger.info('No historical results for "%s", skipping', job.name)
-                continue
-
             if not args.all:
-                latest = results[0]
+                latest = history.load_latest_result(job)
+                if latest is None:
+                    logger.info('No historical results for "%s", skipping', job.name)
+                    continue
                 metrics = latest.metrics
                 metrics["run_id"] = latest.run_id
                 metrics["timestamp"] = latest.timestamp
                 reporter.report(job, metrics)
             else:
+                results = history.load_historical_results(job)
+                if len(results) == 0:
+                    logger.info('No historical results for "%s", skipping', job.name)
+                    continue
                 for res in results:
                     metrics = res.metrics
                     metrics["run_id"] = res.run_id
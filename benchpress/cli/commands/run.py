@@ -9,21 +9,44 @@
 import json
 import logging
 import os
+import statistics
+import traceback
 from datetime import datetime, timezone
 
 import benchpress.lib.sys_specs as sys_specs
 import click
+import tabulate
+from benchpress.lib import baseline, regression
 from benchpress.lib.history import History
 from benchpress.lib.hook_factory import HookFactory
 from benchpress.lib.job import get_target_jobs
+from benchpress.lib.journal import DONE, FAILED, RunJournal, RUNNING
 from benchpress.lib.reporter_factory import ReporterFactory
+from benchpress.lib.scheduler import ParallelJobScheduler, partition_cpus
 from benchpress.lib.util import verify_install
 
-from .command import BenchpressCommand
+from .command import BenchpressCommand, TABLE_FORMAT
 
 
 logger = logging.getLogger(__name__)
 
+# File under the results directory caching slow-to-collect system specs
+SYS_SPECS_CACHE_NAME = "sys_specs_cache.json"
+
+# Minimum number of CPUs per partition when --parallel is given no count
+PARALLEL_MIN_CPUS = 8
+
+# Exit status of `benchpress run --check-regressions` when a metric is out of
+# tolerance
+REGRESSION_EXIT_CODE = 3
+
+# Number of most recent runs with the same config used as baseline
+REGRESSION_BASELINE_RUNS = 20
+
+# Bounds on the number of iterations of a job run with --repeat-until
+MIN_REPEATS = 3
+MAX_REPEATS = 7
+
 
 class RunCommand(BenchpressCommand):
     def populate_parser(self, subparsers):
@@ -49,6 +72,110 @@ class RunCommand(BenchpressCommand):
             action="store_true",
             help="Dry run to check commands to run",
         )
+        parser.add_argument(
+            "--no-sys-specs-cache",
+            action="store_true",
+            help="Always collect system specs instead of reusing the ones "
+            "cached for the current boot",
+        )
+        parser.add_argument(
+            "--skip-slow-sys-specs",
+            action="store_true",
+            help="Do not collect dmidecode, lshw and package lists unless cached",
+        )
+        parser.add_argument(
+            "--resume",
+            default=None,
+            metavar="RUN_ID",
+            help="Continue the run RUN_ID, skipping the jobs it completed. "
+            "Without job names, the jobs of that run are run",
+        )
+        parser.add_argument(
+            "--keep-going",
+            action="store_true",
+            help="Run the remaining jobs when a job fails and report the "
+            "failures at the end",
+        )
+        parser.add_argument(
+            "--no-cgroup",
+            action="store_true",
+            help="Do not run the jobs in their own cgroup, which is killed at "
+            "the end of the job and whose resource usage is added to the "
+            "metrics",
+        )
+        parser.add_argument(
+            "--no-archive-output",
+            action="store_true",
+            help="Do not archive the output of the jobs for `benchpress reparse`",
+        )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            nargs="?",
+            const=0,
+            default=None,
+            metavar="N",
+            help="Run jobs not marked exclusive concurrently on N disjoint "
+            "CPU partitions (default: one partition per "
+            f"{PARALLEL_MIN_CPUS} CPUs), then run exclusive jobs serially",
+        )
+        parser.add_argument(
+            "--repeat-until",
+            type=float,
+            default=None,
+            metavar="PERCENT",
+            help="Run every job repeatedly until the 95%% confidence interval "
+            "of the median of its scored metric is narrower than PERCENT of "
+            "the median",
+        )
+        parser.add_argument(
+            "--min-repeats",
+            type=int,
+            default=MIN_REPEATS,
+            metavar="N",
+            help="Minimum number of iterations with --repeat-until "
+            "(default: %(default)s)",
+        )
+        parser.add_argument(
+            "--max-repeats",
+            type=int,
+            default=MAX_REPEATS,
+            metavar="N",
+            help="Maximum number of iterations with --repeat-until "
+            "(default: %(default)s)",
+        )
+        parser.add_argument(
+            "--repeat-metric",
+            default=None,
+            metavar="NAME",
+            help="Metric that --repeat-until watches, as a dotted name for "
+            "nested metrics (default: the metric the job's score is "
+            "computed from)",
+        )
+        parser.add_argument(
+            "--check-regressions",
+            action="store_true",
+            help="Compare the results with earlier runs of the same jobs with "
+            "the same config and exit with status "
+            f"{REGRESSION_EXIT_CODE} if any metric is out of tolerance",
+        )
+        parser.add_argument(
+            "--regression-tolerance",
+            type=float,
+            default=regression.DEFAULT_TOLERANCE,
+            metavar="PERCENT",
+            help="Tolerance of metrics without an entry in the job's "
+            "`tolerances`, in percent of the baseline median (default: "
+            "%(default)s)",
+        )
+        parser.add_argument(
+            "--regression-baseline",
+            type=int,
+            default=REGRESSION_BASELINE_RUNS,
+            metavar="N",
+            help="Number of most recent matching runs used as baseline "
+            "(default: %(default)s)",
+        )
         parser.add_argument(
             "-k",
             "--hooks",
@@ -66,41 +193,30 @@ class RunCommand(BenchpressCommand):
     def run(self, args, jobs) -> None:
         json_reporter = ReporterFactory.create("json_file")
 
-        jobs = get_target_jobs(jobs, args.jobs).values()
+        job_names = args.jobs
+        if args.resume:
+            if not RunJournal.exists(args.resume):
+                logger.error('No journal of run "{}" found'.format(args.resume))
+                exit(1)
+            if not job_names:
+                job_names = list(RunJournal(args.resume).load().jobs)
+        jobs = get_target_jobs(jobs, job_names).values()
 
         click.echo("Will run {} job(s)".format(len(jobs)))
 
-        history = History(args.results)
+        history = History(args.results, args.results_backend)
         now = datetime.now(timezone.utc)
 
-        cpu_topology = sys_specs.get_cpu_topology()
-        os_kernel_data = sys_specs.get_os_kernel()
-        os_release_data = sys_specs.get_os_release_data()
-        kernel_cmdline = sys_specs.get_kernel_cmdline()
-        dmidecode_data = sys_specs.get_dmidecode_data()
-        sys_packages = []
-        if "id" in os_release_data:
-            os_id = os_release_data["id"].lower()
-            if os_id in ("centos", "rhel", "fedora"):
-                sys_packages = sys_specs.get_rpm_packages()
-            elif os_id in ("ubuntu", "debian"):
-                sys_packages = sys_specs.get_dpkg_packages()
-            else:
-                sys_packages = []
-        kernel_params = sys_specs.get_sysctl_data()
-        mem_data = sys_specs.get_cpu_mem_data()
-        hw_data = sys_specs.get_hw_data()
-
-        sys_specs_dict = {}
-        sys_specs_dict["cpu_topology"] = cpu_topology
-        sys_specs_dict["os_kernel"] = os_kernel_data
-        sys_specs_dict["kernel_cmdline"] = kernel_cmdline
-        sys_specs_dict["dmidecode"] = dmidecode_data
-        sys_specs_dict["sys_packages"] = sys_packages
-        sys_specs_dict["kernel_params"] = kernel_params
-        sys_specs_dict["memory"] = mem_data
-        sys_specs_dict["hardware"] = hw_data
-        sys_specs_dict["os-release"] = os_release_data
+        sys_specs_cache = None
+        if not args.no_sys_specs_cache:
+            sys_specs_cache = os.path.join(args.results, SYS_SPECS_CACHE_NAME)
+        sys_specs_dict = sys_specs.collect_sys_specs(
+            sys_specs_cache, args.skip_slow_sys_specs
+        )
+        cpu_topology = sys_specs_dict["cpu_topology"]
+        os_kernel_data = sys_specs_dict["os_kernel"]
+        os_release_data = sys_specs_dict["os-release"]
+        mem_data = sys_specs_dict["memory"]
 
         final_metrics = {}
         if "machines" not in final_metrics:
@@ -134,80 +250,380 @@ class RunCommand(BenchpressCommand):
                 )
                 exit(1)
 
+        self.role_in = role_in
+        self.sys_specs_dict = sys_specs_dict
+        self.final_metrics = final_metrics
+        self.history = history
+        self.json_reporter = json_reporter
+
+        runnable_jobs = []
         for job in jobs:
             if not verify_install(job.install_script):
                 click.echo("Benchmark {} not installed".format(job.name))
                 continue
-            click.echo('Running "{}": {}'.format(job.name, job.description))
 
             if args.dry_run:
+                click.echo('Running "{}": {}'.format(job.name, job.description))
                 job_cmd = job.dry_run(args.role, role_in)
                 click.echo(f"Execution command: {' '.join(job_cmd)}")
                 continue
 
-            try:
-                additional_hook_args = json.loads(args.hook_args)
-            except json.JSONDecodeError:
-                logger.warning(
-                    "Could not parse hook args - please make sure it's in valid JSON format"
+            if args.no_cgroup:
+                job.use_cgroup = False
+            runnable_jobs.append(job)
+
+        if not runnable_jobs:
+            json_reporter.close()
+            return
+
+        run_id = args.resume or runnable_jobs[0].uuid
+        if args.resume:
+            for job in runnable_jobs:
+                job.uuid = run_id
+                job.config["uuid"] = run_id
+        self.journal = RunJournal(run_id).open([job.name for job in runnable_jobs])
+        # job name -> error description of the jobs failed with --keep-going
+        self.failures = {}
+
+        pending_jobs = []
+        for job in runnable_jobs:
+            if self.journal.state(job.name) == DONE:
+                click.echo('Skipping "{}", done in run {}'.format(job.name, run_id))
+                continue
+            pending_jobs.append(job)
+
+        if args.parallel is not None:
+            self.run_parallel(args, pending_jobs)
+        else:
+            for job in pending_jobs:
+                self.run_journaled(args, job, args.keep_going)
+
+        json_reporter.close()
+
+        regression_failed = False
+        if args.check_regressions:
+            self.journal.load()
+            done_jobs = [
+                job for job in runnable_jobs if self.journal.state(job.name) == DONE
+            ]
+            reports = [self.check_regressions(args, job) for job in done_jobs]
+            regression_failed = not all(report.passed for report in reports)
+
+        if self.failures:
+            click.echo(
+                "{} job(s) failed: {}".format(
+                    len(self.failures), ", ".join(self.failures)
                 )
-                additional_hook_args = {}
+            )
+            self.echo_resume_hint()
+            exit(1)
+        if regression_failed:
+            exit(REGRESSION_EXIT_CODE)
 
-            additional_hooks = args.hooks
-            for hook in additional_hooks:
-                hook_opts = None
-                if hook in additional_hook_args:
-                    hook_opts = additional_hook_args[hook]
-                job.hooks.append((hook, HookFactory.create(hook), hook_opts))
+    def echo_resume_hint(self) -> None:
+        click.echo(
+            "Run `benchpress run --resume {}` to run the jobs that did not "
+            "complete".format(self.journal.run_id)
+        )
 
-            if args.disable_hooks:
-                click.echo("Hooks globally disabled as requested")
+    def run_journaled(self, args, job, keep_going) -> None:
+        """Run a job with run_job_iterations, recording its state in the
+        run journal. If the job fails, the error is re-raised, unless
+        keep_going is set and then it is recorded in self.failures.
+        """
+        self.journal.update(job, RUNNING)
+        try:
+            self.run_job_iterations(args, job)
+        except BaseException as e:
+            if isinstance(e, SystemExit):
+                error = f"exited with status {e.code}"
+            elif isinstance(e, KeyboardInterrupt):
+                error = "interrupted"
             else:
-                job.start_hooks()
-            metrics_dir = f"benchmark_metrics_{job.uuid}"
-            now = datetime.now()
-            date = now.strftime("%Y%m%d_%H%M")
-            symlink = job.name + "_timestamp:" + date + "_" + job.uuid
+                error = traceback.format_exc()
+            self.journal.update(job, FAILED, error)
+            if not keep_going or isinstance(e, KeyboardInterrupt):
+                if args.parallel is None or job.exclusive:
+                    self.echo_resume_hint()
+                raise
+            logger.error('Job "{}" failed: {}'.format(job.name, error))
+            click.echo('Job "{}" failed, running the remaining jobs'.format(job.name))
+            self.failures[job.name] = error
+            return
+        self.journal.update(job, DONE)
+
+    def run_job(self, args, job):
+        """Run a single job with its hooks, then report and save its results.
+
+        Returns:
+            dict: metrics of the job
+        """
+        click.echo('Running "{}": {}'.format(job.name, job.description))
+
+        try:
+            additional_hook_args = json.loads(args.hook_args)
+        except json.JSONDecodeError:
+            logger.warning(
+                "Could not parse hook args - please make sure it's in valid JSON format"
+            )
+            additional_hook_args = {}
+
+        additional_hooks = args.hooks
+        for hook in additional_hooks:
+            hook_opts = None
+            if hook in additional_hook_args:
+                hook_opts = additional_hook_args[hook]
+            job.hooks.append((hook, HookFactory.create(hook), hook_opts))
+
+        if args.disable_hooks:
+            click.echo("Hooks globally disabled as requested")
+        else:
+            job.start_hooks()
+        metrics_dir = f"benchmark_metrics_{job.uuid}"
+        now = datetime.now()
+        date = now.strftime("%Y%m%d_%H%M")
+        symlink = job.name + "_timestamp:" + date + "_" + job.uuid
+        # iterations of a repeated job share the metrics directory
+        if not os.path.lexists(f"benchmark_metrics_{symlink}"):
             os.symlink(metrics_dir, f"benchmark_metrics_{symlink}")
-            sys_specs_dict["run_id"] = job.uuid
-            sys_specs_dict["timestamp"] = job.timestamp
+        self.sys_specs_dict["run_id"] = job.uuid
+        self.sys_specs_dict["timestamp"] = job.timestamp
 
-            final_metrics["run_id"] = job.uuid
-            final_metrics["timestamp"] = job.timestamp
+        self.final_metrics["run_id"] = job.uuid
+        self.final_metrics["timestamp"] = job.timestamp
 
-            final_metrics["benchmark_name"] = job.name
-            final_metrics["benchmark_desc"] = job.description
-            # Hooks structured as: hook_name: hook_options
-            job_hooks = ["{}: {}".format(hook[0], hook[2]) for hook in job.hooks]
-            final_metrics["benchmark_hooks"] = job_hooks
+        self.final_metrics["benchmark_name"] = job.name
+        self.final_metrics["benchmark_desc"] = job.description
+        # Hooks structured as: hook_name: hook_options
+        job_hooks = ["{}: {}".format(hook[0], hook[2]) for hook in job.hooks]
+        self.final_metrics["benchmark_hooks"] = job_hooks
 
-            try:
-                metrics = job.run(args.role, role_in)
-            except Exception:
-                # Continue to propagate exception up the stack
-                raise
-            finally:
-                # Fill benchmark_args after running to make sure
-                # variables are substituted
-                final_metrics["benchmark_args"] = job.args
-                # Make sure hooks are stopped, even if job failed
-                if not args.disable_hooks:
-                    job.stop_hooks()
+        archive_path = None
+        if not args.no_archive_output:
+            archive_path = self.history.output_archive_path(
+                job.safe_name, now, job.uuid, job.iteration_num
+            )
 
-            final_metrics["metrics"] = metrics
-            stdout_reporter = ReporterFactory.create("stdout")
-            click.echo("Results Report:")
-            stdout_reporter.report(job, final_metrics)
+        try:
+            # job.run consumes the role input it uses
+            metrics = job.run(args.role, dict(self.role_in), archive_path)
+        except Exception:
+            # Continue to propagate exception up the stack
+            raise
+        finally:
+            # Fill benchmark_args after running to make sure
+            # variables are substituted
+            self.final_metrics["benchmark_args"] = job.args
+            # Make sure hooks are stopped, even if job failed
+            if not args.disable_hooks:
+                job.stop_hooks()
 
-            json_reporter.report(job, final_metrics)
-            json_reporter.report(job, sys_specs_dict)
+        self.final_metrics["metrics"] = metrics
+        stdout_reporter = ReporterFactory.create("stdout")
+        click.echo("Results Report:")
+        stdout_reporter.report(job, self.final_metrics)
 
-            history.save_job_result(job, metrics, now)
+        self.json_reporter.report(job, self.final_metrics)
+        self.json_reporter.report(job, self.sys_specs_dict)
 
+        self.history.save_job_result(job, metrics, now)
+
+        click.echo(
+            'Finished running "{}": {} with uuid: {}'.format(
+                job.name, job.description, job.uuid
+            )
+        )
+        return metrics
+
+    def get_repeat_metric(self, args, job, metrics):
+        """Value of the metric watched by --repeat-until, None if missing."""
+        if args.repeat_metric is None:
+            return baseline.get_raw_perf_metric(job.safe_name, metrics)
+        return regression.flatten_metrics(metrics).get(args.repeat_metric)
+
+    def run_job_iterations(self, args, job) -> None:
+        """Run a job once, or with --repeat-until until its scored metric
+        has converged. All iterations share the job's uuid and metrics
+        directory and are numbered by iteration_num.
+        """
+        if args.repeat_until is None:
+            self.run_job(args, job)
+            return
+
+        # running a job formats its args and appends the extra hooks
+        job_args = list(job.args)
+        job_hooks = list(job.hooks)
+        first = int(job.iteration_num) if job.iteration_num is not None else 1
+        values = []
+        for i in range(args.max_repeats):
+            job.iteration_num = first + i
+            job.config["iteration_num"] = job.iteration_num
+            job.args = list(job_args)
+            job.hooks = list(job_hooks)
+            metrics = self.run_job(args, job)
+
+            value = self.get_repeat_metric(args, job, metrics or {})
+            if value is None:
+                logger.warning(
+                    'No metric to watch for "{}", not repeating it'.format(job.name)
+                )
+                return
+            values.append(float(value))
+            if len(values) < max(args.min_repeats, 2):
+                continue
+
+            median = statistics.median(values)
+            low, high = regression.bootstrap_median_ci(values)
+            width = (high - low) / abs(median) * 100 if median else float("inf")
             click.echo(
-                'Finished running "{}": {} with uuid: {}'.format(
-                    job.name, job.description, job.uuid
+                '"{}" after {} iterations: median {:g}, 95% CI [{:g}, {:g}] '
+                "({:.2f}% of median)".format(
+                    job.name, len(values), median, low, high, width
                 )
             )
+            if width <= args.repeat_until:
+                return
+        click.echo(
+            '"{}" did not converge to {:g}% within {} iterations'.format(
+                job.name, args.repeat_until, args.max_repeats
+            )
+        )
 
-        json_reporter.close()
+    def run_parallel(self, args, jobs) -> None:
+        """Run non-exclusive jobs concurrently on disjoint CPU partitions,
+        then run exclusive jobs one after another.
+        """
+        parallel_jobs = [job for job in jobs if not job.exclusive]
+        exclusive_jobs = [job for job in jobs if job.exclusive]
+
+        if parallel_jobs:
+            cpus = sorted(os.sched_getaffinity(0))
+            num_partitions = args.parallel
+            if num_partitions <= 0:
+                num_partitions = max(1, len(cpus) // PARALLEL_MIN_CPUS)
+            num_partitions = min(num_partitions, len(parallel_jobs))
+            partitions = partition_cpus(cpus, num_partitions)
+            click.echo(
+                "Running {} job(s) in parallel on {} CPU partition(s)".format(
+                    len(parallel_jobs), len(partitions)
+                )
+            )
+
+            for job in parallel_jobs:
+                # Give every job its own uuid so that hooks and reporters
+                # write to separate metrics directories
+                job.uuid = f"{job.uuid}-{job.safe_name}"
+                job.config["uuid"] = job.uuid
+
+            def run_in_worker(job):
+                # SQLite connections must not be shared across fork()
+                self.history = History(args.results, args.results_backend)
+                # failures are reported to the scheduler
+                self.run_journaled(args, job, False)
+
+            results = ParallelJobScheduler(partitions).run(
+                parallel_jobs, run_in_worker
+            )
+            failed = {name: err for name, err in results.items() if err is not None}
+            for job in parallel_jobs:
+                if job.name not in failed:
+                    continue
+                err = failed[job.name]
+                logger.error('Job "{}" failed: {}'.format(job.name, err))
+                click.echo('Job "{}" failed'.format(job.name))
+                # also covers workers that died without updating the journal
+                self.journal.update(job, FAILED, err)
+            if failed and not args.keep_going:
+                self.json_reporter.close()
+                self.echo_resume_hint()
+                exit(1)
+            self.failures.update(failed)
+
+        for job in exclusive_jobs:
+            self.run_journaled(args, job, args.keep_going)
+
+    def check_regressions(self, args, job):
+        """Compare the saved result of a job with the earlier runs that
+        used the same config. A run repeated with --repeat-until counts
+        once, with the median of its iterations.
+
+        Returns:
+            RegressionReport
+        """
+        history = History(args.results, args.results_backend)
+        runs = history.load_matching_runs(job)
+        current = dict(runs).get(job.uuid)
+        if not current:
+            raise RuntimeError(f'No saved result of "{job.name}" run {job.uuid}')
+        baseline_metrics = [
+            regression.median_metrics([e.metrics for e in entries])
+            for run_id, entries in runs
+            if run_id != job.uuid
+        ]
+        report = regression.check_regressions(
+            job,
+            regression.median_metrics([e.metrics for e in current]),
+            baseline_metrics[: args.regression_baseline],
+            args.regression_tolerance,
+            directions=baseline.get_raw_perf_metric_directions(job.safe_name),
+        )
+
+        click.echo(
+            'Regression check of "{}" against {} earlier run(s):'.format(
+                job.name, report.baseline_runs
+            )
+        )
+        if report.checks:
+            table = [
+                [
+                    check.name,
+                    check.value,
+                    check.median,
+                    check.mad,
+                    "[{:g}, {:g}]".format(*check.ci),
+                    "{:+.2f}%".format(check.deviation),
+                    "{:+.2f}".format(check.robust_z),
+                    "{:g}%".format(check.tolerance),
+                    check.direction or "unknown",
+                    check.result,
+                ]
+                for check in report.checks
+            ]
+            headers = [
+                "Metric",
+                "Value",
+                "Median",
+                "MAD",
+                "Median CI",
+                "Deviation",
+                "Robust z",
+                "Tolerance",
+                "Better",
+                "Result",
+            ]
+            click.echo(tabulate.tabulate(table, headers, tablefmt=TABLE_FORMAT))
+        if report.unchecked:
+            click.echo(
+                "{} metric(s) not checked, fewer than {} earlier values".format(
+                    len(report.unchecked), regression.MIN_BASELINE_RUNS
+                )
+            )
+        if report.improvements:
+            click.echo(
+                '"{}": {} metric(s) improved: {}'.format(
+                    job.name,
+                    len(report.improvements),
+                    ", ".join(check.name for check in report.improvements),
+                )
+            )
+        if report.failures:
+            click.echo(
+                '"{}": {} metric(s) out of tolerance: {}'.format(
+                    job.name,
+                    len(report.failures),
+                    ", ".join(check.name for check in report.failures),
+                )
+            )
+        else:
+            click.echo('"{}": no regression'.format(job.name))
+        return report
@@ -6,7 +6,6 @@
 
 # pyre-unsafe
 import argparse
-import io
 import logging
 import os
 import shlex
@@ -21,7 +20,8 @@ try:
     from benchpress import PROJECT, VERSION  # @manual
 except ImportError:
     from benchpress.version import __PROJECT__ as PROJECT, __VERSION__ as VERSION
-from benchpress.lib.job import Job, JobSuiteBuilder
+from benchpress.lib.history import HISTORY_BACKENDS
+from benchpress.lib.job import JobMap, JobSuiteBuilder
 from benchpress.lib.job_listing import create_job_listing
 from benchpress.lib.reporter import JSONFileReporter, ScoreReporter, StdoutReporter
 from benchpress.lib.reporter_factory import ReporterFactory
@@ -30,9 +30,11 @@ from benchpress.plugins.hooks import user_script
 
 from .commands.clean import CleanCommand
 from .commands.command import TABLE_FORMAT
+from .commands.history import HistoryCommand
 from .commands.info import InfoCommand
 from .commands.install import InstallCommand
 from .commands.list import ListCommand
+from .commands.reparse import ReparseCommand
 from .commands.report import ReportCommand
 from .commands.run import RunCommand
 from .commands.system_check import SystemCheckCommand
@@ -102,22 +104,17 @@ class Benchpress:
                 else:
                     j["hooks"] = [custom_hook]
 
-        jobs = [
-            Job(
-                j,
-                self.config.benchmarks_specs[j["benchmark"]],
-                self.config.toolchain_specs,
-            )
-            for j in self.config.jobs_specs
-            if "tests" not in j
-        ]
-        self.jobs = {j.name: j for j in jobs}
+        self.jobs = JobMap(
+            [j for j in self.config.jobs_specs if "tests" not in j],
+            self.config.benchmarks_specs,
+            self.config.toolchain_specs,
+        )
 
     def _create_job_suites(self):
         # After all the regulars jobs are created, create the job suites
         builder = JobSuiteBuilder()
-        for job in self.jobs.values():
-            builder.add_job(job)
+        for name in list(self.jobs):
+            builder.add_tags(name, self.jobs.job_tags(name))
 
         for suite_name, job_names in builder.get_suites().items():
             if suite_name in self.jobs:
@@ -136,16 +133,7 @@ class Benchpress:
                     self.jobs[job] = job_obj
 
     def list_jobs(self, group_key=None):
-        job_list = []
-        for job in self.jobs.values():
-            if not hasattr(job, "config"):
-                continue
-            item = {
-                "name": job.name,
-                "description": job.description,
-                "tags": job.tags,
-            }
-            job_list.append(item)
+        job_list = self.jobs.job_summaries()
         return create_job_listing(job_list, TABLE_FORMAT, group_key)
 
 
@@ -163,6 +151,8 @@ def setup_parser():
         CleanCommand(),
         InfoCommand(),
         SystemCheckCommand(),
+        HistoryCommand(),
+        ReparseCommand(),
     ]
 
     parser = argparse.ArgumentParser()
@@ -222,6 +212,13 @@ def setup_parser():
         default="./results",
         help="directory to load/store results",
     )
+    parser.add_argument(
+        "--results-backend",
+        dest="results_backend",
+        choices=sorted(HISTORY_BACKENDS.keys()),
+        default="sqlite",
+        help="storage backend for saved results",
+    )
     parser.add_argument("--verbose", "-v", action="count", default=0)
     parser.add_argument("--version", action="version", version=f"{PROJECT} {VERSION}")
 
@@ -251,80 +248,63 @@ def load_config(args) -> config.BenchpressConfig:
     If either `--jobs` or `--benchmarks` paths have been provided,
     override default configs to use those instead.
     """
-    try:
-        override_benchmark = False
-        if args.benchmarks and args.benchmarks in config.ALT_BENCHMARKS_CONFIGS:
-            logger.info(f"Using alternative benchmark suite {args.benchmarks}.")
-            bm_config_path = config.ALT_BENCHMARKS_CONFIGS[args.benchmarks]
-            override_benchmark = True
-        else:
-            bm_config_path = config.BENCHMARKS_CONFIG_PATH
-
-        # pyre-fixme[16]: `Iterator` has no attribute `__enter__`.
-        with bm_config_path as bench_path:
-            benchmarks_specs = bench_path.open()
-            if args.benchmarks and not override_benchmark:
-                benchmarks_specs_path = os.path.abspath(args.benchmarks)
-
-                # benchmarks file path existence check
-                if not os.path.exists(benchmarks_specs_path):
-                    logger.error(
-                        'benchmarks file with name "{}" not found'.format(
-                            benchmarks_specs_path
-                        )
+    override_benchmark = False
+    if args.benchmarks and args.benchmarks in config.ALT_BENCHMARKS_CONFIGS:
+        logger.info(f"Using alternative benchmark suite {args.benchmarks}.")
+        bm_config_path = config.ALT_BENCHMARKS_CONFIGS[args.benchmarks]
+        override_benchmark = True
+    else:
+        bm_config_path = config.BENCHMARKS_CONFIG_PATH
+
+    if override_benchmark:
+        job_config_path = config.ALT_JOBS_CONFIGS[args.benchmarks]
+    else:
+        job_config_path = config.JOBS_CONFIG_PATH
+
+    # pyre-fixme[16]: `Iterator` has no attribute `__enter__`.
+    with bm_config_path as bench_path, job_config_path as jobs_path, (
+        config.TOOLCHAIN_CONFIG_PATH
+    ) as toolchain_path:
+        benchmarks_specs_path = bench_path
+        if args.benchmarks and not override_benchmark:
+            benchmarks_specs_path = os.path.abspath(args.benchmarks)
+
+            # benchmarks file path existence check
+            if not os.path.exists(benchmarks_specs_path):
+                logger.error(
+                    'benchmarks file with name "{}" not found'.format(
+                        benchmarks_specs_path
                     )
-                    exit(1)
-
-                logger.warning("Overriding default benchmarks!")
-                logger.info(
-                    'Loading benchmarks from "{}"'.format(benchmarks_specs_path)
                 )
-                with open(benchmarks_specs_path) as bs:
-                    # Reads everything into memory
-                    benchmarks_specs = bs.read()
-
-        if override_benchmark:
-            job_config_path = config.ALT_JOBS_CONFIGS[args.benchmarks]
-        else:
-            job_config_path = config.JOBS_CONFIG_PATH
+                exit(1)
 
-        with job_config_path as jobs_path:
-            jobs_specs = jobs_path.open()
+            logger.warning("Overriding default benchmarks!")
+            logger.info('Loading benchmarks from "{}"'.format(benchmarks_specs_path))
 
-            if args.jobs_file:
-                jobs_specs_path = os.path.abspath(args.jobs_file)
+        jobs_specs_path = jobs_path
+        if args.jobs_file:
+            jobs_specs_path = os.path.abspath(args.jobs_file)
 
-                # jobs file path existence check
-                if not os.path.exists(jobs_specs_path):
-                    logger.error(
-                        'jobs file with name "{}" not found'.format(jobs_specs_path)
-                    )
-                    exit(1)
-
-                logger.warning("Overriding default jobs!")
-                logger.info('Loading jobs from "{}"'.format(jobs_specs_path))
-                with open(jobs_specs_path) as jb:
-                    # Reads everything into memory
-                    jobs_specs = jb.read()
-
-        with config.TOOLCHAIN_CONFIG_PATH as toolchain_path:
-            toolchain_specs = toolchain_path.open()
-            if args.toolchain_file:
-                toolchain_specs_path = os.path.abspath(args.toolchain_file)
-                logger.warning("Overriding default toolchain config!")
-                logger.info(
-                    'Loading toolchain config from "{}"'.format(toolchain_specs_path)
+            # jobs file path existence check
+            if not os.path.exists(jobs_specs_path):
+                logger.error(
+                    'jobs file with name "{}" not found'.format(jobs_specs_path)
                 )
-                with open(toolchain_specs_path) as ts:
-                    toolchain_specs = ts.read()
+                exit(1)
+
+            logger.warning("Overriding default jobs!")
+            logger.info('Loading jobs from "{}"'.format(jobs_specs_path))
+
+        toolchain_specs_path = toolchain_path
+        if args.toolchain_file:
+            toolchain_specs_path = os.path.abspath(args.toolchain_file)
+            logger.warning("Overriding default toolchain config!")
+            logger.info(
+                'Loading toolchain config from "{}"'.format(toolchain_specs_path)
+            )
 
         conf = config.BenchpressConfig()
-        conf.load(benchmarks_specs, jobs_specs, toolchain_specs)
-    finally:
-        # Close opened files if any
-        for spec in [benchmarks_specs, jobs_specs, toolchain_specs]:
-            if isinstance(spec, io.IOBase):
-                spec.close()
+        conf.load_files(benchmarks_specs_path, jobs_specs_path, toolchain_specs_path)
 
     return conf
 
@@ -27,15 +27,25 @@ Constants:
 
 """
 
+import hashlib
 import importlib.resources
 import logging
+import os
+import pickle
+import stat
+import tempfile
 from contextlib import AbstractContextManager
 from pathlib import Path
-from typing import IO, Iterator, Union
+from typing import Any, IO, Iterator, Union
 
 import yaml
 from benchpress.lib import open_source
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # __package__ indicates relative to this package
 BENCHMARKS_CONFIG_PATH: AbstractContextManager = importlib.resources.path(
     "benchpress.config", "benchmarks.yml"
@@ -49,6 +59,13 @@ TOOLCHAIN_CONFIG_PATH: AbstractContextManager = importlib.resources.path(
     "benchpress.config", "toolchain.yml"
 )
 
+# Parsed config files are cached here, see load_yaml_file()
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "benchpress",
+    "config",
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,6 +88,62 @@ if not open_source:
 register_benchmark_suite("wdl")
 
 
+def load_yaml(stream: Union[bytes, IO[bytes], str, IO[str]]) -> Any:
+    """yaml.safe_load() with the C loader if libyaml is available."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def _check_private(st: os.stat_result, path: str) -> None:
+    """Raise PermissionError unless `path` is owned by the current user and
+    not writable by anyone else, since unpickling it can run arbitrary code.
+    """
+    if st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} is not private to the current user")
+
+
+def _read_cache(cache_dir: str, cache_path: str) -> Any:
+    _check_private(os.lstat(cache_dir), cache_dir)
+    fd = os.open(cache_path, os.O_RDONLY | os.O_NOFOLLOW)
+    with os.fdopen(fd, "rb") as f:
+        _check_private(os.fstat(f.fileno()), cache_path)
+        return pickle.load(f)
+
+
+def load_yaml_file(path: Union[str, Path], cache_dir: str = CACHE_DIR) -> Any:
+    """Load a YAML file, reusing the result of an earlier parse of the same
+    file as long as its size and modification time are unchanged.
+
+    The cache is only read from a directory and files owned by the current
+    user and writable by nobody else. Any problem with it falls back to
+    parsing the file.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    cache_path = os.path.join(
+        cache_dir, hashlib.sha1(path.encode("utf-8")).hexdigest() + ".pickle"
+    )
+    try:
+        cached_key, data = _read_cache(cache_dir, cache_path)
+        if cached_key == key:
+            return data
+    except Exception:
+        # missing, stale, unreadable or untrusted cache entry
+        pass
+
+    with open(path, "rb") as f:
+        data = load_yaml(f)
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Could not cache {path}: {e}")
+    return data
+
+
 class BenchpressConfig:
     def __init__(self):
         self.benchmarks_specs = None
@@ -82,10 +155,22 @@ class BenchpressConfig:
         jobs_specs_stream: Union[bytes, IO[bytes], str, IO[str]],
         toolchain_specs_stream: Union[bytes, IO[bytes], str, IO[str]],
     ):
-        self.benchmarks_specs = yaml.safe_load(benchmarks_specs_stream)
-        self.jobs_specs = yaml.safe_load(jobs_specs_stream)
+        self.benchmarks_specs = load_yaml(benchmarks_specs_stream)
+        self.jobs_specs = load_yaml(jobs_specs_stream)
+        # pyre-fixme[16]: `BenchpressConfig` has no attribute `toolchain_specs`.
+        self.toolchain_specs = load_yaml(toolchain_specs_stream)
+
+    def load_files(
+        self,
+        benchmarks_specs_path: Union[str, Path],
+        jobs_specs_path: Union[str, Path],
+        toolchain_specs_path: Union[str, Path],
+    ):
+        """Like load(), from files whose parsed content is cached."""
+        self.benchmarks_specs = load_yaml_file(benchmarks_specs_path)
+        self.jobs_specs = load_yaml_file(jobs_specs_path)
         # pyre-fixme[16]: `BenchpressConfig` has no attribute `toolchain_specs`.
-        self.toolchain_specs = yaml.safe_load(toolchain_specs_stream)
+        self.toolchain_specs = load_yaml_file(toolchain_specs_path)
 
     def __repr__(self) -> str:
         # pyre-fixme[16]: `BenchpressConfig` has no attribute `benchmarks_specs_path`.
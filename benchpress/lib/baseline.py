@@ -53,6 +53,28 @@ def get_raw_perf_metric(job_name, metrics):
         return None
 
 
+def get_raw_perf_metric_directions(job_name):
+    """Flattened names of the metrics get_raw_perf_metric() reads for a job,
+    mapped to "higher" or "lower" depending on which is better.
+    """
+    bm_name = JOB_TO_BM.get(job_name)
+    if bm_name == "taobench":
+        return {"total_qps": "higher"}
+    elif job_name == "feedsim_default":
+        return {"final_achieved_qps": "higher"}
+    elif job_name == "feedsim_autoscale":
+        return {"overall.final_achieved_qps": "higher"}
+    elif bm_name == "django":
+        return {"Transaction rate_trans/sec": "higher"}
+    elif bm_name == "mediawiki":
+        return {"Combined.Siege RPS": "higher", "Combined.Wrk RPS": "higher"}
+    elif bm_name == "sparkbench":
+        return {"execution_time_test_93586": "lower"}
+    elif bm_name == "video_transcode_svt":
+        return {"throughput_all_levels_hmean_MBps": "higher"}
+    return {}
+
+
 def get_score(job_name, metrics):
     raw_metric = get_raw_perf_metric(job_name, metrics)
     if raw_metric is None:
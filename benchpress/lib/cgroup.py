@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import logging
+import os
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+# Key of the resource accounting in the metrics of a job
+METRICS_KEY = "cgroup"
+
+# Parent of the job cgroups, under the cgroup v2 mount point
+PARENT_NAME = "benchpress"
+
+# Controllers enabled for the job cgroups when available
+CONTROLLERS = ("cpu", "memory", "io", "pids")
+
+PRESSURE_RESOURCES = ("cpu", "memory", "io")
+
+# Seconds to wait for the processes of a killed cgroup to exit
+KILL_TIMEOUT = 10
+
+_warned_unavailable = False
+
+
+def find_cgroup2_mount():
+    """Return the mount point of the cgroup v2 hierarchy, None if absent."""
+    try:
+        with open("/proc/self/mounts", "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3 and fields[2] == "cgroup2":
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+def read_int(path):
+    with open(path, "r") as f:
+        return int(f.read().strip())
+
+
+def read_flat_keyed(path):
+    """Read a file of "key value" lines such as cpu.stat or memory.stat."""
+    stats = {}
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 2:
+                stats[fields[0]] = int(fields[1])
+    return stats
+
+
+def read_io_stat(path):
+    """Read io.stat, summing the counters of all devices."""
+    stats = {}
+    with open(path, "r") as f:
+        for line in f:
+            # "<major>:<minor> rbytes=... wbytes=... rios=... ..."
+            for field in line.split()[1:]:
+                key, _, value = field.partition("=")
+                stats[key] = stats.get(key, 0) + int(value)
+    return stats
+
+
+def read_pressure(path):
+    """Read the total stall times (usec) of a PSI file."""
+    stats = {}
+    with open(path, "r") as f:
+        for line in f:
+            # "some avg10=0.00 avg60=0.00 avg300=0.00 total=12345"
+            fields = line.split()
+            for field in fields[1:]:
+                if field.startswith("total="):
+                    stats[fields[0]] = int(field[len("total=") :])
+    return stats
+
+
+def _enable_controllers(path):
+    for controller in CONTROLLERS:
+        try:
+            with open(os.path.join(path, "cgroup.subtree_control"), "w") as f:
+                f.write(f"+{controller}")
+        except OSError:
+            # not available in this hierarchy, or not delegated to us
+            pass
+
+
+def create_job_cgroup(name):
+    """Create a leaf cgroup for a job run.
+
+    Returns:
+        JobCgroup, or None if cgroup v2 cannot be used on this system
+    """
+    global _warned_unavailable
+    mount = find_cgroup2_mount()
+    try:
+        if mount is None:
+            raise OSError("no cgroup2 hierarchy mounted")
+        parent = os.path.join(mount, PARENT_NAME)
+        os.makedirs(parent, exist_ok=True)
+        _enable_controllers(mount)
+        _enable_controllers(parent)
+        path = os.path.join(parent, name)
+        os.mkdir(path)
+    except OSError as e:
+        if not _warned_unavailable:
+            logger.warning(
+                "Running jobs without cgroup containment and resource "
+                "accounting ({})".format(e)
+            )
+            _warned_unavailable = True
+        return None
+    return JobCgroup(path)
+
+
+class JobCgroup:
+    """cgroup v2 leaf that contains every process started by a job.
+
+    The usage reported by finish() is the difference between the counters
+    read when the cgroup is created and after all of its processes exited.
+
+    Attributes:
+        path (str): path of the cgroup directory
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.removed = False
+        self.start_time = time.monotonic()
+        self.before = self.read_stats()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def wrap(self, cmd):
+        """Command line that moves itself into the cgroup and then executes
+        `cmd`, so that the benchmark and all of its children are contained
+        from their start.
+        """
+        script = 'echo $$ > "$0" && exec "$@"'
+        return ["/bin/sh", "-c", script, self._file("cgroup.procs")] + list(cmd)
+
+    def pids(self):
+        try:
+            with open(self._file("cgroup.procs"), "r") as f:
+                return [int(pid) for pid in f.read().split()]
+        except FileNotFoundError:
+            return []
+
+    def populated(self):
+        try:
+            with open(self._file("cgroup.events"), "r") as f:
+                for line in f:
+                    if line.startswith("populated "):
+                        return line.split()[1] != "0"
+        except FileNotFoundError:
+            pass
+        return bool(self.pids())
+
+    def kill(self):
+        """SIGKILL every process of the cgroup."""
+        try:
+            with open(self._file("cgroup.kill"), "w") as f:
+                f.write("1")
+            return
+        except OSError:
+            # cgroup.kill needs Linux 5.14
+            pass
+        for pid in self.pids():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def kill_and_wait(self, timeout=KILL_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while self.populated():
+            self.kill()
+            if time.monotonic() > deadline:
+                logger.warning(
+                    "Processes of cgroup {} did not exit: {}".format(
+                        self.path, self.pids()
+                    )
+                )
+                return
+            time.sleep(0.05)
+
+    def read_stats(self):
+        stats = {}
+        readers = (
+            ("cpu", "cpu.stat", read_flat_keyed),
+            ("memory", "memory.stat", read_flat_keyed),
+            ("memory_peak", "memory.peak", read_int),
+            ("io", "io.stat", read_io_stat),
+        )
+        for key, name, reader in readers:
+            try:
+                stats[key] = reader(self._file(name))
+            except (OSError, ValueError):
+                pass
+        for resource in PRESSURE_RESOURCES:
+            try:
+                stats[f"{resource}_pressure"] = read_pressure(
+                    self._file(f"{resource}.pressure")
+                )
+            except (OSError, ValueError):
+                pass
+        return stats
+
+    def finish(self):
+        """Kill the processes left by the job, then collect the resource
+        usage of the run and remove the cgroup.
+
+        Returns:
+            dict: resource usage, to be added to the job metrics
+        """
+        leftovers = self.pids()
+        if leftovers:
+            logger.warning(
+                "Killing {} process(es) left running by the job: {}".format(
+                    len(leftovers), " ".join(map(str, leftovers))
+                )
+            )
+        self.kill_and_wait()
+        elapsed = time.monotonic() - self.start_time
+        after = self.read_stats()
+        self.remove()
+
+        usage = {
+            "elapsed_seconds": round(elapsed, 3),
+            "leftover_processes": len(leftovers),
+        }
+        for key in ("cpu", "memory", "io"):
+            if key in self.before and key in after:
+                usage[key] = {
+                    name: value - self.before[key].get(name, 0)
+                    for name, value in after[key].items()
+                }
+        if "usage_usec" in usage.get("cpu", {}):
+            usage["cpu_seconds"] = usage["cpu"]["usage_usec"] / 1e6
+        if "memory_peak" in after:
+            usage["memory_peak_bytes"] = after["memory_peak"]
+        pressure = {}
+        for resource in PRESSURE_RESOURCES:
+            key = f"{resource}_pressure"
+            if key not in self.before or key not in after:
+                continue
+            pressure[resource] = {}
+            for kind, total in after[key].items():
+                stalled = total - self.before[key].get(kind, 0)
+                pressure[resource][f"{kind}_usec"] = stalled
+                if elapsed > 0:
+                    pressure[resource][f"{kind}_percent"] = round(
+                        stalled / (elapsed * 1e6) * 100, 3
+                    )
+        if pressure:
+            usage["pressure"] = pressure
+        return usage
+
+    def remove(self):
+        if self.removed:
+            return
+        self.removed = True
+        try:
+            os.rmdir(self.path)
+        except OSError as e:
+            logger.warning("Could not remove cgroup {}: {}".format(self.path, e))
+
+    def close(self):
+        """Kill any remaining process and remove the cgroup, if finish() was
+        not called.
+        """
+        if not self.removed:
+            self.kill_and_wait()
+            self.remove()
@@ -4,10 +4,15 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import importlib
+
 
 class BaseFactory:
     """Factory to construct instances of classes based on name.
 
+    Classes can be registered directly, or lazily by their import path so
+    that their module is only imported when the class is first needed.
+
     Attributes:
         base_class (class): base class that registered classes must subclass
     """
@@ -16,11 +21,31 @@ class BaseFactory:
         """Create a BaseFactory with base_class as the supertype."""
         self.base_class = base_class
         self.classes = {}
+        # name -> "package.module:ClassName" of classes not imported yet
+        self.lazy_classes = {}
 
     @property
     def registered_names(self):
         """list of str: class names registered with the factory."""
-        return list(self.classes.keys())
+        names = list(self.classes.keys())
+        names.extend(name for name in self.lazy_classes if name not in self.classes)
+        return names
+
+    def get(self, name):
+        """Return the class registered as `name`, importing it if needed.
+
+        Args:
+            name (str): name of the item
+        """
+        if name not in self.classes:
+            if name not in self.lazy_classes:
+                raise KeyError(
+                    'No type "{}". ' "Did you forget to register() it?".format(name)
+                )
+            module_name, _, class_name = self.lazy_classes[name].partition(":")
+            module = importlib.import_module(module_name)
+            self.register(name, getattr(module, class_name))
+        return self.classes[name]
 
     def create(self, name):
         """Find the subclass with the correct name and instantiates it.
@@ -28,11 +53,7 @@ class BaseFactory:
         Args:
             name (str): name of the item
         """
-        if name not in self.classes:
-            raise KeyError(
-                'No type "{}". ' "Did you forget to register() it?".format(name)
-            )
-        return self.classes[name]()
+        return self.get(name)()
 
     def register(self, name, subclass):
         """Registers a class with the factory.
@@ -43,3 +64,13 @@ class BaseFactory:
         """
         assert issubclass(subclass, self.base_class)
         self.classes[name] = subclass
+
+    def register_lazy(self, name, target):
+        """Registers a class by import path, to be imported on first use.
+
+        Args:
+            name (str): name of the class
+            target (str): "package.module:ClassName" of a concrete subclass of
+                base_class
+        """
+        self.lazy_classes[name] = target
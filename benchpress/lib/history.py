@@ -4,12 +4,71 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import hashlib
 import json
 import logging
 import os
+import sqlite3
+from abc import ABCMeta, abstractmethod
+
+from benchpress.lib.output_archive import ARCHIVE_SUFFIX
 
 logger = logging.getLogger(__name__)
 
+# Name of the SQLite database file under the results directory
+SQLITE_DB_NAME = "history.db"
+
+# Job config keys that change on every invocation and therefore must not be
+# part of the config hash
+RUN_SPECIFIC_CONFIG_KEYS = ("uuid", "timestamp", "iteration_num", "hook_bg_duration")
+
+# Format of the timestamp of saved records
+RECORD_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Iteration number of the records saved without one
+DEFAULT_ITERATION = 1
+
+
+def config_hash(config):
+    """Compute a stable hash of a job config, ignoring per-run keys.
+
+    Args:
+        config (dict): job config
+
+    Returns:
+        str: hex digest identifying the config
+    """
+    stable = {k: v for k, v in config.items() if k not in RUN_SPECIFIC_CONFIG_KEYS}
+    blob = json.dumps(stable, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def iteration_number(value):
+    """Convert an iteration_num job config value to an int."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_ITERATION
+
+
+def record_iteration(record):
+    """Return the iteration number of a record.
+
+    Iterations of a repeated job share its uuid and may start within the
+    same second, so the iteration number is part of the key of a record.
+    """
+    return iteration_number(record["config"].get("iteration_num"))
+
+
+def iteration_suffix(iteration):
+    """Suffix distinguishing the files of an iteration, empty for the
+    default one so that single runs keep their original file names.
+    """
+    iteration = iteration_number(iteration)
+    if iteration == DEFAULT_ITERATION:
+        return ""
+    return f"_{iteration}"
+
 
 class HistoryEntry:
     """Results from a historical run of a job
@@ -34,76 +93,410 @@ class HistoryEntry:
         self.metrics = record["metrics"]
 
 
+class HistoryBackend(object, metaclass=ABCMeta):
+    """Storage backend used by History to persist result records.
+
+    A record is the dictionary that HistoryEntry is built from, with the keys
+    "job", "timestamp", "metrics" and "config".
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @abstractmethod
+    def load(self, job_name, limit=None):
+        """Load records of a job, most recent first.
+
+        Args:
+            job_name (str): safe name of the job
+            limit (int): maximum number of records to return, None for all
+        """
+
+    @abstractmethod
+    def save(self, job_name, record):
+        """Persist one record of a job.
+
+        Args:
+            job_name (str): safe name of the job
+            record (dict): record to save
+        """
+
+    def save_many(self, job_name, records):
+        """Persist several records of a job, replacing the saved records of
+        the same runs.
+
+        Args:
+            job_name (str): safe name of the job
+            records (list of dict): records to save
+        """
+        for record in records:
+            self.save(job_name, record)
+
+    def load_by_config_hash(self, job_name, digest, limit=None):
+        """Load records of a job whose config hashes to `digest`, most recent
+        first.
+
+        Args:
+            job_name (str): safe name of the job
+            digest (str): config hash, see config_hash()
+            limit (int): maximum number of records to return, None for all
+        """
+        records = [r for r in self.load(job_name) if config_hash(r["config"]) == digest]
+        if limit is not None:
+            records = records[:limit]
+        return records
+
+    def config_hashes(self, job_name):
+        """Return the set of config hashes recorded for a job."""
+        return {config_hash(r["config"]) for r in self.load(job_name)}
+
+    def job_names(self):
+        """Return the safe names of all jobs with saved results."""
+        return []
+
+
+class JSONDirectoryBackend(HistoryBackend):
+    """Original on-disk layout, one JSON file per run:
+    <path>/<job_name>/<timestamp>.json
+
+    Iterations other than the first of a repeated run are saved as
+    <timestamp>_<iteration>.json.
+    """
+
+    def load(self, job_name, limit=None):
+        records = []
+        rootdir = os.path.join(self.path, job_name)
+        for directory, dirs, files in os.walk(rootdir):
+            # archived benchmark output is kept next to the results
+            dirs[:] = [d for d in dirs if not d.endswith(ARCHIVE_SUFFIX)]
+            for f in files:
+                if not f.endswith(".json"):
+                    continue
+                with open(os.path.join(directory, f), "r") as record:
+                    records.append(json.load(record))
+        records.sort(key=lambda r: (r["timestamp"], record_iteration(r)), reverse=True)
+        if limit is not None:
+            records = records[:limit]
+        return records
+
+    def save(self, job_name, record):
+        directory = os.path.join(self.path, job_name)
+        os.makedirs(directory, exist_ok=True)
+
+        name = record["timestamp"] + iteration_suffix(record_iteration(record))
+        path = os.path.join(directory, name) + ".json"
+
+        with open(path, "w") as f:
+            json.dump(record, f, sort_keys=True, indent=2)
+
+    def job_names(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            d
+            for d in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, d))
+        )
+
+
+class SQLiteBackend(HistoryBackend):
+    """Indexed result store kept in <path>/history.db.
+
+    Records are indexed by job, timestamp, uuid, iteration and config hash
+    so that loading the latest result or checking config consistency does
+    not require reading every saved run. The first time the database is
+    created, results already present in the JSON directory layout are
+    imported.
+    """
+
+    # 2: iteration added to the key of the results
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path):
+        super().__init__(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.db_path = os.path.join(self.path, SQLITE_DB_NAME)
+        self.conn = sqlite3.connect(self.db_path)
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        if version == 1:
+            self._upgrade_from_v1()
+            return
+        with self.conn:
+            self._create_results_table()
+        count = self.import_directory(self.path)
+        if count > 0:
+            logger.info(
+                "Imported {} existing results from {} into {}".format(
+                    count, self.path, self.db_path
+                )
+            )
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _create_results_table(self):
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY,
+                job TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                uuid TEXT NOT NULL,
+                iteration INTEGER NOT NULL,
+                config_hash TEXT NOT NULL,
+                config TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                UNIQUE (job, timestamp, uuid, iteration)
+            );
+            CREATE INDEX IF NOT EXISTS results_job_timestamp
+                ON results (job, timestamp);
+            CREATE INDEX IF NOT EXISTS results_uuid ON results (uuid);
+            CREATE INDEX IF NOT EXISTS results_job_config_hash
+                ON results (job, config_hash);
+            """
+        )
+
+    def _upgrade_from_v1(self):
+        """Rebuild the results table with the iteration in its key."""
+        with self.conn:
+            self.conn.executescript(
+                """
+                DROP INDEX IF EXISTS results_job_timestamp;
+                DROP INDEX IF EXISTS results_uuid;
+                DROP INDEX IF EXISTS results_job_config_hash;
+                ALTER TABLE results RENAME TO results_v1;
+                """
+            )
+            self._create_results_table()
+            rows = self.conn.execute(
+                "SELECT job, timestamp, config, metrics FROM results_v1 ORDER BY id"
+            )
+            for row in rows.fetchall():
+                self._insert(row[0], self._row_to_record(row))
+            self.conn.execute("DROP TABLE results_v1")
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    @staticmethod
+    def _row_to_record(row):
+        job, timestamp, config, metrics = row
+        return {
+            "job": job,
+            "timestamp": timestamp,
+            "config": json.loads(config),
+            "metrics": json.loads(metrics),
+        }
+
+    def _insert(self, job_name, record):
+        config = record["config"]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results "
+            "(job, timestamp, uuid, iteration, config_hash, config, metrics) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_name,
+                record["timestamp"],
+                config["uuid"],
+                record_iteration(record),
+                config_hash(config),
+                json.dumps(config, sort_keys=True, default=str),
+                json.dumps(record["metrics"], sort_keys=True, default=str),
+            ),
+        )
+
+    def load(self, job_name, limit=None):
+        query = (
+            "SELECT job, timestamp, config, metrics FROM results "
+            "WHERE job = ? ORDER BY timestamp DESC, iteration DESC"
+        )
+        params = [job_name]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._row_to_record(row) for row in self.conn.execute(query, params)]
+
+    def load_by_config_hash(self, job_name, digest, limit=None):
+        query = (
+            "SELECT job, timestamp, config, metrics FROM results "
+            "WHERE job = ? AND config_hash = ? ORDER BY timestamp DESC, iteration DESC"
+        )
+        params = [job_name, digest]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._row_to_record(row) for row in self.conn.execute(query, params)]
+
+    def save(self, job_name, record):
+        # `with conn` commits on success and rolls back on any exception
+        with self.conn:
+            self._insert(job_name, record)
+
+    def save_many(self, job_name, records):
+        with self.conn:
+            for record in records:
+                self._insert(job_name, record)
+
+    def config_hashes(self, job_name):
+        rows = self.conn.execute(
+            "SELECT DISTINCT config_hash FROM results WHERE job = ?", (job_name,)
+        )
+        return {row[0] for row in rows}
+
+    def job_names(self):
+        rows = self.conn.execute("SELECT DISTINCT job FROM results ORDER BY job")
+        return [row[0] for row in rows]
+
+    def import_directory(self, path):
+        """Import results stored in the JSON directory layout under `path`.
+
+        Importing is idempotent: a run already present in the store is
+        replaced by the imported copy.
+
+        Returns:
+            int: number of imported records
+        """
+        source = JSONDirectoryBackend(path)
+        count = 0
+        with self.conn:
+            for job_name in source.job_names():
+                for record in source.load(job_name):
+                    try:
+                        self._insert(job_name, record)
+                    except KeyError as e:
+                        logger.warning(
+                            "Skipping invalid entry of {} (missing {})".format(
+                                job_name, e
+                            )
+                        )
+                        continue
+                    count += 1
+        return count
+
+
+HISTORY_BACKENDS = {
+    "sqlite": SQLiteBackend,
+    "json": JSONDirectoryBackend,
+}
+
+
 class History:
     """Interface to save/load benchmark results to/from disk.
-    Benchmark results will be saved at paths like follows:
+    By default benchmark results are kept in an indexed SQLite store at
+        <path>/history.db
+    The "json" backend keeps the original layout, which is also the format
+    used by `export_directory`:
         <path>/<job_name>/<timestamp>.json
     """
 
-    def __init__(self, path):
+    def __init__(self, path, backend="sqlite"):
         """Create a History instance which uses the specified directory
 
         Args:
             path (str): path to directory to store logs
+            backend (str): name of the storage backend, see HISTORY_BACKENDS
         """
         self.path = path
+        if backend not in HISTORY_BACKENDS:
+            raise KeyError('No history backend "{}"'.format(backend))
+        self.backend = HISTORY_BACKENDS[backend](path)
+
+    @staticmethod
+    def _to_entries(records):
+        results = []
+        for record in records:
+            try:
+                results.append(HistoryEntry(record))
+            except KeyError as e:
+                logger.error("Invalid entry format (missing {})".format(e))
+                raise e
+        return results
 
-    def load_historical_results(self, job):
+    def load_historical_results(self, job, limit=None):
         """Load all results from a specific job.
 
         Args:
             job (Job): job to load results for
+            limit (int): only load the `limit` most recent results
 
         Returns:
             list of HistoryEntry: historical entries sorted most recent first.
         """
-        results = []
+        results = self._to_entries(self.backend.load(job.safe_name, limit))
+        logger.info("Loaded {} results from {}".format(len(results), self.path))
+        return results
 
-        job_name = job.safe_name
-        rootdir = os.path.join(self.path, job_name)
-        for directory, _, files in os.walk(rootdir):
-            for f in files:
-                with open(os.path.join(directory, f), "r") as record:
-                    record = json.load(record)
-                    try:
-                        entry = HistoryEntry(record)
-                        results.append(entry)
-                    except KeyError as e:
-                        logger.error("Invalid entry format (missing {})".format(e))
-                        raise e
+    def load_latest_result(self, job):
+        """Load the most recent result of a job.
 
-        logger.info("Loaded {} results from {}".format(len(results), self.path))
-        # sort by most recent first
-        return sorted(results, key=lambda r: r.timestamp, reverse=True)
+        Returns:
+            HistoryEntry or None if the job has never been run.
+        """
+        results = self.load_historical_results(job, limit=1)
+        return results[0] if results else None
+
+    def load_matching_results(self, job, limit=None):
+        """Load results of the runs of a job made with its current config.
+        Keys that change on every run (uuid, timestamp...) are ignored.
+
+        Args:
+            job (Job): job to load results for
+            limit (int): only load the `limit` most recent results
+
+        Returns:
+            list of HistoryEntry: historical entries sorted most recent first.
+        """
+        records = self.backend.load_by_config_hash(
+            job.safe_name, config_hash(job.config), limit
+        )
+        return self._to_entries(records)
+
+    def load_matching_runs(self, job, limit=None):
+        """Load results of the runs of a job made with its current config,
+        grouped by run. The iterations of a repeated run share its uuid.
+
+        Args:
+            job (Job): job to load results for
+            limit (int): only load the `limit` most recent runs
+
+        Returns:
+            list of (run_id, list of HistoryEntry): runs sorted most recent
+                first, each with its iterations sorted most recent first
+        """
+        records = self.backend.load_by_config_hash(
+            job.safe_name, config_hash(job.config)
+        )
+        runs = {}
+        for entry in self._to_entries(records):
+            if entry.run_id not in runs:
+                if limit is not None and len(runs) >= limit:
+                    break
+                runs[entry.run_id] = []
+            runs[entry.run_id].append(entry)
+        return list(runs.items())
 
     def is_job_config_consistent(self, job):
         """Check if all historical runs of a job had the same config.
         This is used as a basic sanity check, as jobs changing configs is likely
         change the behavior of the test and make interpreting results confusing.
+        Keys that change on every run (uuid, timestamp...) are ignored.
 
         Args:
             job (Job): job to verify
         """
-        history = self.load_historical_results(job)
-
-        for entry in history:
-            if entry.config != job.config:
-                return False
-
-        return True
+        hashes = self.backend.config_hashes(job.safe_name)
+        return hashes <= {config_hash(job.config)}
 
     def save_job_result(self, job, metrics, time):
-        """Save result of a job run to disk.
-        Path is as follows:
-            <base path>/<job_name>/<timestamp>.json
+        """Save result of a job run to the history backend.
 
         Args:
             job (Job): job that was run
             metrics (dict): results
             time (datetime.datetime): start time of the benchmark
         """
-        job_name = job.safe_name
-        time = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        time = time.strftime(RECORD_TIME_FORMAT)
 
         data = {
             "job": job.name,
@@ -112,10 +505,63 @@ class History:
             "config": job.config,
         }
 
-        directory = os.path.join(self.path, job_name)
-        os.makedirs(directory, exist_ok=True)
+        self.backend.save(job.safe_name, data)
 
-        path = os.path.join(directory, time) + ".json"
+    def output_archive_path(self, job_name, timestamp, run_id, iteration=None):
+        """Directory holding the archived output of a run, next to its result.
 
-        with open(path, "w") as f:
-            json.dump(data, f, sort_keys=True, indent=2)
+        Args:
+            job_name (str): safe name of the job
+            timestamp (str or datetime.datetime): time of the run as saved in
+                its record, or the start time passed to save_job_result
+            run_id (str): uuid of the run
+            iteration (int): iteration number of the run, see
+                record_iteration()
+        """
+        if not isinstance(timestamp, str):
+            timestamp = timestamp.strftime(RECORD_TIME_FORMAT)
+        suffix = iteration_suffix(iteration)
+        return os.path.join(
+            self.path, job_name, f"{timestamp}_{run_id}{suffix}{ARCHIVE_SUFFIX}"
+        )
+
+    def load_records(self, job, limit=None):
+        """Load the raw records of a job, most recent first."""
+        return self.backend.load(job.safe_name, limit)
+
+    def update_records(self, job, records):
+        """Save updated records of earlier runs of a job at once."""
+        self.backend.save_many(job.safe_name, records)
+
+    def import_directory(self, path=None):
+        """Import results saved in the JSON directory layout.
+
+        Args:
+            path (str): results directory to import, defaults to self.path
+
+        Returns:
+            int: number of imported records
+        """
+        if not isinstance(self.backend, SQLiteBackend):
+            raise ValueError("Only the sqlite backend supports importing")
+        return self.backend.import_directory(path or self.path)
+
+    def export_directory(self, path, job_names=None):
+        """Export results to the JSON directory layout under `path`.
+
+        Args:
+            path (str): destination directory
+            job_names (list of str): safe job names to export, default all
+
+        Returns:
+            int: number of exported records
+        """
+        dest = JSONDirectoryBackend(path)
+        if job_names is None:
+            job_names = self.backend.job_names()
+        count = 0
+        for job_name in job_names:
+            for record in self.backend.load(job_name):
+                dest.save(job_name, record)
+                count += 1
+        return count
@@ -4,17 +4,22 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import collections
+import collections.abc
 import errno
 import logging
+import os
+import shutil
 import subprocess
 import sys
-import tempfile
 import threading
 import typing
 from subprocess import CalledProcessError
 
 import click
+from benchpress.lib import cgroup
 from benchpress.lib.job_listing import formalize_tags
+from benchpress.lib.output_archive import OutputArchiveWriter
 from benchpress.lib.util import get_safe_cmd
 
 from .hook_factory import HookFactory
@@ -26,13 +31,42 @@ logger = logging.getLogger(__name__)
 TRIM_OUTPUT_LINES = 50
 
 
-def output_catcher(reader, writer=None, loglevel=logging.INFO):
+def output_catcher(reader, consumer=None, loglevel=logging.INFO):
     for line in iter(reader.readline, ""):
         if not line:
             continue
         logger.log(loglevel, line.rstrip(), extra={"raw": True})
-        if writer is not None:
-            writer.write(line)
+        if consumer is not None:
+            try:
+                consumer(line)
+            except Exception:
+                # keep draining the pipe so that the benchmark never blocks
+                logger.exception("Failed to process output, only logging it")
+                consumer = None
+
+
+class OutputTail:
+    """Bounded buffer keeping the last lines of a stream for summaries.
+
+    Attributes:
+        lines (collections.deque): last `maxlen` lines seen
+        count (int): total number of lines seen
+    """
+
+    def __init__(self, maxlen=TRIM_OUTPUT_LINES):
+        self.lines = collections.deque(maxlen=maxlen)
+        self.count = 0
+
+    def append(self, line):
+        self.lines.append(line)
+        self.count += 1
+
+    @property
+    def trimmed(self):
+        return self.count > self.lines.maxlen
+
+    def __str__(self):
+        return "\n".join(self.lines)
 
 
 class Job:
@@ -44,8 +78,9 @@ class Job:
     Attributes:
         name (str): short name to identify job
         description (str): longer description to state intent of job
-        tolerances (dict): percentage tolerance around the mean of historical
-                           results
+        tolerances (dict): percentage tolerance and direction of metrics
+                           around the median of historical results, used by
+                           `benchpress run --check-regressions`
         config (dict): raw configuration dictionary
     """
 
@@ -81,7 +116,10 @@ class Job:
         self.iteration_num = job_config["iteration_num"]
 
         self.binary = benchmark_config["path"]
-        self.parser = ParserFactory.create(benchmark_config["parser"])
+        # the parser and hooks are created on first use, so that only the
+        # plugins of the jobs that are run get imported
+        self.parser_name = benchmark_config["parser"]
+        self._parser = None
         self.check_returncode = benchmark_config.get("check_returncode", True)
         self.timeout = job_config.get("timeout", None)
         # if tee_output is True, the stdout and stderr commands of the child
@@ -92,14 +130,17 @@ class Job:
 
         self.tags = formalize_tags([benchmark_config, job_config])
 
-        self.hooks = job_config.get("hooks", [])
-        self.hooks = [
-            (h["hook"], HookFactory.create(h["hook"]), h.get("options", None))
-            for h in self.hooks
-        ]
-        # self.hooks is list of (hook_name, hook, options)
+        self._hooks = None
 
         self.tolerances = job_config.get("tolerances", {})
+        # exclusive jobs need the whole machine and never run concurrently
+        # with other jobs in `benchpress run --parallel`
+        self.exclusive = job_config.get(
+            "exclusive", benchmark_config.get("exclusive", False)
+        )
+        # run the job in its own cgroup, which is killed at the end of the
+        # job, and add its resource usage to the metrics
+        self.use_cgroup = job_config.get("cgroup", benchmark_config.get("cgroup", True))
 
         # roles are client/server or none
         self.roles = benchmark_config.get("roles", [])
@@ -109,6 +150,26 @@ class Job:
 
         self.toolchains = toolchain_config
 
+    @property
+    def parser(self):
+        if self._parser is None:
+            self._parser = ParserFactory.create(self.parser_name)
+        return self._parser
+
+    @property
+    def hooks(self):
+        """list of (hook_name, hook, options)"""
+        if self._hooks is None:
+            self._hooks = [
+                (h["hook"], HookFactory.create(h["hook"]), h.get("options", None))
+                for h in self.config.get("hooks", [])
+            ]
+        return self._hooks
+
+    @hooks.setter
+    def hooks(self, hooks):
+        self._hooks = hooks
+
     @staticmethod
     def arg_list(args):
         """Convert argument definitions to a list suitable for subprocess."""
@@ -167,22 +228,15 @@ class Job:
                 exit(1)
             self.substitude_vars(role, role_input)
 
-    def copy_output(self, stderr, stdout):
-        # optionally copy stdout/err of the child process to our own
-        if self.tee_output:
-            # default to stdout if no filename given
-            tee = sys.stdout
-            # if a file was specified, write to that file instead
-            if isinstance(self.tee_output, str):
-                with open(self.tee_output, "w") as tee:
-                    # do this so each line is prefixed with stdout
-                    for line in stdout.splitlines():
-                        tee.write(f"stdout: {line}\n")
-                    for line in stderr.splitlines():
-                        tee.write(f"stderr: {line}\n")
-                    # close the output if it was a file
-                    if tee != sys.stdout:
-                        tee.close()
+    def _open_tee(self):
+        """Open the destination of tee_output, None if output is not copied."""
+        if not self.tee_output:
+            return None
+        # default to stdout if no filename given
+        if not isinstance(self.tee_output, str):
+            return sys.stdout
+        # if a file was specified, write to that file instead
+        return open(self.tee_output, "w")
 
     def start_hooks(self):
         """Executes hooks before job starts."""
@@ -199,41 +253,95 @@ class Job:
         self.check_role(role, role_input)
         return get_safe_cmd([self.binary] + self.args)
 
-    def run(self, role=None, role_input=None):
+    def run(self, role=None, role_input=None, archive_path=None):
         """Run the benchmark and return the metrics that are reported.
         check if user type role correctly
+
+        If `archive_path` is given, the output fed to the parser is archived
+        in that directory so that it can be parsed again later.
         """
         self.check_role(role, role_input)
 
+        job_cgroup = None
+        resource_usage = None
         try:
             logger.info('Starting "{}"'.format(self.name))
             cmd = get_safe_cmd([self.binary] + self.args)
             click.echo("Job execution command: {}".format(cmd))
+            popen_cmd = cmd
+            if self.use_cgroup:
+                # a missing binary would only be noticed by the wrapper shell
+                if shutil.which(cmd[0]) is None:
+                    raise FileNotFoundError(
+                        errno.ENOENT, os.strerror(errno.ENOENT), cmd[0]
+                    )
+                job_cgroup = cgroup.create_job_cgroup(f"{self.safe_name}-{self.uuid}")
+                if job_cgroup is not None:
+                    popen_cmd = job_cgroup.wrap(cmd)
             process = subprocess.Popen(
-                cmd,
+                popen_cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
             )
-            stdout_storage = tempfile.TemporaryFile(
-                mode="w+",
-                encoding="utf-8",
-                prefix=f"benchpress-job-{process.pid}-stdout",
-            )
-            stderr_storage = tempfile.TemporaryFile(
-                mode="w+",
-                encoding="utf-8",
-                prefix=f"benchpress-job-{process.pid}-stderr",
-            )
+            stdout_tail = OutputTail()
+            stderr_tail = OutputTail()
+            tee = self._open_tee()
+            tee_lock = threading.Lock()
+            self.parser.start_stream()
+            archive = None
+            if archive_path:
+                archive = OutputArchiveWriter(archive_path)
+            # if metrics are read from a file, stdout is not fed to the parser
+            feed_stdout = self.parser.feed_stdout if not self.stdout else None
+            archive_stdout = None
+            if archive is not None and not self.stdout:
+                archive_stdout = archive.write_stdout
+            archive_stderr = archive.write_stderr if archive is not None else None
+            # (stream, line, exception) of the first line the parser failed
+            # on, the parser is not fed anymore after it
+            feed_errors = []
+
+            def make_consumer(tail, feed, archive_line, prefix):
+                def consume(line):
+                    for subline in line.splitlines():
+                        tail.append(subline)
+                        if feed is not None and not feed_errors:
+                            try:
+                                feed(subline)
+                            except Exception as e:
+                                logger.exception(
+                                    f"Parser failed on {prefix} line: {subline}"
+                                )
+                                feed_errors.append((prefix, subline, e))
+                        if archive_line is not None:
+                            archive_line(subline)
+                        if tee is not None:
+                            # do this so each line is prefixed with stdout/stderr
+                            with tee_lock:
+                                tee.write(f"{prefix}: {subline}\n")
+
+                return consume
+
             stdout_catcher = threading.Thread(
                 target=output_catcher,
                 name="stdout-catcher",
-                args=(process.stdout, stdout_storage, logging.INFO),
+                args=(
+                    process.stdout,
+                    make_consumer(stdout_tail, feed_stdout, archive_stdout, "stdout"),
+                    logging.INFO,
+                ),
             )
             stderr_catcher = threading.Thread(
                 target=output_catcher,
                 name="stderr-catcher",
-                args=(process.stderr, stderr_storage, logging.INFO),
+                args=(
+                    process.stderr,
+                    make_consumer(
+                        stderr_tail, self.parser.feed_stderr, archive_stderr, "stderr"
+                    ),
+                    logging.INFO,
+                ),
             )
 
             stdout_catcher.start()
@@ -242,24 +350,34 @@ class Job:
             try:
                 process.wait(timeout=self.timeout)
             except subprocess.TimeoutExpired:
-                process.kill()
+                if job_cgroup is not None:
+                    job_cgroup.kill()
+                else:
+                    process.kill()
                 process.wait()
+            # processes left behind by the benchmark could hold its output
+            # pipes open
+            if job_cgroup is not None:
+                resource_usage = job_cgroup.finish()
 
             stdout_catcher.join()
             stderr_catcher.join()
-
-            stdout_storage.seek(0)
-            stdout = stdout_storage.read()
-            stdout_storage.close()
-            stderr_storage.seek(0)
-            stderr = stderr_storage.read()
-            stderr_storage.close()
+            if tee is not None and tee is not sys.stdout:
+                tee.close()
 
             if self.stdout:
+                stdout_tail = OutputTail()
                 with open(self.stdout, "r") as metrics_file:
-                    stdout = metrics_file.read()
-            self._print_output_summary(stdout, stderr)
-            logger.info(f"stderr output: {stderr}")
+                    for line in metrics_file:
+                        for subline in line.splitlines():
+                            stdout_tail.append(subline)
+                            self.parser.feed_stdout(subline)
+                            if archive is not None:
+                                archive.write_stdout(subline)
+            if archive is not None:
+                archive.close(process.returncode)
+            self._print_output_summary(stdout_tail, stderr_tail)
+            logger.info(f"stderr output (last lines):\n{stderr_tail}")
             returncode = process.returncode
             if self.check_returncode and returncode != 0:
                 logger.error(
@@ -269,19 +387,22 @@ class Job:
                 )
                 exit(1)
                 # raise CalledProcessError(process.returncode, cmd, output)
-            self.copy_output(stderr, stdout)
             logger.info('Parsing results for "{}"'.format(self.name))
             try:
-                return self.parser.parse(
-                    stdout.splitlines(), stderr.splitlines(), returncode
-                )
+                if feed_errors:
+                    prefix, line, e = feed_errors[0]
+                    raise RuntimeError(f"Parser failed on {prefix} line: {line}") from e
+                metrics = self.parser.finish_stream(returncode)
             except Exception:
                 logger.error(
                     "Failed to parse results, this might mean the" " benchmark failed"
                 )
-                logger.error("stdout:\n{}".format(stdout))
-                logger.error("stderr:\n{}".format(stderr))
+                logger.error("stdout (last lines):\n{}".format(stdout_tail))
+                logger.error("stderr (last lines):\n{}".format(stderr_tail))
                 raise
+            if resource_usage is not None and isinstance(metrics, dict):
+                metrics[cgroup.METRICS_KEY] = resource_usage
+            return metrics
         except OSError as e:
             logger.error('"{}" failed ({})'.format(self.name, e))
             if e.errno == errno.ENOENT:
@@ -290,6 +411,13 @@ class Job:
         except CalledProcessError as e:
             logger.error(e.output)
             raise  # make sure it passes the exception up the chain
+        finally:
+            if job_cgroup is not None:
+                job_cgroup.close()
+
+    def live_metrics(self):
+        """Metrics reported by the parser while the job is still running."""
+        return self.parser.live_metrics()
 
     def stop_hooks(self):
         """Stops hooks after job is finished."""
@@ -303,17 +431,21 @@ class Job:
         return self.name.replace(" ", "_")
 
     def _print_output_summary(self, stdout, stderr):
-        stdout = stdout.splitlines()
-        stderr = stderr.splitlines()
+        """Print the tails of stdout and stderr.
+
+        Args:
+            stdout (OutputTail): tail of stdout
+            stderr (OutputTail): tail of stderr
+        """
         output = "stdout:\n"
-        if len(stdout) > TRIM_OUTPUT_LINES:
+        if stdout.trimmed:
             output += f"\n[...trimmed to last {TRIM_OUTPUT_LINES} lines...]\n"
-        output += "\t{}".format("\n\t".join(stdout[-TRIM_OUTPUT_LINES:]))
+        output += "\t{}".format("\n\t".join(stdout.lines))
 
         output += "\nstderr:\n"
-        if len(stderr) > TRIM_OUTPUT_LINES:
+        if stderr.trimmed:
             output += f"\n[...trimmed to last {TRIM_OUTPUT_LINES} lines...]\n"
-        output += "\t{}".format("\n\t".join(stderr[-TRIM_OUTPUT_LINES:]))
+        output += "\t{}".format("\n\t".join(stderr.lines))
         click.echo(output)
 
 
@@ -324,16 +456,83 @@ class JobSuiteBuilder:
         self.suites = {}
 
     def add_job(self, job) -> None:
-        for tag_group in job.tags.values():
+        self.add_tags(job.name, job.tags)
+
+    def add_tags(self, job_name, tags) -> None:
+        for tag_group in tags.values():
             for tag in tag_group:
                 if tag not in self.suites:
                     self.suites[tag] = []
-                self.suites[tag].append(job.name)
+                self.suites[tag].append(job_name)
 
     def get_suites(self) -> typing.Dict[str, str]:
         return self.suites
 
 
+class JobMap(collections.abc.Mapping):
+    """Jobs and job suites by name. A Job is only built the first time it
+    is looked up, suites map to the list of their job names.
+    """
+
+    def __init__(self, job_configs, benchmarks_specs, toolchain_specs) -> None:
+        """
+        Args:
+            job_configs (list of dict): job configs
+            benchmarks_specs (dict): benchmark configs by benchmark name
+            toolchain_specs (dict): compiler and linker config
+        """
+        self.job_configs = {j["name"]: j for j in job_configs}
+        self.benchmarks_specs = benchmarks_specs
+        self.toolchain_specs = toolchain_specs
+        self.jobs = {}
+        self.suites = {}
+
+    def job_tags(self, name):
+        config = self.job_configs[name]
+        return formalize_tags([self.benchmarks_specs[config["benchmark"]], config])
+
+    def job_summaries(self):
+        """Name, description and tags of every job, read from the configs
+        without building the jobs.
+        """
+        return [
+            {
+                "name": name,
+                "description": config["description"],
+                "tags": self.job_tags(name),
+            }
+            for name, config in self.job_configs.items()
+        ]
+
+    def __getitem__(self, name):
+        if name in self.suites:
+            return self.suites[name]
+        if name not in self.jobs:
+            config = self.job_configs[name]
+            self.jobs[name] = Job(
+                config,
+                self.benchmarks_specs[config["benchmark"]],
+                self.toolchain_specs,
+            )
+        return self.jobs[name]
+
+    def __setitem__(self, name, value):
+        if isinstance(value, Job):
+            self.jobs[name] = value
+        else:
+            self.suites[name] = value
+
+    def __contains__(self, name):
+        return name in self.job_configs or name in self.suites
+
+    def __iter__(self):
+        yield from self.job_configs
+        yield from self.suites
+
+    def __len__(self):
+        return len(self.job_configs) + len(self.suites)
+
+
 def get_target_jobs(all_jobs, args_jobs):
     picked_jobs = args_jobs if len(args_jobs) > 0 else list(all_jobs.keys())
     job_objs = {}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import contextlib
+import fcntl
+import json
+import os
+import time
+
+from benchpress.lib import util
+
+# Name of the journal file in the metrics directory of a run
+JOURNAL_NAME = "run_journal.json"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def journal_path(run_id):
+    return os.path.join(f"benchmark_metrics_{run_id}", JOURNAL_NAME)
+
+
+class RunJournal:
+    """Persistent state of the jobs of a `benchpress run` invocation, used
+    to resume the run after a failure.
+
+    The journal is a JSON file in the metrics directory of the run:
+
+        {"run_id": ..., "jobs": {name: {"state": ..., "uuid": ...,
+                                        "metrics_dir": ..., "error": ...,
+                                        "updated": ...}}}
+
+    where state is one of pending, running, done and failed. Every update
+    rereads and rewrites the file under a lock, so that jobs run by
+    `--parallel` workers can update it concurrently.
+
+    Attributes:
+        run_id (str): uuid of the run
+        path (str): path of the journal file
+        jobs (dict): job name -> entry, as of the last read or update
+    """
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.path = journal_path(run_id)
+        self.jobs = {}
+
+    @staticmethod
+    def exists(run_id):
+        return os.path.isfile(journal_path(run_id))
+
+    def open(self, job_names):
+        """Create the journal, or load it if it exists, and add the jobs not
+        journaled yet as pending.
+        """
+        util.create_benchmark_metrics_dir(self.run_id)
+        with self._locked():
+            for name in job_names:
+                self.jobs.setdefault(name, self._entry(PENDING))
+        return self
+
+    def load(self):
+        """Read the current state of the journal."""
+        self._read()
+        return self
+
+    def state(self, job_name):
+        return self.jobs.get(job_name, {}).get("state", PENDING)
+
+    def update(self, job, state, error=None):
+        """Record the state of a job.
+
+        Args:
+            job (Job): job whose state changed
+            state (str): new state
+            error (str): failure description, for failed jobs
+        """
+        entry = self._entry(state)
+        entry["uuid"] = job.uuid
+        entry["metrics_dir"] = f"benchmark_metrics_{job.uuid}"
+        if error is not None:
+            entry["error"] = error
+        with self._locked():
+            self.jobs[job.name] = entry
+
+    @staticmethod
+    def _entry(state):
+        return {"state": state, "updated": int(time.time())}
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the journal, rereading it first and
+        writing it back if the block succeeds.
+        """
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._read()
+            yield
+            self._write()
+        finally:
+            os.close(fd)
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                self.jobs = json.load(f)["jobs"]
+        except FileNotFoundError:
+            self.jobs = {}
+
+    def _write(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            # jobs stay in the order they were added, which is the run order
+            json.dump({"run_id": self.run_id, "jobs": self.jobs}, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import bisect
+import gzip
+import io
+import json
+import os
+
+# Suffix of the directory holding the archived output of a run
+ARCHIVE_SUFFIX = ".output"
+
+# Name of the file describing the archived streams
+INDEX_NAME = "index.json"
+
+# Approximate amount of uncompressed output in each gzip member
+CHUNK_SIZE = 1 << 20
+
+STREAMS = ("stdout", "stderr")
+
+
+class StreamWriter:
+    """Write lines to a gzip file made of independently compressed members
+    of about `chunk_size` bytes each.
+
+    The file is a regular multi-member gzip file. The index maps the first
+    line of every member to its offset in the file, so that reading can
+    start at any member instead of the beginning.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.file = open(path, "wb")
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.buffered = 0
+        self.lines = 0
+        self.chunk_first_line = 0
+        # list of [first line, file offset] of the members
+        self.members = []
+
+    def write(self, line):
+        data = line + "\n"
+        self.buffer.append(data)
+        self.buffered += len(data)
+        self.lines += 1
+        if self.buffered >= self.chunk_size:
+            self._write_member()
+
+    def _write_member(self):
+        if not self.buffer:
+            return
+        self.members.append([self.chunk_first_line, self.file.tell()])
+        data = "".join(self.buffer).encode("utf-8", errors="replace")
+        self.file.write(gzip.compress(data, mtime=0))
+        self.buffer = []
+        self.buffered = 0
+        self.chunk_first_line = self.lines
+
+    def close(self):
+        self._write_member()
+        self.file.close()
+        return {"lines": self.lines, "members": self.members}
+
+
+class OutputArchiveWriter:
+    """Archive the output lines of one run of a job, as they were fed to
+    its parser, in directory `path`.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.streams = {
+            name: StreamWriter(os.path.join(path, f"{name}.gz"), chunk_size)
+            for name in STREAMS
+        }
+
+    def write_stdout(self, line):
+        self.streams["stdout"].write(line)
+
+    def write_stderr(self, line):
+        self.streams["stderr"].write(line)
+
+    def close(self, returncode):
+        """Finish the streams and write the index, which marks the archive
+        as complete.
+        """
+        index = {
+            "returncode": returncode,
+            "streams": {name: s.close() for name, s in self.streams.items()},
+        }
+        tmp_path = os.path.join(self.path, INDEX_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_NAME))
+
+
+class OutputArchive:
+    """Read the output of a run archived by OutputArchiveWriter.
+
+    Attributes:
+        path (str): archive directory
+        returncode (int): exit status of the benchmark
+    """
+
+    def __init__(self, path):
+        """
+        Raises:
+            FileNotFoundError: if the archive is missing or incomplete
+        """
+        self.path = path
+        with open(os.path.join(path, INDEX_NAME), "r") as f:
+            self.index = json.load(f)
+        self.returncode = self.index["returncode"]
+
+    @staticmethod
+    def exists(path):
+        return os.path.isfile(os.path.join(path, INDEX_NAME))
+
+    def num_lines(self, stream):
+        return self.index["streams"][stream]["lines"]
+
+    def lines(self, stream, start=0):
+        """Yield the lines of `stream`, without newlines, from line number
+        `start` on. Only the members from the one holding `start` are read.
+        """
+        members = self.index["streams"][stream]["members"]
+        if start >= self.num_lines(stream) or not members:
+            return
+        i = bisect.bisect_right([m[0] for m in members], start) - 1
+        first_line, offset = members[i]
+        with open(os.path.join(self.path, f"{stream}.gz"), "rb") as f:
+            f.seek(offset)
+            with gzip.GzipFile(fileobj=f) as gz:
+                text = io.TextIOWrapper(gz, encoding="utf-8", newline="\n")
+                for n, line in enumerate(text, first_line):
+                    if n >= start:
+                        yield line[:-1] if line.endswith("\n") else line
+
+    def replay(self, parser):
+        """Feed the archived output to `parser` like Job.run does, with
+        `parser.replaying` set.
+
+        Returns:
+            dict: metrics returned by the parser
+        """
+        parser.replaying = True
+        parser.start_stream()
+        for line in self.lines("stdout"):
+            parser.feed_stdout(line)
+        for line in self.lines("stderr"):
+            parser.feed_stderr(line)
+        return parser.finish_stream(self.returncode)
@@ -11,8 +11,31 @@ class Parser(object, metaclass=ABCMeta):
     """Parser is the link between benchmark output and the rest of the system.
     A Parser is given the benchmark's stdout and stderr and returns the exported
     metrics.
+
+    Besides `parse`, a Parser exposes a streaming interface that Job uses to
+    hand over output lines as the benchmark prints them:
+
+        start_stream()
+        feed_stdout(line) / feed_stderr(line)   # any number of times
+        finish_stream(returncode) -> metrics
+
+    The default implementation buffers the lines and calls `parse` at the end.
+    Parsers of long-running benchmarks override these methods to consume lines
+    incrementally, so that the output never needs to be held in memory, and
+    may report intermediate results through `live_metrics`.
+
+    `benchpress reparse` replays archived output through the same interface,
+    with `replaying` set. Parsers must not write files while replaying, and
+    parsers whose metrics come from files left by the benchmark rather than
+    from its output set `reads_files` so that their runs are not reparsed.
     """
 
+    # True if the metrics are read from files besides the output lines
+    reads_files = False
+
+    # True while archived output is fed instead of a live run
+    replaying = False
+
     @abstractmethod
     def parse(self, stdout, stderr, returncode):
         """Take stdout/stderr and convert it to a dictionary of metrics.
@@ -27,3 +50,27 @@ class Parser(object, metaclass=ABCMeta):
                 with dot-separated names
         """
         pass
+
+    def start_stream(self):
+        """Prepare for a new run before any line is fed."""
+        self._stream_stdout = []
+        self._stream_stderr = []
+
+    def feed_stdout(self, line):
+        """Consume one line of stdout, without the trailing newline."""
+        self._stream_stdout.append(line)
+
+    def feed_stderr(self, line):
+        """Consume one line of stderr, without the trailing newline."""
+        self._stream_stderr.append(line)
+
+    def finish_stream(self, returncode):
+        """Return the metrics of the run once the process has exited."""
+        stdout, stderr = self._stream_stdout, self._stream_stderr
+        self._stream_stdout = []
+        self._stream_stderr = []
+        return self.parse(stdout, stderr, returncode)
+
+    def live_metrics(self):
+        """Return metrics computed so far while the benchmark is running."""
+        return {}
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import math
+import random
+import statistics
+
+from benchpress.lib import cgroup
+
+# Tolerance (percent of the baseline median) of metrics that have no entry in
+# the job's `tolerances`
+DEFAULT_TOLERANCE = 5.0
+
+# Number of earlier runs with the same config needed to check a metric
+MIN_BASELINE_RUNS = 3
+
+# Scale factor making the MAD a consistent estimator of the standard
+# deviation of normally distributed results
+MAD_SCALE = 1.4826
+
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_CONFIDENCE = 0.95
+
+# Directions of a metric: which side of the baseline is a regression
+HIGHER_IS_BETTER = "higher"
+LOWER_IS_BETTER = "lower"
+BOTH_WAYS = "both"
+DIRECTIONS = (HIGHER_IS_BETTER, LOWER_IS_BETTER, BOTH_WAYS)
+
+
+def flatten_metrics(metrics, prefix=""):
+    """Flatten nested metrics into {"a.b.c": value}, keeping only finite
+    numbers (numeric strings included).
+
+    Args:
+        metrics (dict): metrics as returned by a parser
+        prefix (str): prefix of the flattened names
+
+    Returns:
+        dict: flattened name -> float
+    """
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, name + "."))
+            continue
+        if isinstance(value, bool):
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(value):
+            flat[name] = value
+    return flat
+
+
+def median_metrics(metrics_list):
+    """Flattened median of every metric over several iterations of a run.
+
+    Args:
+        metrics_list (list of dict): metrics of the iterations
+
+    Returns:
+        dict: flattened name -> median of the iterations reporting it
+    """
+    values = {}
+    for metrics in metrics_list:
+        for name, value in flatten_metrics(metrics or {}).items():
+            values.setdefault(name, []).append(value)
+    return {name: statistics.median(v) for name, v in values.items()}
+
+
+def flatten_tolerances(tolerances, prefix=""):
+    """Flatten the `tolerances` of a job into {"a.b.c": (tolerance, direction)}.
+
+    An entry is either a tolerance in percent, or a dict with the optional
+    keys "tolerance" and "direction" (one of DIRECTIONS). Missing values are
+    None.
+
+    Raises:
+        ValueError: if a direction is not one of DIRECTIONS
+    """
+    flat = {}
+    for key, value in tolerances.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            if "tolerance" not in value and "direction" not in value:
+                flat.update(flatten_tolerances(value, name + "."))
+                continue
+            tolerance = value.get("tolerance")
+            direction = value.get("direction")
+        else:
+            tolerance, direction = value, None
+        if direction is not None and direction not in DIRECTIONS:
+            raise ValueError(
+                'Invalid direction "{}" of metric {}, expected one of {}'.format(
+                    direction, name, ", ".join(DIRECTIONS)
+                )
+            )
+        if tolerance is not None:
+            tolerance = float(tolerance)
+        flat[name] = (tolerance, direction)
+    return flat
+
+
+def median_absolute_deviation(values, center):
+    return statistics.median(abs(v - center) for v in values)
+
+
+def bootstrap_median_ci(
+    values, samples=BOOTSTRAP_SAMPLES, confidence=BOOTSTRAP_CONFIDENCE, rng=None
+):
+    """Percentile bootstrap confidence interval of the median.
+
+    Args:
+        values (list of float): observations
+        samples (int): number of bootstrap resamples
+        confidence (float): confidence level of the interval
+        rng (random.Random): random source, seeded for reproducible results
+            by default
+
+    Returns:
+        tuple of float: (low, high)
+    """
+    if rng is None:
+        rng = random.Random(0)
+    medians = sorted(
+        statistics.median(rng.choices(values, k=len(values))) for _ in range(samples)
+    )
+    alpha = (1 - confidence) / 2
+    low = medians[int(alpha * (samples - 1))]
+    high = medians[int(math.ceil((1 - alpha) * (samples - 1)))]
+    return low, high
+
+
+class MetricCheck:
+    """Comparison of one metric of a run against its historical baseline.
+
+    The accepted range is the bootstrap confidence interval of the baseline
+    median widened on both sides by `tolerance` percent of the median. A
+    value outside of it is a regression only on the side `direction` says is
+    worse, and an improvement on the other side. Metrics of unknown
+    direction are reported as changed but never fail.
+
+    Attributes:
+        name (str): flattened metric name
+        value (float): value in the checked run
+        baseline_runs (int): number of earlier runs with this metric
+        median (float): median of the earlier runs
+        mad (float): median absolute deviation of the earlier runs
+        ci (tuple of float): bootstrap confidence interval of the median
+        tolerance (float): tolerance in percent of the median
+        direction (str): one of DIRECTIONS, None if unknown
+        low (float), high (float): accepted range of values
+    """
+
+    def __init__(self, name, value, baseline, tolerance, direction=None):
+        self.name = name
+        self.value = value
+        self.baseline_runs = len(baseline)
+        self.median = statistics.median(baseline)
+        self.mad = median_absolute_deviation(baseline, self.median)
+        self.ci = bootstrap_median_ci(baseline)
+        self.tolerance = tolerance
+        self.direction = direction
+        margin = abs(self.median) * tolerance / 100
+        self.low = self.ci[0] - margin
+        self.high = self.ci[1] + margin
+
+    @property
+    def in_range(self):
+        return self.low <= self.value <= self.high
+
+    @property
+    def regressed(self):
+        if self.value < self.low:
+            return self.direction in (HIGHER_IS_BETTER, BOTH_WAYS)
+        if self.value > self.high:
+            return self.direction in (LOWER_IS_BETTER, BOTH_WAYS)
+        return False
+
+    @property
+    def improved(self):
+        if self.value < self.low:
+            return self.direction == LOWER_IS_BETTER
+        if self.value > self.high:
+            return self.direction == HIGHER_IS_BETTER
+        return False
+
+    @property
+    def passed(self):
+        return not self.regressed
+
+    @property
+    def result(self):
+        """PASS, FAIL (regression), IMPROVED, or CHANGED (out of range in a
+        direction that is neither better nor worse).
+        """
+        if self.in_range:
+            return "PASS"
+        if self.regressed:
+            return "FAIL"
+        return "IMPROVED" if self.improved else "CHANGED"
+
+    @property
+    def deviation(self):
+        """Relative difference from the baseline median, in percent."""
+        if self.median == 0:
+            return 0.0 if self.value == 0 else math.copysign(math.inf, self.value)
+        return (self.value - self.median) / abs(self.median) * 100
+
+    @property
+    def robust_z(self):
+        """Distance from the median in MAD-estimated standard deviations."""
+        sigma = MAD_SCALE * self.mad
+        if sigma == 0:
+            if self.value == self.median:
+                return 0.0
+            return math.copysign(math.inf, self.value - self.median)
+        return (self.value - self.median) / sigma
+
+
+class RegressionReport:
+    """Result of checking a run of a job against its history.
+
+    Attributes:
+        job_name (str): name of the job
+        run_id (str): uuid of the checked run
+        baseline_runs (int): number of earlier runs with the same config
+        checks (list of MetricCheck): metrics compared with a baseline
+        unchecked (list of str): metrics with fewer than `min_runs` earlier
+            values
+    """
+
+    def __init__(self, job_name, run_id, baseline_runs):
+        self.job_name = job_name
+        self.run_id = run_id
+        self.baseline_runs = baseline_runs
+        self.checks = []
+        self.unchecked = []
+
+    @property
+    def failures(self):
+        return [check for check in self.checks if not check.passed]
+
+    @property
+    def improvements(self):
+        return [check for check in self.checks if check.improved]
+
+    @property
+    def passed(self):
+        return not self.failures
+
+
+def check_regressions(
+    job,
+    metrics,
+    baseline_metrics,
+    default_tolerance=DEFAULT_TOLERANCE,
+    min_runs=MIN_BASELINE_RUNS,
+    directions=None,
+):
+    """Compare the metrics of a run with the runs before it.
+
+    Args:
+        job (Job): job that was run, its `tolerances` (flat or nested like
+            the metrics) give the tolerance in percent and the direction of
+            individual metrics, see flatten_tolerances()
+        metrics (dict): metrics of the checked run
+        baseline_metrics (list of dict): metrics of earlier runs of the job
+            with the same config
+        default_tolerance (float): tolerance of metrics not in job.tolerances
+        min_runs (int): minimum number of earlier values to check a metric
+        directions (dict): flattened name -> direction of the metrics whose
+            direction is known without a `tolerances` entry
+
+    Returns:
+        RegressionReport
+    """
+    report = RegressionReport(job.name, job.uuid, len(baseline_metrics))
+    tolerances = flatten_tolerances(job.tolerances)
+    directions = directions or {}
+    baselines = [flatten_metrics(m) for m in baseline_metrics]
+    for name, value in sorted(flatten_metrics(metrics).items()):
+        if name.startswith(cgroup.METRICS_KEY + "."):
+            # resource accounting of the run, not a benchmark result
+            continue
+        baseline = [b[name] for b in baselines if name in b]
+        if len(baseline) < min_runs:
+            report.unchecked.append(name)
+            continue
+        tolerance, direction = tolerances.get(name, (None, None))
+        if tolerance is None:
+            tolerance = default_tolerance
+        if direction is None:
+            direction = directions.get(name)
+        report.checks.append(MetricCheck(name, value, baseline, tolerance, direction))
+    return report
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import glob
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import traceback
+import typing
+
+logger = logging.getLogger(__name__)
+
+SYSFS_NODE_PATH = "/sys/devices/system/node"
+SYSFS_CPU_PATH = "/sys/devices/system/cpu"
+
+
+def parse_cpu_list(cpulist: str) -> typing.List[int]:
+    """Parse a kernel cpu list such as "0-3,8,10-11" into a list of ints."""
+    cpus = []
+    for item in cpulist.strip().split(","):
+        if not item:
+            continue
+        if "-" in item:
+            start, end = item.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(item))
+    return cpus
+
+
+def get_numa_nodes(cpus: typing.Iterable[int]) -> typing.Dict[int, typing.List[int]]:
+    """Group the given CPUs by NUMA node.
+
+    Falls back to a single node if NUMA topology is not exposed in sysfs.
+    """
+    cpus = set(cpus)
+    nodes = {}
+    for path in glob.glob(os.path.join(SYSFS_NODE_PATH, "node[0-9]*", "cpulist")):
+        node = int(re.search(r"node(\d+)", path).group(1))
+        with open(path) as f:
+            node_cpus = sorted(cpus.intersection(parse_cpu_list(f.read())))
+        if node_cpus:
+            nodes[node] = node_cpus
+    covered = set().union(*nodes.values()) if nodes else set()
+    if covered != cpus:
+        # CPUs missing from sysfs, e.g. no NUMA support in the kernel
+        return {0: sorted(cpus)}
+    return dict(sorted(nodes.items()))
+
+
+def group_smt_siblings(cpus: typing.List[int]) -> typing.List[typing.List[int]]:
+    """Group CPUs that are SMT siblings of the same physical core."""
+    cpus_set = set(cpus)
+    cores = {}
+    for cpu in cpus:
+        path = os.path.join(
+            SYSFS_CPU_PATH, f"cpu{cpu}", "topology", "thread_siblings_list"
+        )
+        try:
+            with open(path) as f:
+                siblings = parse_cpu_list(f.read())
+        except OSError:
+            siblings = [cpu]
+        key = min(siblings)
+        cores.setdefault(key, [])
+        if cpu in cpus_set:
+            cores[key].append(cpu)
+    return [sorted(cores[key]) for key in sorted(cores)]
+
+
+def _split_evenly(items: typing.List, n: int) -> typing.List[typing.List]:
+    size, extra = divmod(len(items), n)
+    chunks = []
+    start = 0
+    for i in range(n):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def partition_cpus(
+    cpus: typing.Iterable[int], num_partitions: int
+) -> typing.List[typing.List[int]]:
+    """Split CPUs into disjoint partitions that do not straddle NUMA nodes.
+
+    When there are at least as many NUMA nodes as partitions, whole nodes are
+    handed out to partitions. Otherwise each node is split into several
+    partitions, keeping SMT siblings of a core in the same partition.
+
+    Returns:
+        list of CPU lists, possibly fewer than `num_partitions` if there are
+        not enough physical cores
+    """
+    nodes = list(get_numa_nodes(cpus).values())
+    if num_partitions <= len(nodes):
+        partitions = [[] for _ in range(num_partitions)]
+        for i, chunk in enumerate(_split_evenly(nodes, num_partitions)):
+            for node_cpus in chunk:
+                partitions[i].extend(node_cpus)
+        return partitions
+
+    partitions = []
+    per_node = _split_evenly(list(range(num_partitions)), len(nodes))
+    for node_cpus, slots in zip(nodes, per_node):
+        cores = group_smt_siblings(node_cpus)
+        for chunk in _split_evenly(cores, min(len(slots), len(cores))):
+            partitions.append([cpu for core in chunk for cpu in core])
+    return [p for p in partitions if p]
+
+
+def _worker(partition, jobs, run_job, next_job, result_queue):
+    os.sched_setaffinity(0, partition)
+    while True:
+        with next_job.get_lock():
+            index = next_job.value
+            next_job.value += 1
+        if index >= len(jobs):
+            break
+        job = jobs[index]
+        error = None
+        try:
+            run_job(job)
+        except SystemExit as e:
+            error = f"exited with status {e.code}"
+        except BaseException:
+            error = traceback.format_exc()
+        result_queue.put((job.name, error))
+    # workers exit without running atexit handlers, write out the log
+    # records still queued or buffered
+    logging.shutdown()
+
+
+class ParallelJobScheduler:
+    """Run jobs concurrently, each worker pinned to its own CPU partition.
+
+    Every worker is a forked process whose CPU affinity is restricted to one
+    partition; the benchmarks it starts inherit that affinity. Workers take
+    the next pending job until none is left, so at most one job runs on a
+    partition at any time.
+    """
+
+    def __init__(self, partitions: typing.List[typing.List[int]]):
+        self.partitions = partitions
+
+    def run(self, jobs, run_job) -> typing.Dict[str, typing.Optional[str]]:
+        """Run `run_job(job)` for every job.
+
+        Returns:
+            dict mapping job name to None on success, or an error description
+        """
+        ctx = multiprocessing.get_context("fork")
+        # jobs are inherited by the forked workers, only indices are shared
+        next_job = ctx.Value("i", 0)
+        result_queue = ctx.Queue()
+
+        workers = []
+        for partition in self.partitions[: len(jobs)]:
+            logger.info(
+                "Starting worker on CPUs {}".format(",".join(map(str, partition)))
+            )
+            worker = ctx.Process(
+                target=_worker,
+                args=(partition, jobs, run_job, next_job, result_queue),
+            )
+            worker.start()
+            workers.append(worker)
+
+        results = {}
+        while len(results) < len(jobs):
+            try:
+                name, error = result_queue.get(timeout=1)
+                results[name] = error
+            except queue.Empty:
+                if any(w.is_alive() for w in workers):
+                    continue
+                # all workers exited, collect what they managed to report
+                while not result_queue.empty():
+                    name, error = result_queue.get()
+                    results[name] = error
+                break
+        for worker in workers:
+            worker.join()
+
+        for job in jobs:
+            if job.name not in results:
+                results[job.name] = "worker process died"
+        return results
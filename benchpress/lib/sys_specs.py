@@ -6,6 +6,7 @@
 
 # pyre-unsafe
 
+import concurrent.futures
 import json
 import logging
 import os
@@ -14,6 +15,28 @@ import subprocess
 
 from benchpress.lib import dmidecode
 
+logger = logging.getLogger(__name__)
+
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+# CPUs online and SMT state; they change with CPU hotplug or an SMT toggle
+CPU_STATE_PATHS = (
+    "/sys/devices/system/cpu/online",
+    "/sys/devices/system/cpu/smt/control",
+)
+# rpm and dpkg databases; their mtime changes whenever a package is installed
+PACKAGE_DB_PATHS = (
+    "/var/lib/rpm",
+    "/usr/lib/sysimage/rpm",
+    "/var/lib/dpkg/status",
+)
+
+# Specs that can only change across reboots, package (un)installs or changes
+# of the online CPUs. lscpu (cpu_topology) is cheap and also reflects
+# settings such as isolcpus, so it is always collected.
+CACHEABLE_SPECS = ("dmidecode", "sys_packages", "hardware")
+# Specs whose collectors take seconds on large machines
+SLOW_SPECS = ("dmidecode", "sys_packages", "hardware")
+
 
 def get_cpu_topology():
     lscpu_p = subprocess.Popen(
@@ -136,7 +159,7 @@ def get_hw_data():
     try:
         hw_data = json.loads(hw_data.decode("utf-8"))
     except json.decoder.JSONDecodeError:
-        logging.warning("Failed to parse output from lshw -json; Skipping it")
+        logger.warning("Failed to parse output from lshw -json; Skipping it")
         return {}
     return hw_data
 
@@ -157,3 +180,139 @@ def get_os_release_data():
             os_release_data_dict[param] = param_val
 
     return os_release_data_dict
+
+
+def get_sys_packages(os_release_data):
+    if "id" in os_release_data:
+        os_id = os_release_data["id"].lower()
+        if os_id in ("centos", "rhel", "fedora"):
+            return get_rpm_packages()
+        elif os_id in ("ubuntu", "debian"):
+            return get_dpkg_packages()
+    return []
+
+
+def get_boot_id():
+    try:
+        with open(BOOT_ID_PATH, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def get_package_db_mtime():
+    mtimes = []
+    for path in PACKAGE_DB_PATHS:
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except OSError:
+            continue
+    return max(mtimes, default=0.0)
+
+
+def get_cpu_state():
+    state = []
+    for path in CPU_STATE_PATHS:
+        try:
+            with open(path, "r") as f:
+                state.append(f.read().strip())
+        except OSError:
+            state.append("")
+    return ",".join(state)
+
+
+def get_sys_specs_cache_key():
+    """Key identifying the current boot, online CPUs, SMT state and state of
+    the package database.
+
+    Returns an empty string if the boot id is unavailable, in which case the
+    cache must not be used.
+    """
+    boot_id = get_boot_id()
+    if not boot_id:
+        return ""
+    return f"{boot_id}:{get_cpu_state()}:{get_package_db_mtime()}"
+
+
+def _load_cache(cache_path, key):
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (OSError, json.decoder.JSONDecodeError):
+        return None
+    if cache.get("key") != key:
+        return None
+    return cache.get("specs")
+
+
+def _save_cache(cache_path, key, specs):
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "specs": specs}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write system specs cache {cache_path}: {e}")
+
+
+def collect_sys_specs(cache_path=None, skip_slow=False):
+    """Collect all system specs reported along with benchmark results.
+
+    Collectors run concurrently. Specs that only change across reboots or
+    package (un)installs (CACHEABLE_SPECS) are cached at `cache_path`, keyed
+    by boot id, online CPUs, SMT state and package database mtime; the rest
+    are always collected.
+
+    Args:
+        cache_path (str): cache file location, None disables caching
+        skip_slow (bool): do not run SLOW_SPECS collectors, unless they are
+                          already cached
+
+    Returns:
+        dict: spec name -> collected data
+    """
+    os_release_data = get_os_release_data()
+    collectors = {
+        "cpu_topology": get_cpu_topology,
+        "os_kernel": get_os_kernel,
+        "kernel_cmdline": get_kernel_cmdline,
+        "dmidecode": get_dmidecode_data,
+        "sys_packages": lambda: get_sys_packages(os_release_data),
+        "kernel_params": get_sysctl_data,
+        "memory": get_cpu_mem_data,
+        "hardware": get_hw_data,
+    }
+    empty_specs = {"dmidecode": {}, "sys_packages": [], "hardware": {}}
+
+    specs = {}
+    cache_key = get_sys_specs_cache_key() if cache_path else ""
+    if cache_key:
+        cached = _load_cache(cache_path, cache_key)
+        if cached is not None:
+            logger.info(f"Using cached system specs from {cache_path}")
+            specs.update({k: v for k, v in cached.items() if k in CACHEABLE_SPECS})
+
+    pending = {k: v for k, v in collectors.items() if k not in specs}
+    skipped = set()
+    if skip_slow:
+        for name in SLOW_SPECS:
+            if name in pending:
+                del pending[name]
+                skipped.add(name)
+                specs[name] = empty_specs[name]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(collectors)) as pool:
+        futures = {name: pool.submit(func) for name, func in pending.items()}
+        for name, future in futures.items():
+            specs[name] = future.result()
+    specs["os-release"] = os_release_data
+
+    if cache_key and any(name in pending for name in CACHEABLE_SPECS):
+        # Placeholders of skipped collectors are not cached
+        to_cache = {
+            name: specs[name] for name in CACHEABLE_SPECS if name not in skipped
+        }
+        _save_cache(cache_path, cache_key, to_cache)
+
+    return specs
@@ -5,6 +5,15 @@
 import logging
 import logging.handlers
 import os
+import queue
+import threading
+
+# Maximum number of records buffered by the file handler between writes
+BUFFER_CAPACITY = 1024
+
+# Maximum number of raw (benchmark output) lines logged per second, 0 logs
+# all of them
+RAW_LOG_RATE = int(os.environ.get("BENCHPRESS_RAW_LOG_RATE", "0"))
 
 
 class ConditionalFormatter(logging.Formatter):
@@ -15,12 +24,177 @@ class ConditionalFormatter(logging.Formatter):
             return logging.Formatter.format(self, record)
 
 
-handler = logging.handlers.WatchedFileHandler("benchpress.log")
+class BufferedFileHandler(logging.handlers.WatchedFileHandler):
+    """WatchedFileHandler that writes records in batches.
+
+    Records are formatted into a buffer, the file is only checked for
+    rotation and written to on flush() or when `capacity` records are
+    buffered.
+    """
+
+    def __init__(self, filename, capacity=BUFFER_CAPACITY):
+        super().__init__(filename)
+        self.capacity = capacity
+        self.buffer = []
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+            if len(self.buffer) >= self.capacity:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer:
+                self.reopenIfNeeded()
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write("".join(self.buffer))
+                self.buffer.clear()
+            super().flush()
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers whenever the queue is empty,
+    so that bursts of records are written together.
+    """
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            if not block:
+                raise
+        for handler in self.handlers:
+            handler.flush()
+        return self.queue.get()
+
+
+class AsyncHandler(logging.handlers.QueueHandler):
+    """Hand records off to `target`, which is called from a background
+    thread. Logging threads never wait for the disk.
+
+    The background thread is restarted in forked children. Closing the
+    handler, e.g. through logging.shutdown(), writes all pending records.
+
+    Lines held back by a RawRateLimiter filter are noted before the next
+    non-raw record and when the handler is stopped.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self.listener = None
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def start(self):
+        if self.listener is None:
+            self.listener = BatchingQueueListener(
+                self.queue, self.target, respect_handler_level=True
+            )
+            self.listener.start()
+
+    def handle(self, record):
+        if not getattr(record, "raw", False):
+            self._log_dropped()
+        return super().handle(record)
+
+    def _log_dropped(self):
+        for f in self.filters:
+            if isinstance(f, RawRateLimiter):
+                note = f.dropped_record()
+                if note is not None:
+                    self.emit(note)
+
+    def stop(self):
+        if self.listener is not None:
+            self._log_dropped()
+            self.listener.stop()
+            self.listener = None
+            self.target.flush()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def _restart_after_fork(self):
+        if self.listener is None:
+            return
+        # the listener thread was not forked, pending records and buffered
+        # lines belong to the parent which writes them
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+        if isinstance(self.target, BufferedFileHandler):
+            self.target.buffer = []
+        self.start()
+
+
+class RawRateLimiter(logging.Filter):
+    """Let at most `rate` raw records through per second. The number of
+    lines dropped is noted in the next raw record logged in a later second,
+    or by AsyncHandler through dropped_record().
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.second = None
+        self.count = 0
+        self.dropped = 0
+
+    def filter(self, record):
+        if not getattr(record, "raw", False):
+            return True
+        second = int(record.created)
+        with self.lock:
+            if second != self.second:
+                self.second = second
+                self.count = 0
+                if self.dropped:
+                    record.msg = "[{} lines of output not logged]\n{}".format(
+                        self.dropped, record.getMessage()
+                    )
+                    record.args = None
+                    self.dropped = 0
+            self.count += 1
+            if self.count > self.rate:
+                self.dropped += 1
+                return False
+        return True
+
+    def dropped_record(self):
+        """Return a raw record noting the lines dropped so far, if any."""
+        with self.lock:
+            if not self.dropped:
+                return None
+            dropped = self.dropped
+            self.dropped = 0
+        return logging.makeLogRecord(
+            {
+                "msg": "[{} lines of output not logged]".format(dropped),
+                "levelno": logging.INFO,
+                "levelname": "INFO",
+                "raw": True,
+            }
+        )
+
+
+handler = BufferedFileHandler("benchpress.log")
 formatter = ConditionalFormatter(
     "[%(asctime)s] %(name)-12s %(levelname)-8s: %(message)s"
 )
 handler.setFormatter(formatter)
 
+async_handler = AsyncHandler(handler)
+if RAW_LOG_RATE > 0:
+    async_handler.addFilter(RawRateLimiter(RAW_LOG_RATE))
+
 stream_handler = logging.StreamHandler()
 stream_handler.setLevel(logging.WARNING)
 
@@ -28,6 +202,7 @@ stream_handler.setLevel(logging.WARNING)
 def create_logger():
     root = logging.getLogger()
     root.setLevel(os.environ.get("LOGLEVEL", "INFO"))
-    root.addHandler(handler)
+    async_handler.start()
+    root.addHandler(async_handler)
     root.addHandler(stream_handler)
     return root
@@ -8,40 +8,34 @@
 
 from benchpress.lib import open_source
 
-from .copy import CopyMoveHook
-from .cpu_limit import CpuLimit
-from .cpu_mpstat import CpuMpstat
-from .emon import Emon
-from .file import FileHook
-from .perf import Perf
-from .result import ResultHook
-from .shell import ShellHook
-from .tao_instruction import TaoInstructionHook
-from .toplev import Toplev
-from .user_script import UserScript
+# hook name -> "module:ClassName" of the hooks in this package, their
+# modules are only imported when a job uses them
+HOOKS = {
+    "copymove": "copy:CopyMoveHook",
+    "cpu-limit": "cpu_limit:CpuLimit",
+    "cpu-mpstat": "cpu_mpstat:CpuMpstat",
+    "emon": "emon:Emon",
+    "file": "file:FileHook",
+    "perf": "perf:Perf",
+    "result": "result:ResultHook",
+    "shell": "shell:ShellHook",
+    "tao_instruction": "tao_instruction:TaoInstructionHook",
+    "toplev": "toplev:Toplev",
+    "user-script": "user_script:UserScript",
+}
 
-if not open_source:
-    from .fb_chef_off import FBChefOff
-    from .fb_chef_off_turbo_on import FBChefOffTurboOn
-    from .fb_stop_dynologd import FBStopDynologd
-    from .fb_turbo_driver import FBTurboDriver
+INTERNAL_HOOKS = {
+    "fb_chef_off": "fb_chef_off:FBChefOff",
+    "fb_chef_off_turbo_on": "fb_chef_off_turbo_on:FBChefOffTurboOn",
+    "fb_turbo_driver": "fb_turbo_driver:FBTurboDriver",
+    "fb_stop_dynologd": "fb_stop_dynologd:FBStopDynologd",
+}
 
 
 def register_hooks(factory):
-    factory.register("copymove", CopyMoveHook)
-    factory.register("cpu-limit", CpuLimit)
-    factory.register("cpu-mpstat", CpuMpstat)
-    factory.register("emon", Emon)
-    factory.register("file", FileHook)
-    factory.register("perf", Perf)
-    factory.register("result", ResultHook)
-    factory.register("shell", ShellHook)
-    factory.register("tao_instruction", TaoInstructionHook)
-    factory.register("toplev", Toplev)
-    factory.register("user-script", UserScript)
+    for name, target in HOOKS.items():
+        factory.register_lazy(name, f"{__name__}.{target}")
 
     if not open_source:
-        factory.register("fb_chef_off", FBChefOff)
-        factory.register("fb_chef_off_turbo_on", FBChefOffTurboOn)
-        factory.register("fb_turbo_driver", FBTurboDriver)
-        factory.register("fb_stop_dynologd", FBStopDynologd)
+        for name, target in INTERNAL_HOOKS.items():
+            factory.register_lazy(name, f"{__name__}.{target}")
@@ -23,6 +23,7 @@ from .perf_monitors import (
     power,
     topdown,
 )
+from .perf_monitors.live_server import LiveMetricsServer
 
 BP_BASEPATH = os.path.dirname(os.path.abspath(sys.argv[0]))
 
@@ -54,6 +55,8 @@ AVAIL_MONITORS = {
     "power": power.Power,
 }
 
+LIVE_METRICS_OPTIONS = ("host", "port", "window")
+
 logger = logging.getLogger(__name__)
 
 
@@ -102,8 +105,27 @@ class Perf(Hook):
                 )
                 logger.warning(traceback.print_exception(type(e), e, e.__traceback__))
 
+        self.live_server = None
+        live_opts = opts.get("live_metrics") if isinstance(opts, dict) else None
+        if live_opts:
+            if not isinstance(live_opts, dict):
+                live_opts = {}
+            server_opts = {}
+            for key, value in live_opts.items():
+                if key in LIVE_METRICS_OPTIONS:
+                    server_opts[key] = value
+                else:
+                    logger.warning(f"Ignoring unknown live_metrics option {key}")
+            self.live_server = LiveMetricsServer(self.monitors, job, **server_opts)
+            self.live_server.start()
+
     def after_job(self, opts, job):
+        if getattr(self, "live_server", None) is not None:
+            self.live_server.stop()
         for monitor in self.monitors:
             monitor.terminate()
+        write_parquet = isinstance(opts, dict) and opts.get("parquet", False)
         for monitor in self.monitors:
             monitor.write_csv()
+            if write_parquet and hasattr(monitor, "write_parquet"):
+                monitor.write_parquet()
@@ -7,6 +7,7 @@
 # pyre-unsafe
 
 import abc
+import io
 import logging
 import os
 import signal
@@ -14,6 +15,8 @@ import subprocess
 import sys
 import threading
 
+from .columnar import ColumnarAccumulator
+
 
 logger = logging.getLogger(__name__)
 # Path to directory of benchpress_cli.py
@@ -28,10 +31,8 @@ class Monitor:
         """Initialize some common parameters and storage variables"""
         self.name = name
         self.interval = interval
-        # Reserved for result processing
-        self.res = []
-        # Reserved for original output of the monitoring process
-        self.output = ""
+        # Reserved for result processing, one row per sample
+        self.res = ColumnarAccumulator()
         self.job_uuid = job_uuid
         self.logpath = self.gen_path(f"{name}.log")
         self.csvpath = self.gen_path(f"{name}.csv")
@@ -46,9 +47,8 @@ class Monitor:
 
     def output_catcher(self):
         """Catch output from the monitoring process line by line, and do the following:
-        1) Append the line into self.output variable
-        2) Write the line to the log file at /path/to/benchpress/benchmark_metrics_<uuid>/<name>.log
-        3) Call process_output(line) to let subclasses customly process output lines
+        1) Write the line to the log file at /path/to/benchpress/benchmark_metrics_<uuid>/<name>.log
+        2) Call process_output(line) to let subclasses customly process output lines
         """
         if not hasattr(self, "proc"):
             return
@@ -59,7 +59,6 @@ class Monitor:
         for line in iter(self.proc.stdout.readline, ""):
             if not line:
                 continue
-            self.output += line
             self.process_output(line)
             self.logfile.write(line)
 
@@ -117,21 +116,23 @@ class Monitor:
     def gen_csv(self):
         if len(self.res) == 0:
             return ""
-
-        csv_text = ""
-        headers = sorted(self.res[0].keys() - {"timestamp"})
-        csv_text += "index,timestamp," + ",".join(headers) + "\n"
-        for i in range(len(self.res)):
-            csv_text += f"{i},{self.res[i]['timestamp']},"
-            for key in headers:
-                csv_text += f"{self.res[i][key]},"
-            csv_text += "\n"
-
-        return csv_text
+        buf = io.StringIO()
+        self.res.write_csv(buf)
+        return buf.getvalue()
 
     def write_csv(self):
-        csv = self.gen_csv()
-        if len(csv.strip()) == 0:
+        if len(self.res) == 0:
             return
         with open(self.csvpath, "w") as f:
-            f.write(csv)
+            self.res.write_csv(f)
+
+    def write_parquet(self):
+        """Write results as Parquet next to the CSV, if pandas and pyarrow
+        are available.
+        """
+        if len(self.res) == 0:
+            return
+        try:
+            self.res.write_parquet(self.gen_path(f"{self.name}.parquet"))
+        except ImportError as e:
+            logger.warning(f"Cannot write {self.name} results as Parquet: {e}")
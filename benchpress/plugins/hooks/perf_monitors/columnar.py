@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import csv
+import math
+import time
+from array import array
+
+TIMESTAMP_FORMAT = "%I:%M:%S %p"
+
+
+def to_number(value):
+    """Convert a counter value to int if that keeps its text, else keep it.
+
+    Other values stay text, so that they are written out exactly as the
+    monitored tool printed them (e.g. "12.50" or "<not counted>").
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return value
+    return number if str(number) == value else value
+
+
+# array type codes of numeric columns
+INT_TYPECODE = "q"
+FLOAT_TYPECODE = "d"
+# marks rows without a value in an integer column
+INT_MISSING = -(2**63)
+
+
+def value_typecode(value):
+    """Array type code able to hold `value` exactly, or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int) and INT_MISSING < value < 2**63:
+        return INT_TYPECODE
+    if isinstance(value, float) and not math.isnan(value):
+        return FLOAT_TYPECODE
+    return None
+
+
+class Column:
+    """One column of samples.
+
+    A column of ints is kept in a packed array of 64-bit ints and a column
+    of floats in a packed array of doubles, with INT_MISSING and NaN marking
+    rows where the column has no value. The column is downgraded to a plain
+    list the first time a value does not fit its array (a non-numeric value
+    such as "<not counted>", an int among floats, a float among ints or an
+    int beyond 64 bits), so that every value is written out unchanged.
+    """
+
+    def __init__(self, num_rows=0):
+        self.values = None
+        self.num_rows = num_rows
+
+    def _missing(self):
+        if self.typecode == INT_TYPECODE:
+            return INT_MISSING
+        return math.nan
+
+    def _is_missing(self, value):
+        if self.typecode == INT_TYPECODE:
+            return value == INT_MISSING
+        return math.isnan(value)
+
+    @property
+    def typecode(self):
+        return getattr(self.values, "typecode", None)
+
+    def _start(self, value):
+        typecode = value_typecode(value)
+        if typecode is None:
+            self.values = [None] * self.num_rows
+        else:
+            self.values = array(typecode)
+            self.values.extend(array(typecode, [self._missing()]) * self.num_rows)
+
+    def _to_list(self):
+        self.values = [None if self._is_missing(v) else v for v in self.values]
+
+    def pad(self, num_rows):
+        if self.values is None:
+            self.num_rows = max(self.num_rows, num_rows)
+            return
+        missing = num_rows - len(self.values)
+        if missing <= 0:
+            return
+        if self.typecode is None:
+            self.values.extend([None] * missing)
+        else:
+            self.values.extend(array(self.typecode, [self._missing()]) * missing)
+
+    def set(self, row, value):
+        if self.values is None:
+            self._start(value)
+        self.pad(row + 1)
+        if self.typecode is not None and value_typecode(value) != self.typecode:
+            self._to_list()
+        self.values[row] = value
+
+    def get(self, row, default=None):
+        if self.values is None or row >= len(self.values):
+            return default
+        value = self.values[row]
+        if self.typecode is None:
+            return default if value is None else value
+        return default if self._is_missing(value) else value
+
+    def formatted(self, num_rows):
+        """Return the column as a list of CSV cells."""
+        self.pad(num_rows)
+        if self.values is None:
+            return [""] * num_rows
+        if self.typecode is None:
+            return ["" if v is None else str(v) for v in self.values]
+        return ["" if self._is_missing(v) else str(v) for v in self.values]
+
+
+class ColumnarAccumulator:
+    """Column-oriented storage for monitor samples.
+
+    Each row is one sample taken at a point in time. Rows are appended with a
+    dict of values, like the list of dicts monitors used to keep, but values
+    are stored per column in packed arrays and sample times are stored as
+    epoch seconds, which are only formatted when the data is written out.
+    """
+
+    def __init__(self):
+        self.times = array("d")
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, row, ts=None):
+        """Add a sample. A "timestamp" key in `row` is ignored; the sample
+        time is `ts` (epoch seconds) or the current time.
+        """
+        index = len(self.times)
+        self.times.append(time.time() if ts is None else ts)
+        for key, value in row.items():
+            if key == "timestamp":
+                continue
+            self._column(key).set(index, value)
+
+    def set_last(self, key, value):
+        """Set a value on the most recent sample."""
+        self._column(key).set(len(self.times) - 1, value)
+
+    def get_last(self, key, default=None):
+        if key not in self.columns or len(self.times) == 0:
+            return default
+        return self.columns[key].get(len(self.times) - 1, default)
+
+    def _column(self, key):
+        if key not in self.columns:
+            self.columns[key] = Column(len(self.times))
+        return self.columns[key]
+
+    def row(self, index):
+        """Return a sample as a dict, like the rows monitors used to keep."""
+        if index < 0:
+            index += len(self.times)
+        row = {"timestamp": format_timestamps(self.times[index : index + 1])[0]}
+        # copy the items, columns may be added while the live metrics
+        # server reads samples
+        for key, column in list(self.columns.items()):
+            value = column.get(index)
+            if value is not None:
+                row[key] = value
+        return row
+
+    def __getitem__(self, index):
+        return self.row(index)
+
+    def __iter__(self):
+        for i in range(len(self.times)):
+            yield self.row(i)
+
+    def tail(self, count):
+        """Return the last `count` samples as dicts."""
+        start = max(0, len(self.times) - count)
+        return [self.row(i) for i in range(start, len(self.times))]
+
+    def headers(self):
+        """Sorted names of the columns set on the first sample, which is
+        what the CSV output contains.
+        """
+        if len(self.times) == 0:
+            return []
+        return sorted(k for k, c in self.columns.items() if c.get(0) is not None)
+
+    def write_csv(self, f):
+        """Write all samples to the file object `f` as CSV."""
+        headers = self.headers()
+        num_rows = len(self.times)
+        columns = [self.columns[h].formatted(num_rows) for h in headers]
+        f.write("index,timestamp," + ",".join(headers) + "\n")
+        writer = csv.writer(f, lineterminator="\n", quoting=csv.QUOTE_MINIMAL)
+        # Rows end with an empty cell to keep the trailing comma of the
+        # original format
+        trailer = [""] * num_rows
+        writer.writerows(
+            zip(range(num_rows), format_timestamps(self.times), *columns, trailer)
+        )
+
+    def to_dict(self):
+        """Return the samples as a dict of column lists."""
+        num_rows = len(self.times)
+        data = {"timestamp": format_timestamps(self.times)}
+        for key in self.headers():
+            column = self.columns[key]
+            data[key] = [column.get(i) for i in range(num_rows)]
+        return data
+
+    def write_parquet(self, path):
+        """Write all samples to a Parquet file. Requires pandas and pyarrow."""
+        import pandas as pd
+
+        df = pd.DataFrame(self.to_dict())
+        df.index.name = "index"
+        df.to_parquet(path)
+
+
+def format_timestamps(times):
+    """Format epoch seconds like time.strftime("%I:%M:%S %p"), calling
+    strftime only once per distinct second.
+    """
+    cache = {}
+    formatted = []
+    for t in times:
+        sec = int(t)
+        if sec not in cache:
+            cache[sec] = time.strftime(TIMESTAMP_FORMAT, time.localtime(sec))
+        formatted.append(cache[sec])
+    return formatted
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import json
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from . import logger
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9465
+DEFAULT_WINDOW = 60
+
+
+def prometheus_name(*parts):
+    name = "_".join(parts)
+    name = re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+    if name[0].isdigit():
+        name = "_" + name
+    return name
+
+
+def is_number(value):
+    return (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and not math.isnan(value)
+    )
+
+
+class LiveMetricsServer:
+    """Serve the samples of running monitors over HTTP while a job runs.
+
+    Endpoints:
+        /latest         latest sample of every monitor, as JSON
+        /window?n=N     last N samples (default `window`) of every monitor
+        /metrics        latest samples in Prometheus text format
+
+    The job's parser may also report intermediate results through
+    Job.live_metrics(); they are included under the "job" key.
+    """
+
+    def __init__(
+        self, monitors, job, host=DEFAULT_HOST, port=DEFAULT_PORT, window=DEFAULT_WINDOW
+    ):
+        self.monitors = monitors
+        self.job = job
+        self.host = host
+        self.port = port
+        self.window = window
+        self.httpd = None
+        self.thread = None
+
+    def _monitor_results(self):
+        for monitor in self.monitors:
+            res = getattr(monitor, "res", None)
+            name = getattr(monitor, "name", None)
+            if res is None or name is None or not hasattr(res, "tail"):
+                continue
+            yield name, res
+
+    def _job_metrics(self):
+        try:
+            return self.job.live_metrics()
+        except Exception:
+            return {}
+
+    def latest(self):
+        data = {"job": self._job_metrics(), "monitors": {}}
+        for name, res in self._monitor_results():
+            tail = res.tail(1)
+            data["monitors"][name] = tail[0] if tail else {}
+        return data
+
+    def window_samples(self, count):
+        data = {"job": self._job_metrics(), "monitors": {}}
+        for name, res in self._monitor_results():
+            data["monitors"][name] = res.tail(count)
+        return data
+
+    def prometheus(self):
+        job_name = self.job.name.replace('"', '\\"')
+        lines = []
+        for key, value in self._job_metrics().items():
+            if is_number(value):
+                metric = prometheus_name("benchpress", "job", key)
+                lines.append(f'{metric}{{job="{job_name}"}} {value}')
+        for name, res in self._monitor_results():
+            tail = res.tail(1)
+            if not tail:
+                continue
+            for key, value in tail[0].items():
+                if is_number(value):
+                    metric = prometheus_name("benchpress", name, key)
+                    lines.append(f'{metric}{{job="{job_name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, body, content_type):
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/metrics":
+                    self._reply(server.prometheus(), "text/plain; version=0.0.4")
+                elif url.path in ("/", "/latest"):
+                    self._reply(json.dumps(server.latest()), "application/json")
+                elif url.path == "/window":
+                    query = parse_qs(url.query)
+                    try:
+                        count = int(query.get("n", [server.window])[0])
+                    except ValueError:
+                        count = server.window
+                    self._reply(
+                        json.dumps(server.window_samples(count)), "application/json"
+                    )
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                logger.debug("live metrics: " + format % args)
+
+        return Handler
+
+    def start(self):
+        try:
+            self.httpd = ThreadingHTTPServer(
+                (self.host, self.port), self._make_handler()
+            )
+        except OSError as e:
+            logger.warning(
+                f"Could not start live metrics server on {self.host}:{self.port}: {e}"
+            )
+            return
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, name="live-metrics", daemon=True
+        )
+        self.thread.start()
+        logger.info(
+            "Serving live metrics at http://{}:{}/metrics".format(
+                self.host, self.httpd.server_address[1]
+            )
+        )
+
+    def stop(self):
+        if self.httpd is None:
+            return
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+        self.httpd = None
@@ -7,9 +7,9 @@
 # pyre-unsafe
 
 import subprocess
-import time
 
 from . import logger, Monitor
+from .columnar import to_number
 
 
 class SoftReadOnlyList:
@@ -43,33 +43,33 @@ class PerfStat(Monitor):
         super(PerfStat, self).__init__(interval, "perf-stat", job_uuid)
         self.events = ["instructions", "cycles"] + list(additional_events)
         self.delim = delim
+        self.last_interval = None
 
     def _process_output(self, line):
-        obj = unpack_perf_stat_line(line, self.delim)
-        event_name = obj["event"]
-        event_value = obj["counter-value"]
-        if (
-            len(self.res) == 0
-            or abs(float(obj["interval"]) - self.res[-1]["interval"]) >= 1e-5
-        ):
-            self.res.append(
-                {
-                    "interval": float(obj["interval"]),
-                    event_name: event_value,
-                    "timestamp": time.strftime("%I:%M:%S %p"),
-                }
-            )
+        # Only the first four fields are needed:
+        # interval, counter-value, unit, event
+        fields = line.split(self.delim, 4)
+        if len(fields) < 4:
+            return
+        interval = float(fields[0])
+        event_name = fields[3]
+        event_value = to_number(fields[1])
+        if self.last_interval is None or abs(interval - self.last_interval) >= 1e-5:
+            self.last_interval = interval
+            self.res.append({"interval": interval, event_name: event_value})
         else:
-            self.res[-1][event_name] = event_value
-        # Calculate IPC if both "instructions" and "cycles" exist
-        if "instructions" in self.res[-1] and "cycles" in self.res[-1]:
-            instructions = self.res[-1]["instructions"]
-            cycles = self.res[-1]["cycles"]
+            self.res.set_last(event_name, event_value)
+        # Calculate IPC once both "instructions" and "cycles" are in
+        if event_name in ("instructions", "cycles"):
+            instructions = self.res.get_last("instructions")
+            cycles = self.res.get_last("cycles")
+            if instructions is None or cycles is None:
+                return
             try:
                 ipc = float(instructions) / float(cycles)
             except (ValueError, TypeError, ZeroDivisionError):
                 ipc = 0
-            self.res[-1]["instructions_per_cycle"] = ipc
+            self.res.set_last("instructions_per_cycle", ipc)
 
     def process_output(self, line):
         try:
@@ -11,9 +11,6 @@ import re
 import socket
 import subprocess
 
-import numpy as np
-import pandas as pd
-
 from . import BP_BASEPATH, logger, Monitor
 
 
@@ -122,6 +119,27 @@ def get_amd_zen_generation(cpuinfo: dict):
         return "zen3"
 
 
+def write_timeseries_summary(timeseries_path, summary_path):
+    """
+    Summarize a topdown CSV (one column per metric) into summary_path with
+    perfutils/generate_perf_report.py, the same way perf counter captures are
+    summarized by BasePerfUtil.
+    """
+    script = os.path.join(BP_BASEPATH, "perfutils", "generate_perf_report.py")
+    if not os.path.exists(timeseries_path) or not os.path.exists(script):
+        return
+    cmd = [script, "--input-format", "timeseries", "-f", "csv", timeseries_path]
+    with open(summary_path, "w") as summary_file:
+        proc = subprocess.run(
+            cmd, stdout=summary_file, stderr=subprocess.PIPE, encoding="utf-8"
+        )
+    if proc.returncode != 0:
+        logger.warning(
+            f"Could not summarize {timeseries_path}, generate_perf_report.py "
+            f"failed with exit code {proc.returncode}: {proc.stderr}"
+        )
+
+
 class IntelPerfSpect(Monitor):
     def __init__(self, job_uuid, mux_interval_msecs=125, perfspect_path=None):
         # PerfSpect 1.x does not support specifying interval
@@ -193,6 +211,10 @@ class IntelPerfSpect(Monitor):
         exitcode = self.proc.wait()
         if exitcode != 0:
             logger.warning(f"perf-postprocess failed with exit code {exitcode}")
+            return
+        write_timeseries_summary(
+            self.postprocess_output_path, self.gen_path("topdown-intel-summary.csv")
+        )
 
 
 class IntelPerfSpect3(Monitor):
@@ -255,6 +277,9 @@ class IntelPerfSpect3(Monitor):
         new_name = self.postprocess_output_path
         if os.path.exists(original_name):
             os.rename(original_name, new_name)
+            write_timeseries_summary(
+                new_name, self.gen_path("topdown-intel.sys-summary.csv")
+            )
         else:
             logger.warning(
                 f"{original_name} does not exist. was collection successful?"
@@ -460,6 +485,10 @@ class ARMPerfUtil(Monitor):
         """
         if not os.path.exists(self.csvpath):
             return
+        # imported here as they take long to load and are only used on ARM
+        import numpy as np
+        import pandas as pd
+
         t_csv_path = self.gen_path(f"{self.name}-transposed.csv")
         df = pd.read_csv(self.csvpath)
         t_rows = []
@@ -475,6 +504,7 @@ class ARMPerfUtil(Monitor):
                 t_rows[-1][metric_key] = df.iloc[i]["value"]
         df_t = pd.DataFrame(t_rows)
         df_t.to_csv(t_csv_path, index=False)
+        write_timeseries_summary(t_csv_path, self.gen_path(f"{self.name}-summary.csv"))
 
 
 class NVPerfUtil(BasePerfUtil):
@@ -18,6 +18,9 @@ FEEDSIM_TARGET_LATENCY = (
 FEEDSIM_FINAL_QPS_REGEX = r"final\srequested_qps\s=\s(\d+\.?\d+),\smeasured_qps\s=\s(\d+\.?\d+),\slatency\s=\s(\d+\.?\d+)"
 FEEDSIM_BASELINE = BASELINES["feedsim"]
 
+TARGET_LATENCY_PATTERN = re.compile(FEEDSIM_TARGET_LATENCY)
+FINAL_QPS_PATTERN = re.compile(FEEDSIM_FINAL_QPS_REGEX)
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,27 +39,43 @@ class FeedSimParser(Parser):
         final requested_qps = 24, measured_qps = 24, latency = 910.8
     """
 
+    def __init__(self):
+        self.start_stream()
+
     def parse(self, stdout, stderr, returncode):
         """Parse FeedSim metrics."""
-        # Make it multiline output
-        output = "\n".join(stdout)
-        metrics = {}
-        matches = re.findall(FEEDSIM_TARGET_LATENCY, output)
-        for m in matches:
-            if len(m) != 2:
-                logger.warning("Couldn't find targets latency measurement")
-                break
-            metrics["target_percentile"] = m[0]
-            metrics["target_latency_msec"] = float(m[1])
-
-        matches = re.findall(FEEDSIM_FINAL_QPS_REGEX, output)
-        for m in matches:
-            if len(m) != 3:
-                logger.warning("Couldn't find final QPS measurement")
-                continue
-            metrics["final_requested_qps"] = float(m[0])
-            metrics["final_achieved_qps"] = float(m[1])
-            metrics["final_latency_msec"] = float(m[2])
+        self.start_stream()
+        for line in stdout:
+            self.feed_stdout(line)
+        return self.finish_stream(returncode)
+
+    def start_stream(self):
+        self._metrics = {}
+
+    def feed_stdout(self, line):
+        metrics = self._metrics
+        m = TARGET_LATENCY_PATTERN.search(line)
+        if m:
+            metrics["target_percentile"] = m.group(1)
+            metrics["target_latency_msec"] = float(m.group(2))
+
+        m = FINAL_QPS_PATTERN.search(line)
+        if m:
+            metrics["final_requested_qps"] = float(m.group(1))
+            metrics["final_achieved_qps"] = float(m.group(2))
+            metrics["final_latency_msec"] = float(m.group(3))
             metrics["score"] = metrics["final_achieved_qps"] / FEEDSIM_BASELINE
 
+    def feed_stderr(self, line):
+        pass
+
+    def finish_stream(self, returncode):
+        metrics = self._metrics
+        if "target_percentile" not in metrics:
+            logger.warning("Couldn't find targets latency measurement")
+        if "final_achieved_qps" not in metrics:
+            logger.warning("Couldn't find final QPS measurement")
         return metrics
+
+    def live_metrics(self):
+        return dict(self._metrics)
@@ -24,6 +24,9 @@ def recursive_set(obj, keys, value):
 
 
 class HealthCheckParser(Parser):
+    # the loaded latency comes from /tmp/bw-lat.tsv and /tmp/latency.txt
+    reads_files = True
+
     def mm_mem_idle_latency(self, line, idx):
         metrics = self.metrics
         vals = line.split()
@@ -26,6 +26,12 @@ class SparkStandaloneParser(Parser):
                 qph = float(items[1].strip())
                 metrics["queries_per_hour"] = qph
                 metrics["score"] = qph / SPARK_BASELINE
+            if line.strip().startswith("session-startup"):
+                metrics["session_startup_time"] = float(items[1].strip())
+            for phase in ("cold", "warm"):
+                if line.strip().startswith(f"{phase}-release_test"):
+                    test_name = items[0].strip().replace(f"{phase}-release_", "")
+                    metrics[f"{phase}_time_{test_name}"] = float(items[1].strip())
             if line.strip().startswith("worker-cores"):
                 metrics["worker_cores"] = int(items[1].strip())
             if line.strip().startswith("worker-memory"):
@@ -6,10 +6,14 @@
 
 # pyre-unsafe
 
+import statistics
+
 from benchpress.lib.baseline import BASELINES
 from benchpress.lib.parser import Parser
 
 TAO_BENCH_BASELINE = BASELINES["taobench"]
+# Printed by packages/tao_bench/run.py when the adaptive warmup ends
+MEASUREMENT_PHASE_MARKER = "TaoBench measurement phase started"
 
 
 class TaoBenchServerSnapshot:
@@ -54,35 +58,73 @@ class TaoBenchParser(Parser):
 
     def __init__(self, server_csv_name="server.csv"):
         self.server_csv_name = server_csv_name
+        self.start_stream()
 
     def parse(self, stdout, stderr, returncode):
         """Extracts TAO bench results from stdout."""
-        metrics = {"role": "unknown"}
-        server_snapshots = []
-        warmup_done = False
-        exec_done = False
+        self.start_stream()
         for line in stdout:
-            items = line.split()
-            # server metrics
-            if line.strip().startswith("fast_qps =") or line.strip().startswith(
-                "OUT OF MEMORY"
-            ):
-                metrics["role"] = "server"
-                server_snapshots.append(TaoBenchServerSnapshot(line))
-            # client metrics
-            if line.strip().startswith("ALL STATS"):
-                exec_done = warmup_done
-                warmup_done = True
-                metrics["role"] = "client"
-            if exec_done:
-                if line.strip().startswith("Sets"):
-                    metrics["set_qps"] = float(items[1])
-                elif line.strip().startswith("Gets"):
-                    metrics["qps"] = float(items[1])
+            self.feed_stdout(line)
+        return self.finish_stream(returncode)
+
+    def start_stream(self):
+        self._metrics = {"role": "unknown"}
+        self._server_snapshots = []
+        self._warmup_done = False
+        self._exec_done = False
+        # index of the first server snapshot of the measurement phase, if the
+        # server reported the end of an adaptive warmup
+        self._measurement_start = None
+
+    def feed_stdout(self, line):
+        metrics = self._metrics
+        stripped = line.strip()
+        # server metrics
+        if stripped.startswith("fast_qps =") or stripped.startswith("OUT OF MEMORY"):
+            metrics["role"] = "server"
+            self._server_snapshots.append(TaoBenchServerSnapshot(line))
+        if stripped.startswith(MEASUREMENT_PHASE_MARKER):
+            self._measurement_start = len(self._server_snapshots)
+        # client metrics
+        if stripped.startswith("execution phase"):
+            # the warmup client may have been stopped before printing stats
+            self._warmup_done = True
+        if stripped.startswith("ALL STATS"):
+            self._exec_done = self._warmup_done
+            self._warmup_done = True
+            metrics["role"] = "client"
+        if self._exec_done:
+            if stripped.startswith("Sets"):
+                metrics["set_qps"] = float(line.split()[1])
+            elif stripped.startswith("Gets"):
+                metrics["qps"] = float(line.split()[1])
+
+    def feed_stderr(self, line):
+        pass
+
+    def finish_stream(self, returncode):
+        metrics = self._metrics
         # calcualte server-side QPS
         if metrics["role"] == "server":
-            self.process_server_snapshots(metrics, server_snapshots)
-            self.generate_server_csv(server_snapshots)
+            self.process_server_snapshots(metrics, self._server_snapshots)
+            if not self.replaying:
+                self.generate_server_csv(self._server_snapshots)
+        return metrics
+
+    def live_metrics(self):
+        """Latest server snapshot, or client QPS once measurement started."""
+        metrics = {"role": self._metrics["role"]}
+        if metrics["role"] == "server":
+            for snapshot in reversed(self._server_snapshots):
+                if snapshot.valid and not snapshot.is_oom:
+                    for key in TaoBenchServerSnapshot.KEYS:
+                        metrics[key] = snapshot.get(key)
+                    break
+            metrics["num_snapshots"] = len(self._server_snapshots)
+        else:
+            for key in ("qps", "set_qps"):
+                if key in self._metrics:
+                    metrics[key] = self._metrics[key]
         return metrics
 
     def generate_server_csv(self, server_snapshots):
@@ -108,25 +150,50 @@ class TaoBenchParser(Parser):
         with open(f"benchmarks/tao_bench/{self.server_csv_name}", "w") as table:
             table.writelines(lines)
 
-    def process_server_snapshots(self, metrics, server_snapshots):
-        counter = 0
-        total_fast_qps = 0
-        total_slow_pqs = 0
+    def is_measurable(self, snapshot):
+        # Also filter out data points with low hit rate
+        return (
+            snapshot.valid
+            and snapshot.get("fast_qps") > 1
+            and snapshot.get("hit_rate") >= self.MIN_HIT_RATE
+        )
+
+    def last_snapshots(self, server_snapshots, count=360 / 5 - 10):
+        """Fixed window: the last `count` measurable snapshots."""
+        window = []
         for snapshot in reversed(server_snapshots):
-            if not snapshot.valid:
-                continue
-            # Also filter out data points with low hit rate
-            if (
-                snapshot.get("fast_qps") > 1
-                and snapshot.get("hit_rate") >= self.MIN_HIT_RATE
-            ):
-                counter += 1
-            else:
+            if not self.is_measurable(snapshot):
                 continue
-            total_fast_qps += snapshot.get("fast_qps")
-            total_slow_pqs += snapshot.get("slow_qps")
-            if counter >= 360 / 5 - 10:
+            window.append(snapshot)
+            if len(window) >= count:
                 break
+        return window
+
+    def measurement_window(self, server_snapshots):
+        """Window chosen from the data after an adaptive warmup: all the
+        measurable snapshots of the measurement phase, minus those taken
+        while the clients ramp up or down (total QPS below half the median).
+        """
+        window = [s for s in server_snapshots if self.is_measurable(s)]
+        if not window:
+            return window
+        median = statistics.median(
+            s.get("fast_qps") + s.get("slow_qps") for s in window
+        )
+        return [
+            s for s in window if s.get("fast_qps") + s.get("slow_qps") >= median / 2
+        ]
+
+    def process_server_snapshots(self, metrics, server_snapshots):
+        if self._measurement_start is not None:
+            window = self.measurement_window(
+                server_snapshots[self._measurement_start :]
+            )
+        else:
+            window = self.last_snapshots(server_snapshots)
+        counter = len(window)
+        total_fast_qps = sum(snapshot.get("fast_qps") for snapshot in window)
+        total_slow_pqs = sum(snapshot.get("slow_qps") for snapshot in window)
         if counter > 0:
             metrics["fast_qps"] = total_fast_qps / counter
             metrics["slow_qps"] = total_slow_pqs / counter
@@ -16,6 +16,30 @@ TAO_BENCH_BASELINE = BASELINES["taobench"]
 
 
 class TaoBenchAutoscaleParser(Parser):
+    # run_autoscale.py periodically prints the QPS summed over all server
+    # instances on a line starting with this prefix
+    LIVE_QPS_PREFIX = "Fleet live QPS:"
+
+    def start_stream(self):
+        super().start_stream()
+        self._live = {}
+
+    def feed_stdout(self, line):
+        super().feed_stdout(line)
+        if line.startswith(self.LIVE_QPS_PREFIX):
+            live = {}
+            for item in line[len(self.LIVE_QPS_PREFIX) :].split(","):
+                key, _, value = item.partition("=")
+                try:
+                    live[key.strip()] = float(value)
+                except ValueError:
+                    live[key.strip()] = value.strip()
+            self._live = live
+
+    def live_metrics(self):
+        """Fleet-wide QPS last reported by run_autoscale.py."""
+        return dict(getattr(self, "_live", {}))
+
     def parse(self, stdout, stderr, returncode):
         """Extracts TAO bench results from stdout."""
         metrics = {}
@@ -13,6 +13,9 @@ from benchpress.lib.parser import Parser
 
 
 class WDLParser(Parser):
+    # the metrics are in benchmarks/wdl_bench/out_<benchmark>.json
+    reads_files = True
+
     def parse(self, stdout, stderr, returncode):
         metrics = {}
         benchmarks = []
@@ -21,16 +24,12 @@ class WDLParser(Parser):
                 benchmarks = line.split(":")[1].split()
                 break
 
+        # each out_<benchmark>.json holds {benchmark: {metric: value}} of one
+        # suite (folly binary, lzbench or openssl)
         for benchmark in benchmarks:
             out_file = "benchmarks/wdl_bench/out_" + benchmark + ".json"
 
             with open(out_file, "r") as out_f:
-                out = json.load(out_f)
-                for k, v in out.items():
-                    metrics[benchmark + k] = v
-
-        if len(metrics.keys()) >= 20:
-            metrics = {}
-            metrics["results in each out_benchmark_name.json file"] = benchmarks
+                metrics[benchmark] = json.load(out_f)
 
         return metrics
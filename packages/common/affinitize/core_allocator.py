@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Split the CPUs of this machine among benchmark instances.
+
+Every instance gets the same number of physical cores, give or take one, so
+that callers can split memory and workers evenly. Within that constraint the
+partitions follow the machine topology: they are cut at NUMA node boundaries
+first, then at L3 cache domain boundaries (CCX/CCD on AMD, clusters on some
+ARM parts), and the hyperthreads of a physical core always go to the same
+instance.
+
+Usage as a library:
+
+    from core_allocator import CoreAllocator, cpus_to_ranges
+    for cpus in CoreAllocator().allocate(4):
+        print(cpus_to_ranges(cpus))
+
+Usage from shell scripts:
+
+    core_allocator.py -n 4 -i 0     # cpu list of the first of 4 instances
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from typing import Callable, List, Optional, Set
+
+from lib.schedule_lib import cpu_info, NestedDict, readFileFull
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """
+    @param string cpu_list in the kernel format, e.g. "0-3,8,10-11"
+    @return sorted list of CPU indices
+    """
+    cpus = set()
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def cpus_to_ranges(cpus: List[int]) -> str:
+    """
+    @param list cpus CPU indices
+    @return string cpu list in the kernel format, e.g. "0-3,8,10-11", as
+        accepted by taskset --cpu-list and numactl --physcpubind
+    """
+    ranges = []
+    cpus = sorted(set(cpus))
+    start = prev = None
+    for cpu in cpus:
+        if prev is not None and cpu == prev + 1:
+            prev = cpu
+            continue
+        if start is not None:
+            ranges.append(f"{start}-{prev}" if prev != start else f"{start}")
+        start = prev = cpu
+    if start is not None:
+        ranges.append(f"{start}-{prev}" if prev != start else f"{start}")
+    return ",".join(ranges)
+
+
+def get_l3_domain_for_cpu(cpu: int) -> Optional[int]:
+    """
+    @param int cpu index of a logical CPU
+    @return int the lowest CPU sharing the L3 cache with `cpu`, which
+        identifies the L3 domain, or None if sysfs does not report an L3 cache
+    """
+    cache_dirs = glob.glob(f"/sys/devices/system/cpu/cpu{cpu}/cache/index*")
+    for cache_dir in cache_dirs:
+        try:
+            if int(readFileFull(os.path.join(cache_dir, "level"))) != 3:
+                continue
+            shared = readFileFull(os.path.join(cache_dir, "shared_cpu_list"))
+        except (OSError, ValueError):
+            continue
+        shared_cpus = parse_cpu_list(shared)
+        if shared_cpus:
+            return shared_cpus[0]
+    return None
+
+
+def balanced_sizes(
+    num_items: int, n: int, cut_score: Callable[[int], int]
+) -> List[int]:
+    """Sizes of `n` contiguous chunks of `num_items` items that differ by at
+    most one, choosing which chunks get an extra item so that the sum of
+    `cut_score(position)` over the cuts between chunks is the highest.
+    """
+    portion, remaining = divmod(num_items, n)
+    # number of larger chunks so far -> (score, sizes) of the best prefix
+    best = {0: (0, [])}
+    for i in range(1, n + 1):
+        candidates = {}
+        for larger, (score, sizes) in best.items():
+            # larger chunks first on ties
+            for extra in (1, 0):
+                count = larger + extra
+                if count > remaining or i - count > n - remaining:
+                    continue
+                if i < n:
+                    score_after = score + cut_score(i * portion + count)
+                else:
+                    score_after = score
+                if count not in candidates or score_after > candidates[count][0]:
+                    candidates[count] = (score_after, sizes + [portion + extra])
+        best = candidates
+    return best[remaining][1]
+
+
+class CoreAllocator:
+    """Topology-aware partitioning of the CPUs available to this process."""
+
+    def __init__(self, allowed_cpus: Optional[Set[int]] = None):
+        """
+        @param set allowed_cpus: CPUs that may be handed out, defaults to the
+            CPU affinity of the current process
+        """
+        if allowed_cpus is None:
+            allowed_cpus = os.sched_getaffinity(0)
+        self.allowed_cpus = set(allowed_cpus)
+        self.parse_topology()
+
+    def parse_topology(self):
+        """Build self.nodes[node][l3][(socket, core)][cpu] = 1"""
+        self.nodes = NestedDict()
+        for socket, node, core, cpu in cpu_info(False, True):
+            if cpu not in self.allowed_cpus:
+                continue
+            l3 = get_l3_domain_for_cpu(cpu)
+            if l3 is None:
+                l3 = -1
+            self.nodes[node][l3][(socket, core)][cpu] = 1
+
+    def topology(self) -> List[List[List[List[int]]]]:
+        """
+        @return list of NUMA nodes, each a list of L3 domains, each a list
+            of physical cores, each a list of the core's CPUs. Everything is
+            ordered by CPU index.
+        """
+        nodes = []
+        for node in sorted(self.nodes):
+            domains = []
+            for l3 in self.nodes[node].values():
+                cores = [sorted(cpus) for cpus in l3.values()]
+                domains.append(sorted(cores))
+            nodes.append(sorted(domains))
+        return nodes
+
+    def num_cores(self) -> int:
+        return sum(len(domain) for domains in self.topology() for domain in domains)
+
+    def allocate(self, n: int) -> List[List[int]]:
+        """
+        @param int n number of instances
+        @return list of n sorted CPU lists, one per instance
+
+        The physical cores, ordered by node, L3 domain and CPU index, are
+        cut into n contiguous partitions whose core counts differ by at
+        most one. Among the balanced splits, the one with the most cuts at
+        node boundaries is used, then the one with the most cuts at L3
+        domain boundaries. Physical cores are never split.
+        """
+        nodes = self.topology()
+        num_cores = self.num_cores()
+        if n <= 0:
+            raise ValueError(f"Number of instances must be positive, got {n}")
+        if n > num_cores:
+            raise ValueError(
+                f"Cannot allocate {n} instances on {num_cores} physical cores"
+            )
+
+        cores = []
+        # number of cores before every node and L3 domain boundary
+        node_cuts = set()
+        domain_cuts = set()
+        for domains in nodes:
+            for domain in domains:
+                cores.extend(domain)
+                domain_cuts.add(len(cores))
+            node_cuts.add(len(cores))
+
+        def cut_score(position):
+            # a node boundary is worth more than all the L3 boundaries
+            if position in node_cuts:
+                return n
+            return 1 if position in domain_cuts else 0
+
+        partitions = []
+        start = 0
+        for size in balanced_sizes(num_cores, n, cut_score):
+            partitions.append(
+                sorted(cpu for core in cores[start : start + size] for cpu in core)
+            )
+            start += size
+        return partitions
+
+    def nodes_of(self, cpus: List[int]) -> List[int]:
+        """
+        @param list cpus CPU indices
+        @return sorted list of the NUMA nodes these CPUs belong to
+        """
+        cpus = set(cpus)
+        return sorted(
+            node
+            for node, domains in self.nodes.items()
+            if any(
+                cpu in cpus
+                for l3 in domains.values()
+                for core in l3.values()
+                for cpu in core
+            )
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Split the available CPUs among benchmark instances "
+        "following the NUMA and L3 cache topology"
+    )
+    parser.add_argument(
+        "-n",
+        "--num-instances",
+        type=int,
+        required=True,
+        help="number of instances to allocate CPUs for",
+    )
+    parser.add_argument(
+        "-i",
+        "--index",
+        type=int,
+        default=None,
+        help="only print the CPU list of this instance (0-based)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["ranges", "json"],
+        default="ranges",
+        help="ranges: one cpu list per line, as accepted by taskset --cpu-list; "
+        "json: list of CPU lists with their NUMA nodes",
+    )
+    args = parser.parse_args()
+
+    allocator = CoreAllocator()
+    try:
+        partitions = allocator.allocate(args.num_instances)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if args.index is not None:
+        if not 0 <= args.index < len(partitions):
+            print(f"Instance index {args.index} out of range", file=sys.stderr)
+            return 1
+        partitions = [partitions[args.index]]
+
+    if args.format == "json":
+        print(
+            json.dumps(
+                [
+                    {"cpus": cpus_to_ranges(cpus), "nodes": allocator.nodes_of(cpus)}
+                    for cpus in partitions
+                ]
+            )
+        )
+    else:
+        for cpus in partitions:
+            print(cpus_to_ranges(cpus))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -145,6 +145,7 @@ cp "${TEMPLATES_DIR}/urls_template.txt" "${OUT}/django-workload/client/urls_temp
 
 # Install the modified run-siege script
 cp "${TEMPLATES_DIR}/run-siege" "${DJANGO_REPO_ROOT}/client/run-siege" || exit 1
+cp -r "${BENCHPRESS_ROOT}/packages/common/affinitize" "${DJANGO_REPO_ROOT}/client/" || exit 1
 
 # Patch for MLP and icache buster
 # cltorres: Disable MLP patch. MLP implemented in Python does not work as intented due to bytecode abstraction
@@ -30,7 +30,7 @@ cleanup() {
   [ -f cassandra.pid ] && { echo "Stopping cassandra"; kill "$(cat cassandra.pid)" || true; }
   # Kill Siege
   SIEGE_PID="$(pgrep siege)"
-  [ -n "$SIEGE_PID" ] && { echo "Killing siege"; kill -9 "$SIEGE_PID" || true; }
+  [ -n "$SIEGE_PID" ] && { echo "Killing siege"; echo "$SIEGE_PID" | xargs kill -9 || true; }
   echo "Done"
   if [ "$CLEANUP_REQS" -gt 0 ]; then
     exit
@@ -42,7 +42,7 @@ trap 'cleanup' ERR EXIT SIGINT SIGTERM
 
 show_help() {
 cat <<EOF
-Usage: ${0##*/} [-h] [-r role] [-w number of workers] [-i number of iterations] [-d duration of workload] [-p number of repetitions] [-l siege logfile path] [-s urls path] [-c cassandra host ip]
+Usage: ${0##*/} [-h] [-r role] [-w number of workers] [-i number of iterations] [-d duration of workload] [-p number of repetitions] [-l siege logfile path] [-s urls path] [-n number of siege instances] [-c cassandra host ip]
 Proxy shell script to executes django-workload benchmark
     -r          role (clientserver, client, server or db, default is clientserver)
     -h          display this help and exit
@@ -60,6 +60,8 @@ For role "client", "clientserver":
     -d          duration of django-workload benchmark (e.g. 2M)
     -l          path to log siege output to
     -s          source or path to get urls from
+    -n          number of Siege processes to spread the client workers and
+                urls over, each pinned to its own set of cores (default 1)
 For role "client":
     -z          ip address of the django server (required when role is 'client', default is ::1)
 For role "db":
@@ -98,6 +100,7 @@ run_benchmark() {
   fi
 
   WORKERS="$_num_workers" \
+  SIEGE_INSTANCES="${siege_instances}" \
   DURATION="$_duration" \
   LOG="$_siege_logs_path" \
   SOURCE="$_urls_path" \
@@ -246,6 +249,9 @@ main() {
   local urls_path
   urls_path='urls.txt'
 
+  local siege_instances
+  siege_instances="1"
+
   local role
   role='clientserver'
 
@@ -264,7 +270,7 @@ main() {
   local django_ib_max
   django_ib_max="200000"
 
-  while getopts 'w:x:y:i:p:d:l:s:r:c:z:b:m:M:' OPTION "${@}"; do
+  while getopts 'w:x:y:i:p:d:l:s:n:r:c:z:b:m:M:' OPTION "${@}"; do
     case "$OPTION" in
       w)
         # Use readlink to get absolute path if relative is given
@@ -297,6 +303,9 @@ main() {
           urls_path="$(readlink -f "$urls_path")"
         fi
         ;;
+      n)
+        siege_instances="${OPTARG}"
+        ;;
       r)
         role="${OPTARG}"
         ;;
@@ -331,6 +340,7 @@ main() {
   readonly duration
   readonly siege_logs_path
   readonly urls_path
+  readonly siege_instances
   readonly role
   readonly cassandra_addr
   readonly server_addr
@@ -57,6 +57,8 @@ cd "${BENCHPRESS_ROOT}/benchmarks"
 # Copy run.sh template (overwrite)
 cp "${BENCHPRESS_ROOT}/packages/feedsim/run.sh" "${FEEDSIM_ROOT_SRC}/run.sh"
 cp "${BENCHPRESS_ROOT}/packages/feedsim/run-feedsim-multi.sh" "${FEEDSIM_ROOT_SRC}/run-feedsim-multi.sh"
+cp "${BENCHPRESS_ROOT}/packages/feedsim/search_qps.py" "${FEEDSIM_ROOT_SRC}/search_qps.py"
+cp -r "${BENCHPRESS_ROOT}/packages/common/affinitize" "${FEEDSIM_ROOT_SRC}/"
 # Set as executable
 chmod u+x "${FEEDSIM_ROOT_SRC}/run.sh"
 chmod u+x "${FEEDSIM_ROOT_SRC}/run-feedsim-multi.sh"
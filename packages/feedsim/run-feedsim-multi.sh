@@ -59,7 +59,9 @@ done
 PORT=21212
 PIDS=()
 
-function get_cpu_range() {
+# Split the physical cores evenly, assuming the SMT siblings of core N is
+# CPU N + NPROC / 2
+function get_cpu_range_evenly() {
     total_instances="$1"
     inst_id="$2"
     has_smt="$(cat /sys/devices/system/cpu/smt/active)"
@@ -95,6 +97,21 @@ function get_cpu_range() {
     echo "$RES"
 }
 
+# Use the common core allocator to align the instances to NUMA nodes and L3
+# cache domains, falling back to an even split if it is not available
+CORE_ALLOCATOR="${FEEDSIM_ROOT}/affinitize/core_allocator.py"
+function get_cpu_range() {
+    total_instances="$1"
+    inst_id="$2"
+
+    if [ -f "$CORE_ALLOCATOR" ] && \
+        RES="$(python3 "$CORE_ALLOCATOR" -n "$total_instances" -i "$inst_id")"; then
+        echo "$RES"
+    else
+        get_cpu_range_evenly "$total_instances" "$inst_id"
+    fi
+}
+
 echo > $BREPS_LFILE
 # shellcheck disable=SC2086
 for i in $(seq 1 ${NUM_INSTANCES}); do
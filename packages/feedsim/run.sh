@@ -205,9 +205,10 @@ main() {
 
     LEAF_PID=$!
 
-    # FIXME(cltorres)
-    # Remove sleep, expose an endpoint or print a message to notify service is ready
-    sleep 90
+    # search_qps.py polls the monitor port of LeafNodeRank, which starts
+    # answering once all the server threads are up
+    SEARCH_QPS=(python3 "${FEEDSIM_ROOT}/search_qps.py"
+        --wait-for-monitor "$monitor_port" --wait-pid "$LEAF_PID")
 
     # FIXME(cltorres)
     # Skip ParentNode for now, and talk directly to LeafNode
@@ -220,7 +221,7 @@ main() {
     client_monitor_port="$((monitor_port-1000))"
     if [ -z "$fixed_qps" ] && [ "$auto_driver_threads" != "1" ]; then
         benchreps_tell_state "before search_qps"
-        scripts/search_qps.sh -w 15 -f 300 -s 95p:500 -o "${FEEDSIM_ROOT}/${result_filename}" -- \
+        "${SEARCH_QPS[@]}" -w 15 -f 300 -s 95p:500 -o "${FEEDSIM_ROOT}/${result_filename}" -- \
             build/workloads/ranking/DriverNodeRank \
                 --server "0.0.0.0:$port" \
                 --monitor_port "$client_monitor_port" \
@@ -229,7 +230,7 @@ main() {
         benchreps_tell_state "after search_qps"
     elif [ -z "$fixed_qps" ] && [ "$auto_driver_threads" = "1" ]; then
         benchreps_tell_state "before search_qps"
-        scripts/search_qps.sh -a -w 15 -f 300 -s 95p:500 -o "${FEEDSIM_ROOT}/${result_filename}" -- \
+        "${SEARCH_QPS[@]}" -a -w 15 -f 300 -s 95p:500 -o "${FEEDSIM_ROOT}/${result_filename}" -- \
             build/workloads/ranking/DriverNodeRank \
                 --monitor_port "$client_monitor_port" \
                 --server "0.0.0.0:$port"
@@ -246,7 +247,7 @@ main() {
             num_workers=$DRIVER_THREADS
         fi
         benchreps_tell_state "before fixed_qps_exp"
-        scripts/search_qps.sh -s 95p -t "$fixed_qps_duration" \
+        "${SEARCH_QPS[@]}" -s 95p -t "$fixed_qps_duration" \
            -m "$warmup_time" \
            -q "$fixed_qps" \
            -o "${FEEDSIM_ROOT}/${result_filename}" \
@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Find the maximum QPS that satisfies a latency target.
+
+Drop-in replacement for third_party/src/scripts/search_qps.sh: it accepts the
+same options and prints the same lines, in particular
+
+    final requested_qps = X, measured_qps = Y, latency = Z
+
+which FeedSimParser and run-feedsim-multi.sh read. The search differs in how
+it picks and measures probes:
+
+  * it polls the monitor port of the server under test instead of sleeping
+    a fixed amount of time before the first probe;
+  * it brackets the target between a passing and a failing QPS and then
+    narrows the bracket by interpolating the measured latency curve, falling
+    back to bisection when the interpolation would not shrink it enough;
+  * each probe polls the driver's /child_stats endpoint and stops as soon
+    as the 95% confidence interval of the windowed latency is tight, instead
+    of always running for the full experiment time.
+
+The final measurement always runs for the full final experiment time.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+BREPS_LFILE = "/tmp/feedsim_log.txt"
+
+# latency type -> key in the stats served by the driver's monitor port
+LATENCY_TYPES = {
+    "avg": "latency_mean",
+    "50p": "latency_50p",
+    "90p": "latency_90p",
+    "95p": "latency_95p",
+    "99p": "latency_99p",
+    "99.9p": None,
+}
+
+# Length in seconds of the stats window sampled while a probe runs
+SAMPLE_WINDOW = 5
+
+# Two-sided 95% quantiles of Student's t distribution by degrees of freedom
+T_95 = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    15: 2.131,
+    20: 2.086,
+    30: 2.042,
+}
+
+CSV_HEADER = (
+    "duration_secs,total_queries,requested_qps,achieved_qps,total_bytes_rx,"
+    "total_bytes_tx,rx_MBps,tx_MBps,min_ms,avg_ms,50p_ms,90p_ms,95p_ms,99p_ms,"
+    "99.9p_ms"
+)
+
+
+def benchreps_tell_state(state):
+    with open(BREPS_LFILE, "a") as f:
+        f.write(time.strftime("%Y-%m-%d_%H:%M:%S ") + state + "\n")
+
+
+def t_quantile(df):
+    for n in sorted(T_95, reverse=True):
+        if df >= n:
+            return T_95[n]
+    return T_95[1]
+
+
+def confidence_interval(samples):
+    """Return the mean of `samples` and the half-width of its 95%
+    confidence interval.
+    """
+    mean = statistics.mean(samples)
+    if len(samples) < 2:
+        return mean, math.inf
+    sem = statistics.stdev(samples) / math.sqrt(len(samples))
+    return mean, t_quantile(len(samples) - 1) * sem
+
+
+def as_dict(value):
+    """cereal serializes maps as lists of {"key": k, "value": v}; turn them
+    into dicts.
+    """
+    if isinstance(value, list):
+        return {item["key"]: item["value"] for item in value}
+    return value
+
+
+def http_get(port, path, timeout=2):
+    url = f"http://127.0.0.1:{port}{path}"
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return resp.read().decode("utf-8", errors="replace")
+
+
+def is_monitor_ready(port):
+    try:
+        http_get(port, "/topology")
+        return True
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def wait_for_monitor(port, timeout, pid=None, interval=1):
+    """Poll the /topology endpoint of an oldisim monitor port until it
+    answers, which happens once all the server threads have started.
+    Returns False on timeout or if process `pid` exits.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_monitor_ready(port):
+            return True
+        if pid is not None:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return False
+        time.sleep(interval)
+    return False
+
+
+def read_window_stats(port, window, stat):
+    """Return (qps, latency) of the last `window` seconds from the
+    /child_stats endpoint of a driver's monitor port, or None if the window
+    is not available yet.
+    """
+    try:
+        stats = as_dict(json.loads(http_get(port, "/child_stats"))["stats"])
+    except (urllib.error.URLError, OSError, ValueError, KeyError, TypeError):
+        return None
+    window_stats = as_dict(stats.get(window, stats.get(str(window))))
+    if not window_stats:
+        return None
+    qps = 0.0
+    latency = 0.0
+    for type_stats in window_stats.values():
+        type_stats = as_dict(type_stats)
+        qps += type_stats.get("qps", 0.0)
+        latency = max(latency, type_stats.get(stat, 0.0))
+    return qps, latency
+
+
+def find_value(text, pattern, default=0.0):
+    m = re.search(pattern, text, re.MULTILINE)
+    return float(m.group(1)) if m else default
+
+
+def get_option_value(command, option):
+    for i, arg in enumerate(command):
+        if arg == option and i + 1 < len(command):
+            return command[i + 1]
+        if arg.startswith(option + "="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+class ProbeResult:
+    def __init__(self, requested_qps, duration, output, latency_type):
+        self.requested_qps = requested_qps
+        self.duration = duration
+        self.output = output
+        lat_re = re.escape(latency_type)
+        self.qps = find_value(output, r"#:\s+([0-9.]+)\s+QPS", None)
+        self.latency = find_value(output, rf"^\s*{lat_re}:\s+([0-9.]+)\s+ms", None)
+
+    def csv_row(self):
+        out = self.output
+
+        def ms(name):
+            return find_value(out, rf"^\s*{re.escape(name)}:\s+([0-9.]+)\s+ms")
+
+        return "%d,%d,%.2f,%.2f,%d,%d,%.2f,%.2f,%.3f,%.3f,%.3f,%.3f,%.3f,%.3f,%.3f" % (
+            self.duration,
+            find_value(out, r"QPS\s+\((\d+)"),
+            self.requested_qps or 0.0,
+            self.qps,
+            find_value(out, r"RX:.*\((\d+)"),
+            find_value(out, r"TX:.*\((\d+)"),
+            find_value(out, r"RX:\s+([0-9.]+)"),
+            find_value(out, r"TX:\s+([0-9.]+)"),
+            ms("min"),
+            ms("avg"),
+            ms("50p"),
+            ms("90p"),
+            ms("95p"),
+            ms("99p"),
+            ms("99.9p"),
+        )
+
+
+class QPSSearch:
+    def __init__(self, args, command):
+        self.args = args
+        self.command = command
+        self.latency_type = args.latency_type
+        self.latency_target = args.latency_target
+        self.monitor_port = get_option_value(command, "--monitor_port")
+        self.n_iters = 0
+
+    def driver_threads_args(self, qps):
+        if not self.args.auto_driver_threads:
+            return []
+        num_connections = 4
+        max_threads = max(int(os.cpu_count() / 5.0 + 0.5), 4)
+        if qps is None:
+            num_threads = max_threads
+        else:
+            num_threads = min(max(int(qps / num_connections), 1), max_threads)
+        return [f"--threads={num_threads}", f"--connections={num_connections}"]
+
+    def start_driver(self, qps, out):
+        cmd = self.command + self.driver_threads_args(qps)
+        if qps is not None:
+            cmd.append(f"--qps={qps:.5f}")
+        for r in range(1, self.args.retries + 1):
+            out.seek(0)
+            out.truncate()
+            proc = subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT)
+            if self.monitor_port:
+                wait_for_monitor(self.monitor_port, 7, proc.pid, interval=0.5)
+            else:
+                time.sleep(7)
+            if proc.poll() is None:
+                return proc
+            print(f"Retrying {r} of {self.args.retries} to start load test...")
+        return proc
+
+    def run_loadtest(self, duration, qps=None, early_stop=True):
+        """Run the load driver for at most `duration` seconds, stopping early
+        once the confidence interval of the windowed latency is within
+        `--ci-tolerance` of its mean.
+        """
+        stat = LATENCY_TYPES[self.latency_type]
+        early_stop = (
+            early_stop
+            and self.args.ci_tolerance > 0
+            and self.monitor_port is not None
+            and stat is not None
+        )
+        with tempfile.TemporaryFile(mode="w+") as out:
+            proc = self.start_driver(qps, out)
+            start = time.monotonic()
+            samples = []
+            while proc.poll() is None:
+                elapsed = time.monotonic() - start
+                if elapsed >= duration:
+                    break
+                time.sleep(min(SAMPLE_WINDOW, duration - elapsed))
+                if not early_stop:
+                    continue
+                window = read_window_stats(self.monitor_port, SAMPLE_WINDOW, stat)
+                if window is None or window[0] <= 0:
+                    continue
+                samples.append(window[1])
+                elapsed = time.monotonic() - start
+                if elapsed < self.args.min_probe_time:
+                    continue
+                mean, half_width = confidence_interval(samples)
+                if half_width <= self.args.ci_tolerance * mean:
+                    print(
+                        "probe converged after %ds: %s latency = %.2f +/- %.2f"
+                        % (elapsed, self.latency_type, mean, half_width)
+                    )
+                    break
+            elapsed = time.monotonic() - start
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGINT)
+            # wait for results to show up and queries to drain
+            drain_until = time.monotonic() + self.args.wait_time
+            try:
+                proc.wait(timeout=self.args.wait_time)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            time.sleep(max(0, drain_until - time.monotonic()))
+            out.seek(0)
+            result = ProbeResult(qps, elapsed, out.read(), self.latency_type)
+
+        if result.qps is None:
+            sys.stderr.write("Could not find QPS in loadtest output\n")
+            sys.stderr.write("Contents of loadtest output:\n" + result.output)
+            sys.exit(1)
+        if result.latency is None:
+            sys.stderr.write("Could not find latency in loadtest output\n")
+            sys.stderr.write("Contents of loadtest output:\n" + result.output)
+            sys.exit(1)
+        if self.args.output:
+            with open(self.args.output, "a") as f:
+                f.write(result.csv_row() + "\n")
+        return result
+
+    def probe(self, qps):
+        result = self.run_loadtest(self.args.experiment_time, qps)
+        print(
+            "requested_qps = %.2f, measured_qps = %.2f, latency = %.2f"
+            % (qps, result.qps, result.latency)
+        )
+        self.n_iters += 1
+        return result
+
+    def is_good(self, result):
+        return result.latency <= self.latency_target
+
+    def next_probe(self, lo, hi):
+        """Pick the QPS where the latency curve, interpolated linearly between
+        the bracket ends, crosses the target. Keep it in the middle half of
+        the bracket so that every probe shrinks the bracket to at most 3/4.
+        """
+        (lo_qps, lo_lat), (hi_qps, hi_lat) = lo, hi
+        width = hi_qps - lo_qps
+        if hi_lat is None or lo_lat is None or hi_lat <= lo_lat:
+            return lo_qps + width / 2
+        qps = lo_qps + (self.latency_target - lo_lat) * width / (hi_lat - lo_lat)
+        return min(max(qps, lo_qps + width / 4), hi_qps - width / 4)
+
+    def search(self, peak):
+        max_iters = self.args.max_iters
+        peak_qps = peak.qps
+        # lo: highest QPS known to meet the target, hi: lowest QPS known
+        # to miss it, as (qps, latency). The unconstrained peak run is
+        # usually the first point above the target.
+        lo = None
+        hi = None
+        cur_qps = peak_qps
+        if not self.is_good(peak):
+            hi = (peak_qps, peak.latency)
+            cur_qps = peak_qps * 0.5
+
+        benchreps_tell_state("before bracket_qps")
+        while self.n_iters < max_iters:
+            result = self.probe(cur_qps)
+            if self.is_good(result):
+                lo = (max(cur_qps, result.qps), result.latency)
+                if result.qps * 1.02 < cur_qps:
+                    # the system cannot deliver more than this
+                    hi = (cur_qps, None)
+                    break
+                if hi is not None:
+                    break
+                cur_qps *= 1.25
+            else:
+                hi = (cur_qps, result.latency)
+                if lo is not None:
+                    break
+                cur_qps *= 0.5
+                if cur_qps < peak_qps * 0.1:
+                    break
+        benchreps_tell_state("after bracket_qps")
+
+        if lo is None:
+            return cur_qps, False
+        if hi is None:
+            return lo[0], False
+
+        benchreps_tell_state("before refine_qps")
+        while hi[0] > lo[0] * 1.02 and self.n_iters < max_iters:
+            cur_qps = self.next_probe(lo, hi)
+            result = self.probe(cur_qps)
+            if self.is_good(result):
+                lo = (max(cur_qps, result.qps), result.latency)
+                if result.qps * 1.02 < cur_qps:
+                    hi = (cur_qps, hi[1])
+            else:
+                hi = (cur_qps, result.latency)
+        benchreps_tell_state("after refine_qps")
+        return lo[0], hi[0] <= lo[0] * 1.02
+
+    def wait_for_other_instances(self):
+        num_instances = int(os.environ.get("IS_AUTOSCALE_RUN") or 0)
+        if num_instances <= 1:
+            return
+
+        def num_ready():
+            with open(BREPS_LFILE) as f:
+                return sum(1 for line in f if "after gap_qps" in line)
+
+        if num_ready() < num_instances:
+            result_filename = os.path.basename(self.args.output or "")
+            m = re.match(r"feedsim_results_(\d+)\.txt", result_filename)
+            inst = m.group(1) if m else result_filename
+            benchreps_tell_state(
+                f'[Instance {inst}] Waiting for other instances to finish "gap_qps" stage.'
+            )
+            while num_ready() < num_instances:
+                time.sleep(1)
+
+    def run_fixed_qps(self):
+        fixed_qps = [float(q) for q in self.args.fixed_qps.split(",")]
+        if len(fixed_qps) == 1:
+            benchreps_tell_state("before fixed_qps_single")
+            start_perf_record()
+            result = self.run_loadtest(
+                self.args.experiment_time, fixed_qps[0], early_stop=False
+            )
+            print(
+                "final requested_qps = %.2f, measured_qps = %.2f, latency = %.2f"
+                % (fixed_qps[0], result.qps, result.latency)
+            )
+            benchreps_tell_state("after fixed_qps_single")
+            return
+        for qps in fixed_qps:
+            benchreps_tell_state(f"before fixed_qps_iter {qps:g}")
+            result = self.run_loadtest(self.args.experiment_time, qps, early_stop=False)
+            print(
+                "final requested_qps = %.2f, measured_qps = %.2f, latency = %.2f"
+                % (qps, result.qps, result.latency)
+            )
+            benchreps_tell_state(f"after fixed_qps_iter {qps:g}")
+            time.sleep(7)  # wait between iterations
+
+    def run(self):
+        if self.args.fixed_qps:
+            print(
+                f"Running an experiment with QPS fixed at {self.args.fixed_qps} "
+                f"and returns {self.latency_type} latency"
+            )
+        else:
+            print(
+                f"Searching for QPS where {self.latency_type} latency <= "
+                f"{self.args.latency_target_str} msec"
+            )
+
+        warmup_time = self.args.warmup_time
+        if warmup_time is None:
+            warmup_time = self.args.experiment_time
+        if warmup_time > 0:
+            benchreps_tell_state("before warmup")
+            result = self.run_loadtest(warmup_time, early_stop=False)
+            print("warmup qps = %.2f, latency = %.2f" % (result.qps, result.latency))
+            benchreps_tell_state("after warmup")
+
+        if self.args.fixed_qps:
+            self.run_fixed_qps()
+            return
+
+        benchreps_tell_state("before peak_qps")
+        result = self.run_loadtest(self.args.experiment_time)
+        peak_qps = result.qps
+        print("peak qps = %.2f, latency = %.2f" % (peak_qps, result.latency))
+        benchreps_tell_state("after peak_qps")
+
+        cur_qps, converged = self.search(result)
+        # run-feedsim-multi.sh instances synchronize on this state
+        benchreps_tell_state("after gap_qps")
+        self.wait_for_other_instances()
+
+        benchreps_tell_state("before final_qps")
+        start_perf_record()
+        result = self.run_loadtest(
+            self.args.final_experiment_time, cur_qps, early_stop=False
+        )
+        print(
+            "final requested_qps = %.2f, measured_qps = %.2f, latency = %.2f"
+            % (cur_qps, result.qps, result.latency)
+        )
+        if not converged:
+            print(
+                "error: search iterated %d times but latency still could not "
+                "converge to target." % self.n_iters
+            )
+        benchreps_tell_state("after final_qps")
+
+
+def collect_perf_record():
+    time.sleep(30)
+    if os.path.exists("perf.data"):
+        benchreps_tell_state("collect_perf_record: already exist")
+        return
+    benchreps_tell_state("collect_perf_record: collect perf")
+    with open("/tmp/perf-record.log", "a") as log:
+        subprocess.run(
+            ["perf", "record", "-a", "-g", "--", "sleep", "5"],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def start_perf_record():
+    if os.environ.get("DCPERF_PERF_RECORD") == "1" and not os.path.exists("perf.data"):
+        threading.Thread(target=collect_perf_record, daemon=True).start()
+
+
+def parse_latency_target(value):
+    metric, _, target = value.partition(":")
+    if metric not in LATENCY_TYPES:
+        raise argparse.ArgumentTypeError(
+            "metric must be " + "|".join(LATENCY_TYPES.keys())
+        )
+    if target and not re.match(r"^[0-9]+([.][0-9]+)?$", target):
+        raise argparse.ArgumentTypeError(f"latency_target ({target}) is not a float")
+    return metric, target
+
+
+def init_parser():
+    parser = argparse.ArgumentParser(
+        description="Finds the maximum QPS that satisfies a latency target. "
+        "Algorithm to find QPS for latency target adapted from Jacob Leverich's "
+        "mutilate (EuroSys '14) [https://github.com/leverich/mutilate]",
+        usage="%(prog)s [options] -- driver command",
+    )
+    parser.add_argument(
+        "-t",
+        dest="experiment_time",
+        type=int,
+        default=120,
+        help="maximum amount of time to run each experiment in seconds",
+    )
+    parser.add_argument(
+        "-f",
+        dest="final_experiment_time",
+        type=int,
+        default=90,
+        help="amount of time to run final experiments in seconds",
+    )
+    parser.add_argument(
+        "-w",
+        dest="wait_time",
+        type=int,
+        default=5,
+        help="amount of time to wait before starting next experiment",
+    )
+    parser.add_argument(
+        "-m",
+        dest="warmup_time",
+        type=int,
+        default=None,
+        help="amount of time to warmup in seconds. Default: same as -t",
+    )
+    parser.add_argument(
+        "-s",
+        dest="latency_target",
+        type=parse_latency_target,
+        required=True,
+        help="metric:target (in msec). Example: 99p:5.01. Allowable metrics "
+        "are avg, 50p, 90p, 95p, 99p, 99.9p",
+    )
+    parser.add_argument(
+        "-q",
+        dest="fixed_qps",
+        default=None,
+        help="comma-separated QPS values to run fixed-QPS experiments with "
+        "instead of searching",
+    )
+    parser.add_argument(
+        "-a",
+        dest="auto_driver_threads",
+        action="store_true",
+        help="adjust the number of driver threads to the requested QPS",
+    )
+    parser.add_argument(
+        "-o", dest="output", default=None, help="file to record samples as csv"
+    )
+    parser.add_argument(
+        "--max-iters",
+        type=int,
+        default=25,
+        help="maximum number of search probes",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="number of attempts to start the load driver",
+    )
+    parser.add_argument(
+        "--min-probe-time",
+        type=int,
+        default=30,
+        help="minimum duration of a search probe in seconds",
+    )
+    parser.add_argument(
+        "--ci-tolerance",
+        type=float,
+        default=0.05,
+        help="stop a search probe once the 95%% confidence interval of the "
+        "latency is within this fraction of its mean; 0 disables early stop",
+    )
+    parser.add_argument(
+        "--wait-for-monitor",
+        type=int,
+        default=None,
+        help="monitor port of the server under test; wait for it to answer "
+        "before starting",
+    )
+    parser.add_argument(
+        "--wait-pid",
+        type=int,
+        default=None,
+        help="pid of the server under test; stop waiting if it exits",
+    )
+    parser.add_argument(
+        "--wait-timeout",
+        type=int,
+        default=600,
+        help="maximum time to wait for the server in seconds",
+    )
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    return parser
+
+
+def main():
+    sys.stdout.reconfigure(line_buffering=True)
+    script_name = os.path.basename(sys.argv[0])
+    print(
+        f"{script_name}: DCPERF_PERF_RECORD={os.environ.get('DCPERF_PERF_RECORD', '')}"
+    )
+
+    parser = init_parser()
+    args = parser.parse_args()
+    command = args.command
+    if command and command[0] == "--":
+        command = command[1:]
+    if not command:
+        parser.error("the loadtest command is required")
+    args.latency_type, args.latency_target_str = args.latency_target
+    if not args.fixed_qps and not args.latency_target_str:
+        parser.error("-s metric:target must be specified")
+    args.latency_target = float(args.latency_target_str or "inf")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(CSV_HEADER + "\n")
+
+    if args.wait_for_monitor is not None:
+        benchreps_tell_state("before wait_for_server")
+        if not wait_for_monitor(
+            args.wait_for_monitor, args.wait_timeout, args.wait_pid
+        ):
+            sys.stderr.write(
+                f"Server under test did not become ready on monitor port "
+                f"{args.wait_for_monitor}\n"
+            )
+            sys.exit(1)
+        benchreps_tell_state("after wait_for_server")
+
+    QPSSearch(args, command).run()
+
+
+if __name__ == "__main__":
+    main()
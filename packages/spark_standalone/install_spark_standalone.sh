@@ -27,6 +27,9 @@ fi
 if [ ! -d "${OUT}/settings" ]; then
   cp -r "${TEMPLATES_DIR}/proj_root/settings" "${OUT}/"
 fi
+if [ ! -d "${OUT}/affinitize" ]; then
+  cp -r "${SPARK_PKG_ROOT}/../common/affinitize" "${OUT}/"
+fi
 
 # download spark
 pushd "${OUT}" || exit 1
@@ -6,14 +6,20 @@
 
 import argparse
 import datetime
+import hashlib
 import json
 import os
+import queue
 import re
 import shutil
 import socket
+import subprocess
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from os.path import join as joinpath
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from config_spark import (
     get_hardware_info,
@@ -36,32 +42,174 @@ DATA_PATH = joinpath(PROJ_ROOT, "dataset")
 CONF_PATH = joinpath(PROJ_ROOT, "settings")
 WORK_PATH = joinpath(PROJ_ROOT, "work")
 WAREHOUSE_PATH = joinpath(PROJ_ROOT, "warehouse")
+AFFINITIZE_PATH = joinpath(PROJ_ROOT, "affinitize")
 
 
-def run_spark_sql(
-    sql_file: str,
-    database: str,
-    node0_only: bool = False,
-    for_real: bool = False,
-) -> None:
-    cmd = ["bin/spark-sql"]
+SESSION_MARKER = "dcperf-session-marker"
+CREATE_CHECKPOINT = "_create_checkpoint.json"
+
+
+def get_spark_submit_args() -> List[str]:
+    cmd = []
     for k, v in SPARK_CLI_ARGS.items():
         cmd.extend([k, v])
     for k, v in SPARK_CONFIGS.items():
         cmd.append("--conf")
         value = " ".join(v) if type(v) is list else v
         cmd.append(f"{k}={value}")
-    cmd.extend(["-f", sql_file])
+    return cmd
+
+
+def get_spark_sql_cmd(
+    database: str,
+    node0_only: bool = False,
+    sql_file: Optional[str] = None,
+) -> List[str]:
+    cmd = ["bin/spark-sql"] + get_spark_submit_args()
+    if sql_file:
+        cmd.extend(["-f", sql_file])
     if database:
         cmd.extend(["--database", database])
-    log_file = sql_file.replace(".sql", ".log")
-    env = {}
     if node0_only:
         cmd = ["numactl", "--cpunodebind=0", "--membind=0"] + cmd
+    return cmd
+
+
+def run_spark_sql(
+    sql_file: str,
+    database: str,
+    node0_only: bool = False,
+    for_real: bool = False,
+) -> None:
+    cmd = get_spark_sql_cmd(database, node0_only, sql_file)
+    log_file = sql_file.replace(".sql", ".log")
+    env = {}
     run_cmd(cmd, SPARK_HOME, log_file, env, for_real)
     return None
 
 
+class SparkSQLSession:
+    """A long-lived spark-sql driver running the test queries one after
+    another, so that JVM startup and session setup are paid only once.
+
+    Each query is submitted as `source <sql_file>;` followed by a statement
+    selecting a marker string; the query is done when the marker shows up in
+    the output. The driver output is split into one log per query, named
+    like the logs of run_spark_sql().
+    """
+
+    def __init__(
+        self,
+        database: str,
+        node0_only: bool = False,
+        for_real: bool = False,
+    ):
+        self.database = database
+        self.node0_only = node0_only
+        self.for_real = for_real
+        self.proc = None
+        self.reader = None
+        self.log_fp = None
+        self.log_lock = threading.Lock()
+        self.markers = queue.Queue()
+        self.num_markers = 0
+        self.first_stage = None
+        self.startup_time = 0.0
+
+    def start(self, log_file: str) -> None:
+        cmd = get_spark_sql_cmd(self.database, self.node0_only)
+        print(" ".join(cmd))
+        if not self.for_real:
+            return
+        launch_time = time.time()
+        self.log_fp = open(log_file, "wt")
+        self.proc = subprocess.Popen(
+            cmd,
+            cwd=SPARK_HOME,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        self.reader = threading.Thread(target=self._read_output, daemon=True)
+        self.reader.start()
+        # the session is ready once it has answered its first statement
+        self._submit(None)
+        self.startup_time = time.time() - launch_time
+
+    def _read_output(self) -> None:
+        marker_pattern = re.compile(rf"{SESSION_MARKER}-(\d+)\s*$")
+        for line in self.proc.stdout:
+            # drop the prompts so that driver log lines start with their
+            # timestamp, as parse_per_stage_runtime() expects
+            line = re.sub(r"^(spark-sql> )+", "", line)
+            with self.log_lock:
+                self.log_fp.write(line)
+                if self.first_stage is None:
+                    is_stage = re.search(r"stage (\d+)\.\d", line)
+                    if is_stage:
+                        self.first_stage = int(is_stage.group(1))
+            is_marker = marker_pattern.search(line)
+            if is_marker:
+                self.markers.put(int(is_marker.group(1)))
+        self.markers.put(None)
+
+    def _submit(self, statement: Optional[str]) -> None:
+        self.num_markers += 1
+        text = f"{statement}\n" if statement else ""
+        text += f"SELECT '{SESSION_MARKER}-{self.num_markers}';\n"
+        self.proc.stdin.write(text)
+        self.proc.stdin.flush()
+        while True:
+            marker = self.markers.get()
+            if marker is None:
+                raise RuntimeError(
+                    f"spark-sql session exited with code {self.proc.wait()}"
+                )
+            if marker == self.num_markers:
+                return
+
+    def run_query(self, sql_file: str) -> Tuple[float, int]:
+        """Run the statements of sql_file in the session.
+
+        Returns the elapsed time and the id of the first Spark stage of the
+        query, since stage ids keep growing across the queries of a session.
+        """
+        start_time = time.time()
+        statement = f"source {sql_file};"
+        print(statement)
+        if not self.for_real:
+            return (time.time() - start_time, 0)
+        with self.log_lock:
+            self.log_fp.close()
+            self.log_fp = open(sql_file.replace(".sql", ".log"), "wt")
+            self.first_stage = None
+        self._submit(statement)
+        elapsed_time = time.time() - start_time
+        with self.log_lock:
+            self.log_fp.flush()
+            first_stage = self.first_stage if self.first_stage is not None else 0
+        return (elapsed_time, first_stage)
+
+    def stop(self) -> None:
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.write("quit;\n")
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.reader.join()
+        self.log_fp.close()
+        self.proc = None
+
+
 def write_sql_create_db(args) -> List[str]:
     # print("writing create_db.sql")
     sql_files = []
@@ -72,8 +220,7 @@ def write_sql_create_db(args) -> List[str]:
     return sql_files
 
 
-def write_sql_create_tables(args) -> List[str]:
-    # print("writing create_tables.sql")
+def read_table_list(args) -> List[Tuple[Dict, str]]:
     table_list = []
     dataset_path = joinpath(DATA_PATH, args.database)
     with open(joinpath(dataset_path, "release_info_suite.json"), "rt") as fp:
@@ -87,6 +234,12 @@ def write_sql_create_tables(args) -> List[str]:
                 all_lines = fp.readlines()
                 for line in all_lines:
                     table_list.append((json.loads(line), query_dir))
+    return table_list
+
+
+def write_sql_create_tables(args) -> List[str]:
+    # print("writing create_tables.sql")
+    table_list = read_table_list(args)
     sql_files = []
     filename = joinpath(WORK_PATH, "create_tables.sql")
     with open(filename, "wt") as fp:
@@ -111,6 +264,185 @@ def write_sql_create_tables(args) -> List[str]:
     return sql_files
 
 
+def get_source_fingerprint(path: str) -> Tuple[str, int]:
+    """Hash the names, sizes and modification times of the files under path.
+
+    Returns the hash and the total size of the files.
+    """
+    files = []
+    if os.path.isfile(path):
+        files.append(path)
+    for root, _, filenames in os.walk(path):
+        files.extend(joinpath(root, filename) for filename in filenames)
+    digest = hashlib.sha1()
+    total_size = 0
+    for filename in sorted(files):
+        stat = os.stat(filename)
+        total_size += stat.st_size
+        relpath = os.path.relpath(filename, path)
+        digest.update(f"{relpath}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return (digest.hexdigest(), total_size)
+
+
+def plan_create_tables(args) -> List[Dict]:
+    """Plan the conversion of the dataset tables into Parquet.
+
+    The tables only depend on the database, so they can all be created
+    concurrently once it exists. A table defined by several tests is created
+    once, from the last test defining it, which is the table
+    create_tables.sql leaves behind. The largest tables come first so that
+    they do not end up running alone at the end.
+    """
+    tables = {}
+    for table_info, query_dir in read_table_list(args):
+        table_name = table_info["name"]
+        table_src = joinpath(query_dir, table_name)
+        partition_keys = ", ".join(table_info["partition_key"])
+        (fingerprint, size) = get_source_fingerprint(table_src)
+        tables.pop(table_name, None)
+        tables[table_name] = {
+            "name": table_name,
+            "source": table_src,
+            "partition_keys": partition_keys,
+            "fingerprint": f"{fingerprint}:{partition_keys}",
+            "size": size,
+        }
+    return sorted(tables.values(), key=lambda table: table["size"], reverse=True)
+
+
+def write_sql_create_table(args, table: Dict) -> str:
+    table_name = table["name"]
+    tmp_view = f"tmp_text_{table_name}"
+    filename = joinpath(WORK_PATH, f"create_table_{table_name}.sql")
+    with open(filename, "wt") as fp:
+        fp.write(f"""USE {args.database};""")
+        fp.write(f"""\n\nCREATE OR REPLACE TEMPORARY VIEW {tmp_view}""")
+        fp.write("""\nUSING JSON""")
+        fp.write(f"""\nOPTIONS (path='{table["source"]}')""")
+        fp.write("""\n;""")
+        fp.write(f"""\nDROP TABLE IF EXISTS {table_name};""")
+        fp.write(f"""\nCREATE TABLE {table_name}""")
+        fp.write("""\nUSING PARQUET""")
+        fp.write("""\nOPTIONS (compression='snappy')""")
+        fp.write(f"""\nPARTITIONED BY ({table["partition_keys"]})""")
+        fp.write(f"""\nAS (SELECT * FROM {tmp_view});""")
+        fp.write(f"""\nDROP VIEW IF EXISTS {tmp_view};\n""")
+    return filename
+
+
+def read_create_checkpoint(checkpoint_file: str) -> Dict[str, str]:
+    try:
+        with open(checkpoint_file, "rt") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_create_checkpoint(checkpoint_file: str, checkpoint: Dict[str, str]) -> None:
+    tmp_file = checkpoint_file + ".tmp"
+    with open(tmp_file, "wt") as fp:
+        json.dump(checkpoint, fp, indent=2)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def start_thrift_server(port: int, for_real: bool) -> None:
+    cmd = ["sbin/start-thriftserver.sh"] + get_spark_submit_args()
+    cmd.extend(["--conf", "spark.scheduler.mode=FAIR"])
+    cmd.extend(["--hiveconf", f"hive.server2.thrift.port={port}"])
+    cmd.extend(["--hiveconf", "hive.server2.thrift.bind.host=localhost"])
+    log_file = joinpath(WORK_PATH, "start_thriftserver.log")
+    run_cmd(cmd, SPARK_HOME, log_file, {}, for_real)
+
+
+def stop_thrift_server(for_real: bool) -> None:
+    cmd = ["sbin/stop-thriftserver.sh"]
+    log_file = joinpath(WORK_PATH, "stop_thriftserver.log")
+    run_cmd(cmd, SPARK_HOME, log_file, {}, for_real)
+
+
+def wait_for_thrift_server(port: int, timeout: int = 600) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=5):
+                return True
+        except OSError:
+            time.sleep(2)
+    return False
+
+
+def create_tables_parallel(args) -> None:
+    """Create the tables through a Spark Thrift server, running up to
+    args.parallel CTAS statements concurrently in the same Spark application.
+
+    Every created table is recorded with the fingerprint of its source files
+    in a checkpoint next to the database, so that a new run skips the tables
+    that are already there and whose sources have not changed.
+    """
+    tables = plan_create_tables(args)
+    db_path = joinpath(os.path.abspath(args.database_location), f"{args.database}.db")
+    checkpoint_file = joinpath(db_path, CREATE_CHECKPOINT)
+    checkpoint = read_create_checkpoint(checkpoint_file)
+    pending = []
+    for table in tables:
+        table_path = joinpath(db_path, table["name"].lower())
+        if checkpoint.get(table["name"]) == table["fingerprint"] and os.path.isdir(
+            table_path
+        ):
+            print(f"Table {table['name']} is up to date, skipping")
+        else:
+            pending.append(table)
+    print(f"{len(pending)} of {len(tables)} tables to create")
+    if not pending:
+        return
+
+    port = get_free_port()
+    lock = threading.Lock()
+    failed = []
+
+    def create_table(table: Dict) -> None:
+        sql_file = write_sql_create_table(args, table)
+        cmd = [
+            "bin/beeline",
+            "-u",
+            f"jdbc:hive2://localhost:{port}/{args.database}",
+            "-f",
+            sql_file,
+        ]
+        print(" ".join(cmd))
+        if not args.real:
+            return
+        with open(sql_file.replace(".sql", ".log"), "wt") as fp:
+            proc = subprocess.run(cmd, cwd=SPARK_HOME, stdout=fp, stderr=fp)
+        with lock:
+            if proc.returncode != 0:
+                print(f"Failed to create table {table['name']}")
+                failed.append(table["name"])
+                return
+            checkpoint[table["name"]] = table["fingerprint"]
+            write_create_checkpoint(checkpoint_file, checkpoint)
+            print(f"Created table {table['name']}")
+
+    start_thrift_server(port, args.real)
+    try:
+        if args.real and not wait_for_thrift_server(port):
+            print(f"Thrift server did not come up on port {port}")
+            exit(1)
+        with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+            list(executor.map(create_table, pending))
+    finally:
+        stop_thrift_server(args.real)
+    if failed:
+        print(f"Failed to create {len(failed)} tables: {', '.join(failed)}")
+        exit(1)
+
+
 def list_tests(args) -> None:
     dataset_path = joinpath(DATA_PATH, args.database)
     with open(joinpath(dataset_path, "release_info_suite.json"), "rt") as fp:
@@ -143,14 +475,22 @@ def create(args) -> None:
     sql_files = write_sql_create_db(args)
     for sql_file in sql_files:
         run_spark_sql(sql_file, database=None, for_real=args.real)
+    if args.parallel > 0:
+        create_tables_parallel(args)
+        return
     sql_files = write_sql_create_tables(args)
     for sql_file in sql_files:
         run_spark_sql(sql_file, database=None, for_real=args.real)
 
 
 def parse_per_stage_runtime(
-    logfile: str, worker_cores: int
+    logfile: str, worker_cores: int, stage_base: int = 0
 ) -> Dict[str, List[datetime.datetime]]:
+    """Read the first and last timestamp of each stage from a query log.
+
+    Stage ids are numbered per Spark context, so stage_base is subtracted
+    from them when the query did not run in a fresh spark-sql driver.
+    """
     loglines = []
     with open(logfile, "r") as f:
         loglines = f.readlines()
@@ -165,9 +505,12 @@ def parse_per_stage_runtime(
             timestamp = datetime.datetime.strptime(timestr, "%y/%m/%d %H:%M:%S")
         except ValueError:
             continue
-        is_stage = re.search(r"stage (\d\.\d)", parts[2])
+        is_stage = re.search(r"stage (\d+)\.(\d)", parts[2])
         if is_stage:
-            stage = is_stage.group(1)
+            stage_id = int(is_stage.group(1)) - stage_base
+            if stage_id < 0 or stage_id > 9:
+                continue
+            stage = f"{stage_id}.{is_stage.group(2)}"
             if stage in timelines:
                 timelines[stage][1] = timestamp
             else:
@@ -207,25 +550,44 @@ def run(args) -> None:
             fp.write(f"worker-cores : {sum(worker_cores)}\n")
             fp.write(f"worker-memory: {sum(worker_mem)}\n")
         start_time = time.time()
+        session = None
+        if args.session:
+            session = SparkSQLSession(
+                args.database,
+                node0_only=(args.numa == "node0_only"),
+                for_real=args.real,
+            )
+            session.start(joinpath(WORK_PATH, "spark_sql_session.log"))
+            print(f"Session startup time: {session.startup_time:.1f} (s)")
+            if args.real:
+                fp.write(f"session-startup : {session.startup_time:.1f}\n")
+        query_times = {}
         for _ in range(args.num_iters):
             for sql_file in sql_files:
                 cmd = ["echo 1 > /proc/sys/vm/drop_caches"]
                 exec_cmd(cmd, args.real)
-                test_start_time = time.time()
-                run_spark_sql(
-                    sql_file,
-                    database=args.database,
-                    node0_only=(args.numa == "node0_only"),
-                    for_real=args.real,
-                )
-                test_elapsed_time = time.time() - test_start_time
+                stage_base = 0
+                if session:
+                    (test_elapsed_time, stage_base) = session.run_query(sql_file)
+                else:
+                    test_start_time = time.time()
+                    run_spark_sql(
+                        sql_file,
+                        database=args.database,
+                        node0_only=(args.numa == "node0_only"),
+                        for_real=args.real,
+                    )
+                    test_elapsed_time = time.time() - test_start_time
                 queries_per_hour = 3600.0 / test_elapsed_time
                 test_name = os.path.basename(sql_file).split(".")[0]
+                query_times.setdefault(test_name, []).append(test_elapsed_time)
                 print(f"Test {test_name} elapsed time: {test_elapsed_time:.1f} (s)")
                 if args.real:
                     exec_logname = sql_file.replace(".sql", ".log")
                     exec_logpath = joinpath(WORK_PATH, exec_logname)
-                    stages = parse_per_stage_runtime(exec_logpath, sum(worker_cores))
+                    stages = parse_per_stage_runtime(
+                        exec_logpath, sum(worker_cores), stage_base
+                    )
                     fp.write(f"{' '*4}queries-per-hour : {queries_per_hour:.3f}\n")
                     fp.write(f"{' '*4}test-{test_name} : {test_elapsed_time:.1f}\n")
                     for stage, timeline in stages.items():
@@ -235,6 +597,19 @@ def run(args) -> None:
                             + f"{elapsed_time.total_seconds():.1f}\n"
                         )
                 time.sleep(args.interval)
+        if session:
+            session.stop()
+            # the first run of a query in the session warms up the JIT, the
+            # metadata and the file caches of the driver for the next ones
+            for test_name, times in query_times.items():
+                print(f"Test {test_name} cold-start time: {times[0]:.1f} (s)")
+                if args.real:
+                    fp.write(f"{' '*4}cold-{test_name} : {times[0]:.1f}\n")
+                if len(times) > 1:
+                    warm_time = sum(times[1:]) / len(times[1:])
+                    print(f"Test {test_name} warm time: {warm_time:.1f} (s)")
+                    if args.real:
+                        fp.write(f"{' '*4}warm-{test_name} : {warm_time:.1f}\n")
         total_elapsed_time = time.time() - start_time
         print(
             f"Total elapsed time: {total_elapsed_time:.1f} (s) ({args.database} - {signature})"
@@ -243,6 +618,25 @@ def run(args) -> None:
             fp.write(f"{args.database} - {signature}: {total_elapsed_time:.1f}\n")
 
 
+def allocate_worker_cpus(num_workers: int) -> Optional[List[str]]:
+    """Split the CPUs among the workers along NUMA nodes and L3 cache
+    domains (CCX), using the core allocator from common/affinitize.
+
+    Returns None if the CPU topology cannot be read.
+    """
+    try:
+        sys.path.insert(0, AFFINITIZE_PATH)
+        from core_allocator import CoreAllocator, cpus_to_ranges
+
+        return [cpus_to_ranges(cpus) for cpus in CoreAllocator().allocate(num_workers)]
+    except (ImportError, OSError, ValueError, IndexError) as e:
+        print(f"WARNING: CCX allocation failed ({e}); proceed w/o NUMA control")
+    finally:
+        if sys.path[0] == AFFINITIZE_PATH:
+            sys.path.pop(0)
+    return None
+
+
 def start(args) -> None:
     setup(args, init=True)
     # driver
@@ -264,6 +658,8 @@ def start(args) -> None:
         "-h",
         server_hostname,
     ]
+    if args.numa == "ccx":
+        worker_cpus = allocate_worker_cpus(args.num_workers)
     for wid in range(args.num_workers):
         cmd_prefix = []
         num_sockets = args.socket if args.socket else HARDWARE_INFO["sockets"]
@@ -288,6 +684,9 @@ def start(args) -> None:
                 "numactl",
                 f"--physcpubind={smt0_start}-{smt0_end},{smt1_start}-{smt1_end}",
             ]
+        elif args.numa == "ccx":
+            if worker_cpus:
+                cmd_prefix = ["numactl", f"--physcpubind={worker_cpus[wid]}"]
         else:
             print("WARNING: numa policy not expected; proceed w/o NUMA control")
         log_file = joinpath(WORK_PATH, f"start_slave_{wid}.log")
@@ -514,6 +913,22 @@ def init_parser():
         x.add_argument(
             "--num-iters", "-n", type=int, default=1, help="number of iterattiions"
         )
+        x.add_argument(
+            "--session",
+            action="store_true",
+            help="run all the tests in one long-lived spark-sql session instead "
+            + "of starting a new driver for each test",
+        )
+    for x in [create_parser, install_parser]:
+        x.add_argument(
+            "--parallel",
+            "-j",
+            type=int,
+            default=0,
+            help="number of tables to create concurrently through a Spark Thrift "
+            + "server, skipping the tables created by a previous run from "
+            + "unchanged sources; 0 creates all tables in one spark-sql run",
+        )
     # platform configs
     for x in [start_parser, create_parser, install_parser, run_parser, exp_parser]:
         x.add_argument(
@@ -582,6 +997,7 @@ def init_parser():
                 "cxl_local",
                 "cxl_even",
                 "cxl_binding",
+                "ccx",
                 "milan_ccx",
             ],
             default="none",
@@ -597,6 +1013,7 @@ def init_parser():
                 "cxl_local",
                 "cxl_even",
                 "cxl_binding",
+                "ccx",
                 "milan_ccx",
             ],
             default="none",
@@ -170,6 +170,8 @@ def run_test(args):
         cmd_list.append(args.local_hostname)
     if args.aggressive > 0:
         cmd_list.append(f"--aggressive {args.aggressive}")
+    if args.session:
+        cmd_list.append("--session")
     cmd_list.append("--real")
 
     if "DCPERF_PERF_RECORD" in os.environ and os.environ["DCPERF_PERF_RECORD"] == "1":
@@ -338,6 +340,13 @@ def init_parser():
         default=0,
         help="sanity check for total read and write IOPS",
     )
+    run_parser.add_argument(
+        "--session",
+        type=int,
+        default=0,
+        choices=[0, 1],
+        help="set to 1 to run the test queries in one long-lived spark-sql session",
+    )
     run_parser.add_argument("--real", action="store_true", help="for real")
     setup_parser.set_defaults(func=setup)
     run_parser.set_defaults(func=run)
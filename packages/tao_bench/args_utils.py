@@ -141,6 +141,13 @@ def add_common_server_args(server_parser: ArgumentParser) -> List[Tuple[str, str
     server_parser.add_argument(
         "--test-time", type=int, default=360, help="test time in seconds"
     )
+    server_parser.add_argument(
+        "--adaptive-warmup",
+        type=int,
+        default=0,
+        help="set to non-zero to end the warmup as soon as the hit rate and QPS "
+        + "are steady; '--warmup-time' is then the maximum warmup time",
+    )
     server_parser.add_argument(
         "--disable-tls",
         type=int,
@@ -219,6 +226,13 @@ def add_common_client_args(client_parser: ArgumentParser) -> List[Tuple[str, str
     client_parser.add_argument(
         "--test-time", type=int, default=360, help="test time in seconds"
     )
+    client_parser.add_argument(
+        "--adaptive-warmup",
+        type=int,
+        default=0,
+        help="set to non-zero to end the warmup when the server reports that "
+        + "its cache is warm; '--warmup-time' is then the maximum warmup time",
+    )
     client_parser.add_argument(
         "--disable-tls",
         type=int,
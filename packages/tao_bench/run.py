@@ -9,13 +9,16 @@ import os
 import pathlib
 import re
 import shlex
+import shutil
+import signal
 import subprocess
 import threading
 import time
+from parser import TaoBenchServerSnapshot
 from typing import List
 
 import args_utils
-
+import warmup
 
 BENCHPRESS_ROOT = pathlib.Path(os.path.abspath(__file__)).parents[2]
 TAO_BENCH_DIR = os.path.join(BENCHPRESS_ROOT, "benchmarks", "tao_bench")
@@ -195,12 +198,91 @@ def run_server(args):
         os.environ["LD_LIBRARY_PATH"] = os.path.join(TAO_BENCH_DIR, "build-deps/lib")
 
     timeout = args.warmup_time + args.test_time + args.timeout_buffer
-    run_cmd(server_cmd, timeout, args.real)
+    if args.adaptive_warmup and args.real:
+        run_server_adaptive(args, server_cmd, port_num, timeout)
+    else:
+        run_cmd(server_cmd, timeout, args.real)
 
     if "DCPERF_PERF_RECORD" in os.environ and os.environ["DCPERF_PERF_RECORD"] == "1":
         t_prof.cancel()
 
 
+def run_server_adaptive(args, server_cmd, port_num, timeout):
+    """Run the server and end its warmup as soon as the cache is warm.
+
+    The server snapshots are watched by a WarmupMonitor. Once they are
+    steady the measurement phase marker is printed, the phase served to the
+    clients switches to "measurement" and the server is given test_time
+    plus timeout_buffer more seconds instead of the rest of warmup_time.
+    """
+    if shutil.which("stdbuf"):
+        server_cmd = ["stdbuf", "-oL"] + server_cmd
+    print(" ".join(server_cmd), flush=True)
+    signal_server = warmup.WarmupSignalServer(warmup.get_warmup_signal_port(port_num))
+    signal_server.start()
+    # look at the last two minutes of snapshots
+    window = max(int(120 * 1000 / args.stats_interval), 4)
+    monitor = warmup.WarmupMonitor(window=window)
+    start = time.monotonic()
+    deadline = start + timeout
+
+    proc = subprocess.Popen(
+        server_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+
+    def follow():
+        nonlocal deadline
+        for line in proc.stdout:
+            print(line, end="", flush=True)
+            if monitor.steady or not monitor.add(TaoBenchServerSnapshot(line)):
+                continue
+            elapsed = time.monotonic() - start
+            print(
+                f"{warmup.MEASUREMENT_PHASE_MARKER} after {elapsed:.0f}s of warmup "
+                + f"({monitor.summary()})",
+                flush=True,
+            )
+            signal_server.phase = "measurement"
+            deadline = min(
+                deadline, time.monotonic() + args.test_time + args.timeout_buffer
+            )
+
+    follower = threading.Thread(target=follow, daemon=True)
+    follower.start()
+    while proc.poll() is None and time.monotonic() < deadline:
+        time.sleep(1)
+    if proc.poll() is None:
+        proc.terminate()
+    proc.wait()
+    follower.join(timeout=10)
+    signal_server.stop()
+
+
+def run_client_adaptive_warmup(args, cmd):
+    """Run the warmup client until the server reports that its cache is warm,
+    or for at most warmup_time.
+    """
+    print(" ".join(cmd), flush=True)
+    signal_port = warmup.get_warmup_signal_port(args.server_port_number)
+    proc = subprocess.Popen(cmd, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + args.warmup_time + 30
+    while time.monotonic() < deadline:
+        try:
+            proc.wait(timeout=5)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+        if warmup.get_server_phase(args.server_hostname, signal_port) == "measurement":
+            print("server cache is warm, ending warm up phase", flush=True)
+            break
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
 def get_client_cmd(args, n_seconds):
     # threads
     if args.num_threads > 0:
@@ -273,12 +355,15 @@ def run_client(args):
         cmd = f"iperf3 -c {args.server_hostname} -P4"
         subprocess.run(shlex.split(cmd))
 
-    print("warm up phase ...")
+    print("warm up phase ...", flush=True)
     cmd = get_client_cmd(args, n_seconds=args.warmup_time)
-    run_cmd(cmd, timeout=args.warmup_time + 30, for_real=args.real)
+    if args.adaptive_warmup and args.real:
+        run_client_adaptive_warmup(args, cmd)
+    else:
+        run_cmd(cmd, timeout=args.warmup_time + 30, for_real=args.real)
     if args.real and args.wait_after_warmup > 0:
         time.sleep(args.wait_after_warmup)
-    print("execution phase ...")
+    print("execution phase ...", flush=True)
     cmd = get_client_cmd(args, n_seconds=args.test_time)
     run_cmd(cmd, timeout=args.test_time + 30, for_real=args.real)
 
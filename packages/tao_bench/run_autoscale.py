@@ -5,14 +5,17 @@
 # LICENSE file in the root directory of this source tree.
 
 import argparse
+import asyncio
 import json
 import os
 import pathlib
 import re
 import shlex
+import signal
 import socket
 import subprocess
 import sys
+import time
 from datetime import datetime
 from parser import TaoBenchParser
 
@@ -21,6 +24,7 @@ import args_utils
 BENCHPRESS_ROOT = pathlib.Path(os.path.abspath(__file__)).parents[2]
 TAO_BENCH_DIR = os.path.join(BENCHPRESS_ROOT, "packages", "tao_bench")
 TAO_BENCH_BM_DIR = os.path.join(BENCHPRESS_ROOT, "benchmarks", "tao_bench")
+AFFINITIZE_DIR = os.path.join(BENCHPRESS_ROOT, "packages", "common", "affinitize")
 
 
 def find_numa_nodes():
@@ -160,6 +164,8 @@ def gen_client_instructions(args, to_file=True):
                 client_args["wait_after_warmup"] = args.client_wait_after_warmup
             if args.disable_tls != 0:
                 client_args["disable_tls"] = 1
+            if args.adaptive_warmup != 0:
+                client_args["adaptive_warmup"] = 1
             clients[c] += (
                 " ".join(
                     [
@@ -192,6 +198,8 @@ def gen_client_instructions(args, to_file=True):
                 client_args["wait_after_warmup"] = args.client_wait_after_warmup
             if args.disable_tls != 0:
                 client_args["disable_tls"] = 1
+            if args.adaptive_warmup != 0:
+                client_args["adaptive_warmup"] = 1
             clients[i] += (
                 " ".join(
                     [
@@ -218,6 +226,27 @@ def gen_client_instructions(args, to_file=True):
 
 
 def distribute_cores(n_parts):
+    """Split the available CPUs among n_parts server instances, aligned to
+    NUMA nodes and L3 cache domains by the common core allocator. Falls back
+    to an even split of the CPU list if the topology cannot be read.
+    """
+    try:
+        sys.path.insert(0, AFFINITIZE_DIR)
+        from core_allocator import CoreAllocator, cpus_to_ranges
+
+        return [cpus_to_ranges(cpus) for cpus in CoreAllocator().allocate(n_parts)]
+    except (ImportError, OSError, ValueError, IndexError) as e:
+        print(
+            f"Warning: topology-aware core allocation failed ({e}), "
+            + "splitting the CPU list evenly instead."
+        )
+    finally:
+        if sys.path[0] == AFFINITIZE_DIR:
+            sys.path.pop(0)
+    return distribute_cores_evenly(n_parts)
+
+
+def distribute_cores_evenly(n_parts):
     core_ranges = []
     # check for SMT
     is_smt_active = False
@@ -261,24 +290,222 @@ def distribute_cores(n_parts):
     return core_ranges
 
 
+class ServerInstance:
+    """A TaoBench server instance: its command, log file and the parser its
+    output is streamed through.
+    """
+
+    def __init__(self, index, cmd, logpath):
+        self.index = index
+        self.cmd = cmd
+        self.logpath = logpath
+        self.parser = TaoBenchParser(f"server_{index}.csv")
+        self.proc = None
+        self.returncode = None
+        self.restarts = 0
+        # OUT OF MEMORY snapshots of the current run, and whether any run
+        # of the instance reported one
+        self.oom_snapshots = 0
+        self.oom = False
+        self.failure = None
+
+    @property
+    def name(self):
+        return f"server {self.index + 1}"
+
+    def is_running(self):
+        return self.proc is not None and self.proc.returncode is None
+
+    def kill(self, sig=signal.SIGKILL):
+        # instances run in their own process group, so that the memcached
+        # process started by run.py is signaled too
+        if not self.is_running():
+            return
+        try:
+            os.killpg(self.proc.pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+class ServerSupervisor:
+    """Run TaoBench server instances concurrently and follow their output.
+
+    Every line an instance prints is written to its log and fed to its
+    TaoBenchParser right away, so that an instance exiting before the end of
+    the test or running out of memory is noticed as it happens instead of
+    after the whole run. Depending on `on_failure`, a failed instance is left
+    alone ("continue"), restarted up to `max_restarts` times ("restart"), or
+    the whole run is stopped ("stop"). A restarted instance is parsed from
+    scratch and gets the full `timeout` again, so its result only covers its
+    last run. The QPS of all instances is summed and printed every
+    `status_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        instances,
+        min_runtime,
+        timeout,
+        on_failure="continue",
+        max_restarts=1,
+        max_oom_snapshots=0,
+        status_interval=60,
+    ):
+        self.instances = instances
+        self.min_runtime = min_runtime
+        self.timeout = timeout
+        self.on_failure = on_failure
+        self.max_restarts = max_restarts
+        self.max_oom_snapshots = max_oom_snapshots
+        self.status_interval = status_interval
+        self.stopping = False
+        self.results = [None] * len(instances)
+
+    def run(self):
+        """Run all instances and return their parsed results."""
+        return asyncio.run(self._run())
+
+    async def _run(self):
+        reporter = None
+        if self.status_interval > 0:
+            reporter = asyncio.ensure_future(self._report_status())
+        try:
+            await asyncio.gather(*(self._supervise(inst) for inst in self.instances))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            for inst in self.instances:
+                inst.kill()
+        return self.results
+
+    def stop(self):
+        self.stopping = True
+        for inst in self.instances:
+            inst.kill(signal.SIGTERM)
+
+    async def _supervise(self, inst):
+        with open(inst.logpath, "w") as log:
+            while True:
+                print(f"Spawn server instance: {' '.join(inst.cmd)}", flush=True)
+                inst.parser.start_stream()
+                inst.oom_snapshots = 0
+                inst.proc = await asyncio.create_subprocess_exec(
+                    *inst.cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True,
+                )
+                deadline = time.monotonic() + self.timeout
+                inst.failure = await self._follow(inst, log, deadline)
+                if inst.failure is None or self.stopping:
+                    break
+                print(f"TaoBench {inst.name} {inst.failure}", flush=True)
+                if self.on_failure == "stop":
+                    print("Stopping all TaoBench server instances", flush=True)
+                    self.stop()
+                    break
+                if self.on_failure == "restart" and inst.restarts < self.max_restarts:
+                    inst.restarts += 1
+                    log.write(f"--- restart {inst.restarts} ---\n")
+                    continue
+                break
+        self.results[inst.index] = inst.parser.finish_stream(inst.returncode)
+
+    async def _follow(self, inst, log, deadline):
+        """Stream the output of an instance until it exits, killing it at
+        `deadline`.
+
+        Returns:
+            description of the failure, or None if the instance ran until
+            it was expected to stop
+        """
+        started = time.monotonic()
+        try:
+            failure = await asyncio.wait_for(
+                self._read_output(inst, log), deadline - started
+            )
+        except asyncio.TimeoutError:
+            # the instance should have exited by now, same as before
+            inst.kill()
+            failure = None
+        if failure is not None:
+            inst.kill()
+        inst.returncode = await inst.proc.wait()
+        # pick up anything printed before the process went away
+        async for raw in inst.proc.stdout:
+            self._consume(inst, log, raw)
+        if failure is None and not self.stopping:
+            elapsed = time.monotonic() - started
+            if elapsed < self.min_runtime:
+                failure = (
+                    f"exited early after {elapsed:.0f}s "
+                    + f"with exit code {inst.returncode}"
+                )
+        return failure
+
+    def _consume(self, inst, log, raw):
+        line = raw.decode("utf-8", errors="replace")
+        log.write(line)
+        inst.parser.feed_stdout(line)
+        if line.strip().startswith("OUT OF MEMORY"):
+            inst.oom_snapshots += 1
+            inst.oom = True
+            return True
+        return False
+
+    async def _read_output(self, inst, log):
+        async for raw in inst.proc.stdout:
+            if not self._consume(inst, log, raw):
+                continue
+            if inst.oom_snapshots == 1:
+                print(f"TaoBench {inst.name} is out of memory", flush=True)
+            if 0 < self.max_oom_snapshots <= inst.oom_snapshots:
+                return f"reported {inst.oom_snapshots} OUT OF MEMORY snapshots"
+        return None
+
+    def live_qps(self):
+        """Sum the latest QPS snapshot of all instances."""
+        fleet = {"fast_qps": 0.0, "slow_qps": 0.0}
+        for inst in self.instances:
+            snapshot = inst.parser.last_snapshot()
+            if snapshot is not None and inst.is_running():
+                fleet["fast_qps"] += snapshot.get("fast_qps")
+                fleet["slow_qps"] += snapshot.get("slow_qps")
+        fleet["total_qps"] = fleet["fast_qps"] + fleet["slow_qps"]
+        return fleet
+
+    async def _report_status(self):
+        while True:
+            await asyncio.sleep(self.status_interval)
+            fleet = self.live_qps()
+            running = sum(1 for inst in self.instances if inst.is_running())
+            print(
+                f"Fleet live QPS: total_qps={fleet['total_qps']:.1f}, "
+                + f"fast_qps={fleet['fast_qps']:.1f}, "
+                + f"slow_qps={fleet['slow_qps']:.1f}, "
+                + f"running_instances={running}/{len(self.instances)}",
+                flush=True,
+            )
+
+
 def run_server(args):
     core_ranges = distribute_cores(args.num_servers)
     # memory size - split evenly for each server
     n_mem = float(args.memsize)
     mem_per_inst = n_mem / args.num_servers
     ts = datetime.strftime(datetime.now(), "%y%m%d_%H%M%S")
-    # compose servers: [server_cmd, output_file, logpath]
+    # compose server instances
     servers = []
     for i in range(args.num_servers):
         logpath = os.path.join(BENCHPRESS_ROOT, f"tao-bench-server-{i + 1}-{ts}.log")
         servers.append(
-            [
+            ServerInstance(
+                i,
                 compose_server_cmd(
                     args, core_ranges[i], mem_per_inst, args.port_number_start + i
                 ),
-                open(logpath, "w"),
                 logpath,
-            ]
+            )
         )
     # generate client side instructions
     if args.real:
@@ -297,25 +524,25 @@ def run_server(args):
         if match:
             latency = match.group(1)
 
-    # let's spawn servers
-    procs = []
-    for server in servers:
-        print("Spawn server instance: " + " ".join(server[0]))
-        p = subprocess.Popen(server[0], stdout=server[1], stderr=server[1])
-        procs.append(p)
-    # wait for servers to finish - add extra minute to make sure
-    # post-processing will finish
+    # let's spawn servers and follow them until they finish - add extra
+    # minute to make sure post-processing will finish
     timeout = (
         args_utils.get_warmup_time(args) + args.test_time + args.timeout_buffer + 60
     )
-    for p in procs:
-        try:
-            (out, err) = p.communicate(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            p.kill()
-            (out, err) = p.communicate()
-    for server in servers:
-        server[1].close()
+    supervisor = ServerSupervisor(
+        servers,
+        # with an adaptive warmup the servers may legitimately finish early
+        min_runtime=(
+            args.test_time
+            if args.adaptive_warmup
+            else args_utils.get_warmup_time(args) + args.test_time
+        ),
+        timeout=timeout,
+        on_failure=args.on_instance_failure,
+        max_restarts=args.max_restarts,
+        max_oom_snapshots=args.max_oom_snapshots,
+        status_interval=args.status_interval,
+    )
     # parse results
     results = []
     overall = {
@@ -332,13 +559,24 @@ def run_server(args):
         overall["latency(ms)"] = latency
         overall["bandwidth"] = bandwidth
 
-    for i in range(args.num_servers):
-        logpath = servers[i][2]
-        with open(logpath, "r") as log:
-            parser = TaoBenchParser(f"server_{i}.csv")
-            res = parser.parse(log, None, procs[i].returncode)
-            if "role" in res and res["role"] == "server":
-                results.append(res)
+    # a restarted instance only ran for part of the test, its result is
+    # reported on its own instead of being added to the others. Keep these
+    # flat, the benchpress parser reads the output up to the first "}" line.
+    restarted_ids = []
+    restarted_qps = []
+    for server, res in zip(servers, supervisor.run()):
+        if "role" not in res or res["role"] != "server":
+            continue
+        if server.restarts > 0:
+            restarted_ids.append(server.index + 1)
+            restarted_qps.append(res["total_qps"])
+        else:
+            results.append(res)
+    overall["failed_instances"] = sum(1 for s in servers if s.failure is not None)
+    overall["restarted_instances"] = sum(1 for s in servers if s.restarts > 0)
+    overall["restarted_instance_ids"] = restarted_ids
+    overall["restarted_instance_qps"] = restarted_qps
+    overall["oom_instances"] = sum(1 for s in servers if s.oom)
 
     for res in results:
         overall["fast_qps"] += res["fast_qps"]
@@ -438,6 +676,35 @@ def init_parser():
         default=0,
         help="sanity check for the network bandwidth and latency between the server and the client.",
     )
+    parser.add_argument(
+        "--on-instance-failure",
+        choices=["continue", "restart", "stop"],
+        default="continue",
+        help="what to do when a server instance exits before the end of the test "
+        + "or exceeds '--max-oom-snapshots': keep the other instances running, "
+        + "restart the instance, or stop all instances.",
+    )
+    parser.add_argument(
+        "--max-restarts",
+        type=int,
+        default=1,
+        help="maximum number of restarts of each server instance with "
+        + "'--on-instance-failure restart'.",
+    )
+    parser.add_argument(
+        "--max-oom-snapshots",
+        type=int,
+        default=0,
+        help="consider a server instance failed once it reports this many "
+        + "OUT OF MEMORY snapshots. 0 means OOM snapshots are only reported.",
+    )
+    parser.add_argument(
+        "--status-interval",
+        type=int,
+        default=60,
+        help="interval in seconds between reports of the live QPS summed over "
+        + "all server instances. 0 disables the reports.",
+    )
     # functions
     parser.set_defaults(func=run_server)
     return parser
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import statistics
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Printed by the server once the warmup has converged; TaoBenchParser takes
+# the measurement window from the snapshots that follow it
+MEASUREMENT_PHASE_MARKER = "TaoBench measurement phase started"
+
+# The server publishes its phase on its port number plus this offset
+WARMUP_SIGNAL_PORT_OFFSET = 10000
+
+
+def get_warmup_signal_port(port_number):
+    return port_number + WARMUP_SIGNAL_PORT_OFFSET
+
+
+def relative_change(before, after):
+    mean = (before + after) / 2
+    if mean <= 0:
+        return 0.0
+    return abs(after - before) / mean
+
+
+class WarmupMonitor:
+    """Decide when the server cache is warm from the stream of server
+    snapshots.
+
+    The last `window` snapshots with traffic are split in two halves. The
+    warmup is over when, between the halves, the hit rate stopped rising
+    (change <= hit_rate_tolerance) and the total QPS shows no level shift
+    (relative change <= qps_tolerance), the window is not too noisy
+    (coefficient of variation <= max_cv) and the hit rate reached
+    min_hit_rate, below which snapshots do not count towards the result.
+    """
+
+    def __init__(
+        self,
+        window=24,
+        qps_tolerance=0.03,
+        hit_rate_tolerance=0.005,
+        max_cv=0.1,
+        min_hit_rate=0.88,
+    ):
+        self.window = window
+        self.qps_tolerance = qps_tolerance
+        self.hit_rate_tolerance = hit_rate_tolerance
+        self.max_cv = max_cv
+        self.min_hit_rate = min_hit_rate
+        self.total_qps = []
+        self.hit_rates = []
+        self.steady = False
+
+    def add(self, snapshot):
+        """Feed a TaoBenchServerSnapshot, return True once steady."""
+        if self.steady:
+            return True
+        if not snapshot.valid or snapshot.is_oom or snapshot.get("fast_qps") <= 1:
+            return False
+        self.total_qps.append(snapshot.get("fast_qps") + snapshot.get("slow_qps"))
+        self.hit_rates.append(snapshot.get("hit_rate"))
+        self.total_qps = self.total_qps[-self.window :]
+        self.hit_rates = self.hit_rates[-self.window :]
+        self.steady = self.is_steady()
+        return self.steady
+
+    def is_steady(self):
+        if len(self.total_qps) < self.window:
+            return False
+        half = self.window // 2
+        hit_rate_before = statistics.mean(self.hit_rates[:half])
+        hit_rate_after = statistics.mean(self.hit_rates[half:])
+        if hit_rate_after < self.min_hit_rate:
+            return False
+        if hit_rate_after - hit_rate_before > self.hit_rate_tolerance:
+            return False
+        qps_before = statistics.mean(self.total_qps[:half])
+        qps_after = statistics.mean(self.total_qps[half:])
+        if relative_change(qps_before, qps_after) > self.qps_tolerance:
+            return False
+        mean = statistics.mean(self.total_qps)
+        return mean > 0 and statistics.pstdev(self.total_qps) / mean <= self.max_cv
+
+    def summary(self):
+        return (
+            f"hit_rate={statistics.mean(self.hit_rates):.4f}, "
+            + f"total_qps={statistics.mean(self.total_qps):.1f}"
+        )
+
+
+class WarmupSignalServer:
+    """Tell the clients whether the server is still warming up.
+
+    GET /phase returns {"phase": "warmup"} or {"phase": "measurement"}.
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.phase = "warmup"
+        self.httpd = None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/phase":
+                    self.send_error(404)
+                    return
+                payload = json.dumps({"phase": server.phase}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        try:
+            self.httpd = ThreadingHTTPServer(("", self.port), self._make_handler())
+        except OSError as e:
+            print(f"Warning: could not serve warmup phase on port {self.port}: {e}")
+            return
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def get_server_phase(hostname, port, timeout=5):
+    """Phase published by a server's WarmupSignalServer, None if unknown."""
+    try:
+        with urllib.request.urlopen(
+            f"http://{hostname}:{port}/phase", timeout=timeout
+        ) as resp:
+            return json.loads(resp.read().decode("utf-8")).get("phase")
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
@@ -6,6 +6,7 @@
 
 
 import json
+import os
 import sys
 
 import parse_line
@@ -13,17 +14,23 @@ import parse_line
 sum_c = {}
 
 input_file_name = "out_" + sys.argv[1] + ".txt"
-
-
-with open(input_file_name) as f:
-    if sys.argv[1] == "concurrent_hash_map_benchmark":
-        parse_line.parse_line_chm(f, sum_c)
-    elif sys.argv[1] == "lzbench":
-        parse_line.parse_line_lzbench(f, sum_c)
-    elif sys.argv[1] == "openssl":
-        parse_line.parse_line_openssl(f, sum_c)
-    else:
-        parse_line.parse_line(f, sum_c)
+# written by folly benchmarks run with --bm_json_verbose
+folly_json_file_name = "out_" + sys.argv[1] + ".folly.json"
+
+
+if os.path.exists(folly_json_file_name):
+    with open(folly_json_file_name) as f:
+        parse_line.parse_folly_json(f, sum_c)
+else:
+    with open(input_file_name) as f:
+        if sys.argv[1] == "concurrent_hash_map_benchmark":
+            parse_line.parse_line_chm(f, sum_c)
+        elif sys.argv[1] == "lzbench":
+            parse_line.parse_lzbench_csv(f, sum_c)
+        elif sys.argv[1] == "openssl":
+            parse_line.parse_openssl_mr(f, sum_c)
+        else:
+            parse_line.parse_line(f, sum_c)
 
 out_file_name = "out_" + sys.argv[1] + ".json"
 with open(out_file_name, "w") as f:
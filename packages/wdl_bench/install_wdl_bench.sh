@@ -177,7 +177,7 @@ done
 
 cp "${BPKGS_WDL_ROOT}/run.sh" ./
 cp "${BPKGS_WDL_ROOT}/convert.py" ./
-cp "${BPKGS_WDL_ROOT}/aggregate_result.py" ./
+cp "${BPKGS_WDL_ROOT}/run_allcore.py" ./
 cp "${BPKGS_WDL_ROOT}/parse_line.py" ./
 
 
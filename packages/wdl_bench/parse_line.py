@@ -4,25 +4,35 @@
 # LICENSE file in the root directory of this source tree.
 
 
+# Results are nested as {benchmark: {metric: value}}; the metric names carry
+# their unit, e.g. "iters/s" or "compression MB/s".
+
+import json
 import re
 
+# time unit of a folly benchmark line (ns, us, ms, s, ps, fs)
+TIME_PATTERN = re.compile("([0-9](n|m|u|f|p)s)|([0-9]s)")
+CHM_NAME_PATTERN = re.compile("(item)|(empty)")
+
+# powers of 1000 of the throughput suffixes
+THROUGHPUT_SUFFIXES = {"K": 1, "M": 2, "G": 3, "T": 4}
+
 
 def parse_line_chm(f, sum_c):
     thread_count = 0
     for line in f:
-        if re.search("threads", line):
+        if "threads" in line:
             thread_count = int(line.split()[1])
-        elif re.search("CHM", line):
+        elif "CHM" in line:
             elements = line.split()
             idx_name = 0
             for i in range(len(elements)):
-                if re.search("(item)|(empty)", elements[i]):
+                if CHM_NAME_PATTERN.search(elements[i]):
                     idx_name = i
 
             bench_name = (
                 str(thread_count) + "threads " + " ".join(elements[: idx_name + 1])
             )
-            bench_name = bench_name + ": ns"
             # max_latency = "".join(elements[idx_name + 1 : idx_name + 3])
             avg_latency = "".join(elements[idx_name + 3 : idx_name + 5])
             # min_latency = "".join(elements[idx_name + 5 : idx_name + 7])
@@ -33,78 +43,149 @@ def parse_line_chm(f, sum_c):
                 avg_latency = int(avg_latency[:-2]) * 1000 * 1000
             else:
                 avg_latency = int(avg_latency[:-2])
-            sum_c[bench_name] = avg_latency
+            sum_c[bench_name] = {"ns": avg_latency}
 
 
 def find_idx_time(elements):
     has_relative = False
     idx_time = 0
     for i in range(len(elements)):
-        if re.search("%", elements[i]):
+        if "%" in elements[i]:
             has_relative = True
-        if re.search("([0-9](n|m|u|f|p)s)|([0-9]s)", elements[i]):
+        if TIME_PATTERN.search(elements[i]):
             idx_time = i
             break
 
     return has_relative, idx_time
 
 
+def parse_throughput(throughput):
+    if throughput == "Infinity":
+        return float("inf")
+    if throughput[-1] == "m":
+        return float(throughput[:-1]) / 1000
+    power = THROUGHPUT_SUFFIXES.get(throughput[-1])
+    if power is None:
+        return float(throughput)
+    value = float(throughput[:-1])
+    for _ in range(power):
+        value *= 1000
+    return value
+
+
+def add_result(sum_c, bench_name, metric, value):
+    metrics = sum_c.setdefault(bench_name, {})
+    metrics[metric] = metrics.get(metric, 0) + value
+
+
+def parse_folly_line(line, sum_c):
+    if not TIME_PATTERN.search(line):
+        return
+    elements = line.split()
+    has_relative, idx_time = find_idx_time(elements)
+    throughput = elements[idx_time + 1]
+    if has_relative:
+        bench_name = " ".join(elements[: idx_time - 1])
+    else:
+        bench_name = " ".join(elements[:idx_time])
+    add_result(sum_c, bench_name, "iters/s", parse_throughput(throughput))
+
+
 def parse_line(f, sum_c):
     for line in f:
-        # capture the time unit here (ns, us, ms, s, ps, fs)
-        if re.search("([0-9](n|m|u|f|p)s)|([0-9]s)", line):
-            elements = line.split()
-            has_relative, idx_time = find_idx_time(elements)
-            throughput = elements[idx_time + 1]
-            bench_name = None
-            if has_relative:
-                bench_name = " ".join(elements[: idx_time - 1])
-            else:
-                bench_name = " ".join(elements[:idx_time])
-            bench_name = bench_name + ": iters/s"
-            if throughput[-1] == "K":
-                throughput = float(throughput[:-1]) * 1000
-            elif throughput[-1] == "M":
-                throughput = float(throughput[:-1]) * 1000 * 1000
-            elif throughput[-1] == "G":
-                throughput = float(throughput[:-1]) * 1000 * 1000 * 1000
-            elif throughput[-1] == "T":
-                throughput = float(throughput[:-1]) * 1000 * 1000 * 1000 * 1000
-            elif throughput[-1] == "m":
-                throughput = float(throughput[:-1]) / 1000
-            elif throughput == "Infinity":
-                throughput = float("inf")
-            else:
-                throughput = float(throughput)
+        parse_folly_line(line, sum_c)
 
-            if bench_name not in sum_c:
-                sum_c[bench_name] = 0
-            sum_c[bench_name] += throughput
+
+def parse_lzbench_line(line, sum_c):
+    if "silesia" not in line:
+        return
+    elements = line.split()
+    idx_time = 0
+    for i in range(len(elements)):
+        if "MB" in elements[i]:
+            idx_time = i
+            break
+    name = " ".join(elements[: idx_time - 1])
+    add_result(sum_c, name, "decompression MB/s", float(elements[idx_time + 1]))
+    add_result(sum_c, name, "compression MB/s", float(elements[idx_time - 1]))
 
 
 def parse_line_lzbench(f, sum_c):
     for line in f:
-        if re.search("silesia", line):
-            elements = line.split()
-            idx_time = 0
-            for i in range(len(elements)):
-                if re.search("MB", elements[i]):
-                    idx_time = i
-                    break
-            throughput_decomp = float(elements[idx_time + 1])
-            throughput_comp = float(elements[idx_time - 1])
-            bench_name_decomp = (
-                " ".join(elements[: idx_time - 1]) + " decompression: MB/s"
-            )
-            bench_name_comp = " ".join(elements[: idx_time - 1]) + " compression: MB/s"
+        parse_lzbench_line(line, sum_c)
+
+
+def parse_folly_json(f, sum_c):
+    """Parse the output of a folly benchmark run with --bm_json_verbose, a
+    list of [file, name, ns per iteration, counters], or with --json, an
+    object mapping each name to picoseconds per iteration.
+    """
+    data = json.load(f)
+    if isinstance(data, dict):
+        entries = [(name, ps / 1000, {}) for name, ps in data.items()]
+    else:
+        entries = [(e[1], e[2], e[3] if len(e) > 3 else {}) for e in data]
+
+    for name, ns_per_iter, counters in entries:
+        # relative benchmarks are registered with a "%" prefix, separator
+        # lines as "-"
+        name = name.lstrip("%")
+        if name == "-":
+            continue
+        iters = 1e9 / ns_per_iter if ns_per_iter > 0 else float("inf")
+        add_result(sum_c, name, "iters/s", iters)
+        add_result(sum_c, name, "ns/iter", ns_per_iter)
+        for counter, info in counters.items():
+            value = info["value"] if isinstance(info, dict) else info
+            add_result(sum_c, name, counter, value)
+
+
+def parse_lzbench_csv_line(line, sum_c):
+    """Parse a result row of lzbench -o4: compressor name, compression and
+    decompression speed in MB/s, original and compressed size, ratio (%)
+    and file name.
+    """
+    # lzbench rewrites its progress line with \r before printing the result
+    fields = line.rstrip("\n").split("\r")[-1].split(",")
+    if len(fields) < 7:
+        return
+    try:
+        compression = float(fields[1])
+        decompression = float(fields[2])
+        ratio = float(fields[5])
+    except ValueError:
+        # header
+        return
+    add_result(sum_c, fields[0], "compression MB/s", compression)
+    add_result(sum_c, fields[0], "decompression MB/s", decompression)
+    add_result(sum_c, fields[0], "ratio %", ratio)
+
+
+def parse_lzbench_csv(f, sum_c):
+    for line in f:
+        parse_lzbench_csv_line(line, sum_c)
 
-            if bench_name_decomp not in sum_c:
-                sum_c[bench_name_decomp] = 0
-            if bench_name_comp not in sum_c:
-                sum_c[bench_name_comp] = 0
 
-            sum_c[bench_name_decomp] += throughput_decomp
-            sum_c[bench_name_comp] += throughput_comp
+def format_block_size(size):
+    if size >= 1024 and size % 1024 == 0:
+        return f"{size // 1024}KB"
+    return f"{size}B"
+
+
+def parse_openssl_mr(f, sum_c):
+    """Parse the output of openssl speed -mr: "+H:<block sizes>" followed by
+    "+F:<index>:<algorithm>:<bytes/s per block size>" lines.
+    """
+    sizes = []
+    for line in f:
+        fields = line.strip().split(":")
+        if fields[0] == "+H":
+            sizes = [int(size) for size in fields[1:]]
+        elif fields[0] == "+F" and len(fields) > 3:
+            sum_c[fields[2]] = {
+                f"{format_block_size(size)} KB/s": float(value) / 1000
+                for size, value in zip(sizes, fields[3:])
+            }
 
 
 def parse_line_openssl(f, sum_c):
@@ -113,11 +194,11 @@ def parse_line_openssl(f, sum_c):
         last_line = line
 
     elements = last_line.split()
-    name = elements[0]
-
-    sum_c[name + " 16B: KB/s"] = float(elements[1][:-1])
-    sum_c[name + " 64B: KB/s"] = float(elements[2][:-1])
-    sum_c[name + " 256B: KB/s"] = float(elements[3][:-1])
-    sum_c[name + " 1KB: KB/s"] = float(elements[4][:-1])
-    sum_c[name + " 8KB: KB/s"] = float(elements[5][:-1])
-    sum_c[name + " 16KB: KB/s"] = float(elements[6][:-1])
+    sum_c[elements[0]] = {
+        "16B KB/s": float(elements[1][:-1]),
+        "64B KB/s": float(elements[2][:-1]),
+        "256B KB/s": float(elements[3][:-1]),
+        "1KB KB/s": float(elements[4][:-1]),
+        "8KB KB/s": float(elements[5][:-1]),
+        "16KB KB/s": float(elements[6][:-1]),
+    }
@@ -38,29 +38,23 @@ folly_benchmark_list_multi="concurrency_concurrent_hash_map_bench stats_digest_b
 run_list=""
 
 
-run_allcore()
+# Arguments making a folly benchmark also write its results as JSON, which
+# convert.py reads instead of the table printed on stdout
+folly_json_args()
 {
-    nprocs=$(nproc)
-
-    for i in $(seq "$nprocs")
-    do
-        if [ "$1" = "lzbench" ]; then
-            numactl -C "$((i-1))" ./lzbench -e"$2" "${WDL_DATASETS}"/silesia.tar > output_file_$((i-1)) &
-        else
-            numactl -C "$((i-1))" "./$1" > output_file_$((i-1)) &
-        fi
-        pids["$i"]=$!
-    done
-
-    for i in $(seq "$nprocs")
-    do
-        wait "${pids[$i]}"
-    done
-
-    python3 ./aggregate_result.py "$1"
-    rm output_file_*
-
+    # not a folly::Benchmark binary, it prints its own table
+    if [ "$1" != "concurrency_concurrent_hash_map_bench" ]; then
+        echo "--bm_json_verbose=out_$1.folly.json"
+    fi
+}
 
+run_allcore()
+{
+    if [ "$1" = "lzbench" ]; then
+        python3 ./run_allcore.py "$1" --algo "$2"
+    else
+        python3 ./run_allcore.py "$1"
+    fi
 }
 
 main() {
@@ -127,9 +121,9 @@ main() {
         export LD_LIBRARY_PATH="${WDL_BUILD}/openssl/lib64:${WDL_BUILD}/openssl/lib"
         ldconfig
         if [ "$run_type" = "single_core" ]; then
-            ./openssl speed -seconds 20 -evp aes-256-"${algo}" > "out_${name}".txt
+            ./openssl speed -mr -seconds 20 -evp aes-256-"${algo}" > "out_${name}".txt
         elif [ "$run_type" = "all_core" ]; then
-            ./openssl speed -seconds 20 -evp aes-256-"${algo}" -multi "$(nproc)" > "out_${name}".txt
+            ./openssl speed -mr -seconds 20 -evp aes-256-"${algo}" -multi "$(nproc)" > "out_${name}".txt
         fi
         unset LD_LIBRARY_PATH
         ldconfig
@@ -137,7 +131,7 @@ main() {
     elif [ "$name" = "lzbench" ]; then
         run_list=$name
         if [ "$run_type" = "single_core" ]; then
-            ./lzbench -e"${algo}" "${WDL_DATASETS}/silesia.tar" > "out_${name}".txt
+            ./lzbench -o4 -e"${algo}" "${WDL_DATASETS}/silesia.tar" > "out_${name}".txt
         elif [ "$run_type" = "all_core" ]; then
             run_allcore "$name" "$algo"
         fi
@@ -145,18 +139,22 @@ main() {
     elif [ "$name" != "none" ]; then
         run_list=$name
         if [ "$name" = "small_locks_benchmark" ] || [ "$name" = "iobuf_benchmark" ]; then
-                "./${name}" --bm_min_iters=1000000 > "out_${benchmark}".txt
+                # shellcheck disable=SC2046
+                "./${name}" --bm_min_iters=1000000 $(folly_json_args "$name") > "out_${name}".txt
             else
-                "./${name}"  > "out_${name}".txt
+                # shellcheck disable=SC2046
+                "./${name}" $(folly_json_args "$name") > "out_${name}".txt
         fi
 
     elif [ "$run_type" = "single_core" ]; then
         run_list=$folly_benchmark_list_single
         for benchmark in $run_list; do
             if [ "$benchmark" = "iobuf_benchmark" ]; then
-                "./${benchmark}" --bm_min_iters=1000000 > "out_${benchmark}".txt
+                # shellcheck disable=SC2046
+                "./${benchmark}" --bm_min_iters=1000000 $(folly_json_args "$benchmark") > "out_${benchmark}".txt
             else
-                "./${benchmark}"  > "out_${benchmark}".txt
+                # shellcheck disable=SC2046
+                "./${benchmark}" $(folly_json_args "$benchmark") > "out_${benchmark}".txt
             fi
         done
     elif [ "$run_type" = "all_core" ]; then
@@ -169,9 +167,11 @@ main() {
         run_list=$folly_benchmark_list_multi
         for benchmark in $run_list; do
             if [ "$benchmark" = "small_locks_benchmark" ]; then
-                "./${benchmark}" --bm_min_iters=1000000 > "out_${benchmark}".txt
+                # shellcheck disable=SC2046
+                "./${benchmark}" --bm_min_iters=1000000 $(folly_json_args "$benchmark") > "out_${benchmark}".txt
             else
-                "./${benchmark}"  > "out_${benchmark}".txt
+                # shellcheck disable=SC2046
+                "./${benchmark}" $(folly_json_args "$benchmark") > "out_${benchmark}".txt
             fi
         done
 
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Run one copy of a WDL benchmark pinned to each CPU and aggregate the
+results while the copies are running.
+
+The output of every copy is read through a pipe and parsed line by line as
+it arrives. The total over all CPUs is written to out_<name>.json, the same
+format as the single core runs: throughputs (metrics in units per second)
+are summed, other metrics such as the lzbench ratio take the median. The
+results of every CPU, and the min, median and max of each metric with the
+CPUs that deviate from the median by more than --outlier-threshold, go to
+out_<name>_per_core.json.
+"""
+
+import argparse
+import json
+import os
+import selectors
+import statistics
+import subprocess
+import sys
+
+import parse_line
+
+WDL_ROOT = os.path.dirname(os.path.abspath(__file__))
+WDL_DATASETS = os.path.join(WDL_ROOT, "datasets")
+
+READ_SIZE = 65536
+
+
+def get_benchmark_command(name, algo):
+    if name == "lzbench":
+        return [
+            "./lzbench",
+            "-o4",
+            f"-e{algo}",
+            os.path.join(WDL_DATASETS, "silesia.tar"),
+        ]
+    return [f"./{name}"]
+
+
+def get_line_parser(name):
+    if name == "lzbench":
+        return parse_line.parse_lzbench_csv_line
+    return parse_line.parse_folly_line
+
+
+class CoreInstance:
+    """A copy of the benchmark pinned to one CPU and its parsed results."""
+
+    def __init__(self, cpu, cmd, parse):
+        self.cpu = cpu
+        self.parse = parse
+        self.results = {}
+        self.pending = b""
+        self.proc = subprocess.Popen(
+            ["numactl", "-C", str(cpu)] + cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+        )
+
+    def feed(self, chunk):
+        lines = (self.pending + chunk).split(b"\n")
+        self.pending = lines.pop()
+        for line in lines:
+            self.parse(line.decode("utf-8", errors="replace"), self.results)
+
+    def finish(self):
+        if self.pending:
+            self.parse(self.pending.decode("utf-8", errors="replace"), self.results)
+            self.pending = b""
+        self.proc.stdout.close()
+        return self.proc.wait()
+
+
+def run_instances(name, algo, cpus):
+    cmd = get_benchmark_command(name, algo)
+    parse = get_line_parser(name)
+    instances = []
+    try:
+        for cpu in cpus:
+            instances.append(CoreInstance(cpu, cmd, parse))
+    except OSError:
+        for instance in instances:
+            instance.proc.kill()
+        raise
+
+    selector = selectors.DefaultSelector()
+    for instance in instances:
+        selector.register(instance.proc.stdout, selectors.EVENT_READ, instance)
+    while selector.get_map():
+        for key, _ in selector.select():
+            chunk = os.read(key.fd, READ_SIZE)
+            if chunk:
+                key.data.feed(chunk)
+            else:
+                selector.unregister(key.fileobj)
+    selector.close()
+
+    failed = []
+    for instance in instances:
+        returncode = instance.finish()
+        if returncode != 0:
+            failed.append(instance.cpu)
+            print(
+                f"{name} on CPU {instance.cpu} exited with code {returncode}",
+                file=sys.stderr,
+            )
+    return instances, failed
+
+
+def is_throughput(metric):
+    return metric.endswith("/s")
+
+
+def summarize(instances, outlier_threshold):
+    """
+    @return dict benchmark -> metric -> total, min, median and max over the
+        CPUs, and the CPUs whose result differs from the median by more than
+        outlier_threshold (relative)
+    """
+    keys = sorted(
+        {
+            (benchmark, metric)
+            for instance in instances
+            for benchmark, metrics in instance.results.items()
+            for metric in metrics
+        }
+    )
+    summary = {}
+    for benchmark, metric in keys:
+        values = {
+            instance.cpu: instance.results[benchmark][metric]
+            for instance in instances
+            if metric in instance.results.get(benchmark, {})
+        }
+        median = statistics.median(values.values())
+        outliers = {
+            cpu: value
+            for cpu, value in values.items()
+            if median > 0 and abs(value - median) / median > outlier_threshold
+        }
+        summary.setdefault(benchmark, {})[metric] = {
+            "total": sum(values.values()) if is_throughput(metric) else median,
+            "min": min(values.values()),
+            "median": median,
+            "max": max(values.values()),
+            "num_cpus": len(values),
+            "outlier_cpus": sorted(outliers),
+        }
+    return summary
+
+
+def print_summary(name, summary, num_cpus):
+    print(f"{name}: per-core distribution over {num_cpus} CPUs")
+    for benchmark, metrics in summary.items():
+        for metric, stats in metrics.items():
+            print(
+                f"  {benchmark} {metric}: total={stats['total']:g} "
+                + f"min={stats['min']:g} median={stats['median']:g} "
+                + f"max={stats['max']:g}"
+            )
+            if stats["num_cpus"] != num_cpus:
+                print(f"    reported by {stats['num_cpus']} CPUs only")
+            if stats["outlier_cpus"]:
+                cpus = ",".join(str(cpu) for cpu in stats["outlier_cpus"])
+                print(f"    outlier CPUs: {cpus}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a WDL benchmark on every CPU and aggregate the results"
+    )
+    parser.add_argument("name", help="benchmark binary, or lzbench")
+    parser.add_argument(
+        "--algo", default="zstd", help="compression algorithm for lzbench"
+    )
+    parser.add_argument(
+        "--outlier-threshold",
+        type=float,
+        default=0.1,
+        help="relative deviation from the median above which a CPU is "
+        "reported as an outlier",
+    )
+    args = parser.parse_args()
+
+    cpus = sorted(os.sched_getaffinity(0))
+    instances, failed = run_instances(args.name, args.algo, cpus)
+    if failed:
+        return 1
+
+    summary = summarize(instances, args.outlier_threshold)
+    with open(f"out_{args.name}.json", "w") as f:
+        json.dump(
+            {
+                benchmark: {metric: stats["total"] for metric, stats in metrics.items()}
+                for benchmark, metrics in summary.items()
+            },
+            f,
+            indent=4,
+            sort_keys=True,
+        )
+    with open(f"out_{args.name}_per_core.json", "w") as f:
+        json.dump(
+            {
+                "summary": summary,
+                "cpus": {instance.cpu: instance.results for instance in instances},
+            },
+            f,
+            indent=4,
+            sort_keys=True,
+        )
+    print_summary(args.name, summary, len(cpus))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
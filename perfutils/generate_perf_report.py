@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import typing
+
+import click
+from perf_metrics import (
+    available_metric_sets,
+    CHUNK_ROWS,
+    find_metric_set,
+    MetricContext,
+    MetricSet,
+    read_perf_csv,
+    read_timeseries_csv,
+    write_report,
+)
+
+
+def parse_constants(ctx, param, values):
+    constants = {}
+    for value in values:
+        name, _, number = value.partition("=")
+        try:
+            constants[name.strip()] = float(number)
+        except ValueError:
+            raise click.BadParameter(f"expected NAME=NUMBER, got {value!r}")
+    return constants
+
+
+@click.command()
+@click.argument(
+    "input_file", type=click.Path(exists=True, dir_okay=False, resolve_path=True)
+)
+@click.option(
+    "-m",
+    "--metrics",
+    "metrics_name",
+    help="Metric definitions to evaluate: a YAML/JSON file or one of "
+    + ", ".join(available_metric_sets())
+    + ". Time series inputs are summarized column by column if omitted.",
+)
+@click.option(
+    "-i",
+    "--input-format",
+    type=click.Choice(["perf", "timeseries"]),
+    default="perf",
+    help="perf: `perf stat -x,` output; timeseries: CSV with a time column "
+    "and one column per metric, such as the topdown CSVs",
+)
+@click.option(
+    "-c",
+    "--constant",
+    "constants",
+    multiple=True,
+    callback=parse_constants,
+    help="Value of a constant used by the formulas, as NAME=NUMBER",
+)
+@click.option(
+    "-s",
+    "--series",
+    type=click.File(mode="w", lazy=True),
+    help="Write derived time-series data as CSV into the designated file",
+)
+@click.option(
+    "-f",
+    "--format",
+    type=click.Choice(["table", "csv"]),
+    default="table",
+    help="Output format",
+)
+@click.option(
+    "--chunksize",
+    type=click.IntRange(min=1),
+    default=CHUNK_ROWS,
+    show_default=True,
+    help="Number of input rows to read at a time (perf input only)",
+)
+def main(
+    input_file: click.Path,
+    metrics_name: typing.Optional[str],
+    input_format: click.Choice,
+    constants: typing.Dict[str, float],
+    series: typing.TextIO,
+    format: click.Choice,
+    chunksize: int,
+) -> None:
+    metric_set = None
+    if metrics_name:
+        try:
+            metric_set = MetricSet.load(find_metric_set(metrics_name))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    if input_format == "timeseries":
+        events = read_timeseries_csv(input_file)
+        if metric_set is None:
+            metric_set = MetricSet.passthrough(events)
+    else:
+        if metric_set is None:
+            raise click.UsageError("--metrics is required for perf input")
+        events = read_perf_csv(
+            input_file, metric_set.fields(), metric_set.event_filter(), chunksize
+        )
+
+    metrics = MetricContext(metric_set, events, constants).evaluate()
+    if not metrics:
+        raise click.ClickException(f"No metric could be derived from {input_file}")
+    click.echo(write_report(metrics, series, format))
+
+
+if __name__ == "__main__":
+    main()
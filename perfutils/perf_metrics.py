@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Common engine of the perf report scripts.
+
+Metrics are defined per microarchitecture in YAML or JSON files under
+`metrics/`, as formulas over perf events:
+
+    include:                  # other definition files, evaluated first
+      - _amd-base.yaml
+    index: cycles             # optional, see below
+    series:                   # intermediate series shared by metrics
+      l2_dc_misses: l2_dc_requests - l2_dc_hits
+    metrics:
+      - key: l2_data_mpki
+        name: L2 Data MPKI
+        formula: l2_dc_misses / instructions
+        prefix: 1000          # applied when the metric is reported
+
+Formulas are Python arithmetic expressions. Names refer to constants given
+at run time, series, other metrics (by key) or perf events; event names that
+are not identifiers are quoted with backticks, e.g. `instructions:u`. The
+following functions are available:
+
+    duration(ev)      length of the sampling intervals of `ev` in seconds
+    timestamp(ev)     timestamps of the samples of `ev`
+    mux(ev)           percentage of time `ev` was counted
+    runtime(ev)       time `ev` was counted
+    sum_indexed(expr) sum of `expr` for i = 0, 1, ... where names in `expr`
+                      contain "{i}", e.g. `umc_cyc_umc{i}`, stopping at the
+                      first i with a missing event
+
+The input is pivoted once into a sample x event matrix and every formula is
+evaluated as a vectorized expression over its columns. Series and metrics
+are computed at most once per report.
+
+Time series are indexed by sample number, unless the definitions name an
+`index` event: samples are then labeled with the row number of that event's
+values in the input, like the report scripts always did.
+"""
+
+import ast
+import csv
+import io
+import json
+import operator
+import os
+import re
+import typing
+
+import pandas as pd
+import tabulate
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+
+PERF_CSV_COLUMNS = [
+    "timestamp",
+    "socket",
+    "numcpus",
+    "counter_value",
+    "counter_unit",
+    "event_name",
+    "counter_runtime",
+    "mux",
+    "optional_metric_value",
+    "optional_metric_unit",
+    "1",
+    "2",
+]
+# Rows of perf stat output read at a time
+CHUNK_ROWS = 1_000_000
+# Field holding the row number of every value in the input
+ROW_FIELD = "row"
+TIME_COLUMNS = ("time", "timestamp", "ts")
+
+# Formula functions reading a per-event field of the perf stat output
+FIELD_FUNCTIONS = {
+    "timestamp": "timestamp",
+    "duration": "timestamp",
+    "mux": "mux",
+    "runtime": "counter_runtime",
+}
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+class Formula:
+    """A metric formula compiled to a tree of closures over pandas series."""
+
+    def __init__(self, text):
+        self.text = str(text)
+        self.names = set()
+        self.fields = {"counter_value"}
+        quoted = {}
+
+        def quote(match):
+            placeholder = f"__quoted{len(quoted)}"
+            quoted[placeholder] = match.group(1)
+            return placeholder
+
+        self._quoted = quoted
+        source = re.sub(r"`([^`]+)`", quote, self.text)
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid formula {self.text!r}: {e}") from e
+        self._eval = self._compile(tree.body)
+
+    def __call__(self, ctx, index=None):
+        return self._eval(ctx, index)
+
+    def _name(self, node):
+        if not isinstance(node, ast.Name):
+            raise ValueError(f"Expected an event name in formula {self.text!r}")
+        name = self._quoted.get(node.id, node.id)
+        self.names.add(name)
+        return name
+
+    def _compile(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            value = node.value
+            return lambda ctx, i: value
+        if isinstance(node, ast.Name):
+            name = self._name(node)
+            if "{i}" in name:
+                return lambda ctx, i: ctx.resolve(name.format(i=i))
+            return lambda ctx, i: ctx.resolve(name)
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            op = BINARY_OPERATORS[type(node.op)]
+            left = self._compile(node.left)
+            right = self._compile(node.right)
+            return lambda ctx, i: op(left(ctx, i), right(ctx, i))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            op = UNARY_OPERATORS[type(node.op)]
+            operand = self._compile(node.operand)
+            return lambda ctx, i: op(operand(ctx, i))
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and len(node.args) == 1
+            and not node.keywords
+        ):
+            return self._compile_call(node.func.id, node.args[0])
+        raise ValueError(
+            f"Unsupported expression {ast.dump(node)} in formula {self.text!r}"
+        )
+
+    def _compile_call(self, func, arg):
+        if func == "sum_indexed":
+            names_before = set(self.names)
+            term = self._compile(arg)
+            if not any("{i}" in name for name in self.names - names_before):
+                raise ValueError(
+                    f"sum_indexed() needs names containing {{i}} in {self.text!r}"
+                )
+            return lambda ctx, i: ctx.sum_indexed(term)
+        if func not in FIELD_FUNCTIONS:
+            raise ValueError(f"Unknown function {func}() in formula {self.text!r}")
+        field = FIELD_FUNCTIONS[func]
+        self.fields.add(field)
+        event = self._name(arg)
+
+        def event_name(i):
+            return event.format(i=i) if "{i}" in event else event
+
+        if func == "duration":
+            return lambda ctx, i: ctx.duration(event_name(i))
+        return lambda ctx, i: ctx.events.field(field, event_name(i))
+
+
+class MetricDef(typing.NamedTuple):
+    key: str
+    name: str
+    formula: Formula
+    prefix: float = 1.0
+
+
+def _load_definition_file(path):
+    with open(path) as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        import yaml
+
+        return yaml.safe_load(f)
+
+
+class MetricSet:
+    """Ordered metric definitions of one microarchitecture."""
+
+    def __init__(self, name, metrics=None, series=None, index=None):
+        self.name = name
+        self.metrics = dict(metrics or {})
+        self.series = dict(series or {})
+        # event whose input row numbers label the samples
+        self.index = index
+
+    @classmethod
+    def load(cls, path, _including=None):
+        """Load a definition file and, first, the files it includes."""
+        path = os.path.abspath(path)
+        # only the files being included right now, a file included by
+        # several siblings is not circular
+        including = set() if _including is None else _including
+        if path in including:
+            raise ValueError(f"Circular include of {path}")
+        definition = _load_definition_file(path) or {}
+
+        metric_set = cls(os.path.splitext(os.path.basename(path))[0])
+        including.add(path)
+        try:
+            for include in definition.get("include", []):
+                include_path = os.path.join(os.path.dirname(path), include)
+                included = cls.load(include_path, including)
+                metric_set.metrics.update(included.metrics)
+                metric_set.series.update(included.series)
+                metric_set.index = included.index or metric_set.index
+        finally:
+            including.discard(path)
+        metric_set.index = definition.get("index", metric_set.index)
+        for name, text in (definition.get("series") or {}).items():
+            metric_set.series[name] = Formula(text)
+        for item in definition.get("metrics") or []:
+            try:
+                metric = MetricDef(
+                    key=item["key"],
+                    name=item.get("name", item["key"]),
+                    formula=Formula(item["formula"]),
+                    prefix=float(item.get("prefix", 1.0)),
+                )
+            except KeyError as e:
+                raise ValueError(f"Metric {item} in {path} is missing {e}") from e
+            # redefining a metric replaces it at its original position
+            metric_set.metrics[metric.key] = metric
+        return metric_set
+
+    @classmethod
+    def passthrough(cls, events):
+        """One metric per input column, for inputs that already hold metrics
+        such as the topdown CSVs.
+        """
+        metric_set = cls("passthrough")
+        for column in events.names():
+            formula = Formula("`" + column + "`")
+            metric_set.metrics[column] = MetricDef(column, column, formula)
+        return metric_set
+
+    def formulas(self):
+        yield from self.series.values()
+        for metric in self.metrics.values():
+            yield metric.formula
+
+    def fields(self):
+        fields = set()
+        for formula in self.formulas():
+            fields |= formula.fields
+        if self.index is not None:
+            fields.add(ROW_FIELD)
+        return fields
+
+    def event_filter(self):
+        """Return a predicate telling whether an event may be used by any
+        formula, so that other events are dropped while reading.
+        """
+        names = {self.index} if self.index is not None else set()
+        patterns = []
+        for formula in self.formulas():
+            for name in formula.names:
+                if "{i}" in name:
+                    patterns.append(
+                        "".join(
+                            r"\d+" if part == "{i}" else re.escape(part)
+                            for part in re.split(r"(\{i\})", name)
+                        )
+                    )
+                else:
+                    names.add(name)
+        regex = re.compile("|".join(patterns)) if patterns else None
+        return lambda event: event in names or bool(regex and regex.fullmatch(event))
+
+
+def find_metric_set(name_or_path):
+    """Return the path of a metric definition file given its path or the
+    name of one of the files shipped in METRICS_DIR, e.g. "zen5".
+    """
+    if os.path.exists(name_or_path):
+        return name_or_path
+    for ext in (".yaml", ".yml", ".json"):
+        path = os.path.join(METRICS_DIR, name_or_path + ext)
+        if os.path.exists(path):
+            return path
+    raise ValueError(f"Unknown metric set {name_or_path}")
+
+
+def available_metric_sets():
+    return sorted(
+        os.path.splitext(f)[0]
+        for f in os.listdir(METRICS_DIR)
+        # files starting with "_" are only meant to be included
+        if f.endswith((".yaml", ".yml", ".json")) and not f.startswith("_")
+    )
+
+
+class EventMatrix:
+    """Values of a capture, one column per event and one row per sample.
+
+    Row i of an event's column is the i-th value reported for that event, so
+    columns of different events line up sample by sample. `fields` maps each
+    field read from the input (counter_value, timestamp, mux, ...) to such a
+    matrix.
+    """
+
+    def __init__(self, fields, num_sockets=None):
+        self.fields = fields
+        self.num_sockets = num_sockets or {}
+
+    def __contains__(self, event):
+        return event in self.fields["counter_value"].columns
+
+    def names(self):
+        return list(self.fields["counter_value"].columns)
+
+    def field(self, field, event):
+        if field not in self.fields:
+            raise KeyError(field)
+        return self.fields[field][event]
+
+
+def read_perf_csv(
+    path, fields=("counter_value", "timestamp"), event_filter=None, chunksize=CHUNK_ROWS
+):
+    """Read perf stat -x, output into an EventMatrix.
+
+    The file is read `chunksize` rows at a time and every chunk is pivoted
+    right away, keeping only the `fields` and the events accepted by
+    `event_filter`, so the long format is never held in memory as a whole.
+    Besides the columns of the input, `fields` may include ROW_FIELD.
+    """
+    fields = sorted(set(fields) | {"counter_value"})
+    columns = [field for field in fields if field != ROW_FIELD]
+    parts = {field: [] for field in fields}
+    samples_seen = {}
+    sockets = {}
+    wanted = {}
+    reader = pd.read_csv(path, names=PERF_CSV_COLUMNS, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk[["event_name", "socket"] + columns].dropna(subset=["event_name"])
+        if ROW_FIELD in fields:
+            # the index of the chunks runs over the whole file
+            chunk[ROW_FIELD] = chunk.index
+        if event_filter is not None:
+            for event in chunk["event_name"].unique():
+                if event not in wanted:
+                    wanted[event] = event_filter(event)
+            chunk = chunk[chunk["event_name"].map(wanted)]
+        if chunk.empty:
+            continue
+        chunk = chunk.assign(
+            **{f: pd.to_numeric(chunk[f], errors="coerce") for f in fields}
+        )
+        offsets = chunk["event_name"].map(samples_seen).fillna(0).astype("int64")
+        chunk["sample"] = chunk.groupby("event_name").cumcount() + offsets
+        for event, count in chunk["event_name"].value_counts().items():
+            samples_seen[event] = samples_seen.get(event, 0) + count
+        for event, chunk_sockets in (
+            chunk.groupby("event_name")["socket"].unique().items()
+        ):
+            sockets.setdefault(event, set()).update(chunk_sockets)
+        for field in fields:
+            parts[field].append(
+                chunk.pivot(index="sample", columns="event_name", values=field)
+            )
+
+    def combine(field_parts):
+        if not field_parts:
+            return pd.DataFrame()
+        df = pd.concat(field_parts)
+        # samples of different events may be split across two chunks
+        if not df.index.is_unique:
+            df = df.groupby(level=0).first()
+        df.index.name = None
+        df.columns.name = None
+        return df
+
+    return EventMatrix(
+        {field: combine(field_parts) for field, field_parts in parts.items()},
+        {event: len(s) for event, s in sockets.items()},
+    )
+
+
+def read_timeseries_csv(path):
+    """Read a time series CSV with one column per metric, such as the
+    topdown CSVs written by the perf_monitors topdown hook, into an
+    EventMatrix whose events are its numeric columns.
+    """
+    df = pd.read_csv(path)
+    time_column = next(
+        (c for c in df.columns if str(c).strip().lower() in TIME_COLUMNS), None
+    )
+    if time_column is not None:
+        times = pd.to_numeric(df.pop(time_column), errors="coerce")
+    else:
+        times = pd.Series(range(len(df)), dtype="float64")
+    values = df.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all")
+    timestamps = pd.DataFrame(
+        {column: times for column in values.columns}, index=values.index
+    )
+    return EventMatrix(
+        {"counter_value": values, "timestamp": timestamps},
+        {column: 1 for column in values.columns},
+    )
+
+
+class MetricContext:
+    """Evaluates the metrics of a MetricSet over an EventMatrix."""
+
+    def __init__(self, metric_set, events, constants=None):
+        self.metric_set = metric_set
+        self.events = events
+        self.constants = dict(constants or {})
+        self._memo = {}
+
+    def _memoized(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def resolve(self, name):
+        if name in self.constants:
+            return self.constants[name]
+        if name in self.metric_set.series:
+            formula = self.metric_set.series[name]
+            return self._memoized(("series", name), lambda: formula(self))
+        if name in self.events:
+            return self.events.field("counter_value", name)
+        if name in self.metric_set.metrics:
+            return self.metric(name)
+        raise KeyError(name)
+
+    def duration(self, event):
+        """Length in seconds of every sampling interval of `event`."""
+
+        def compute():
+            ts_series = self.events.field("timestamp", event)
+            return ts_series - ts_series.shift(
+                self.events.num_sockets.get(event, 1), fill_value=0.0
+            )
+
+        return self._memoized(("duration", event), compute)
+
+    def sum_indexed(self, term):
+        total = term(self, 0)
+        i = 1
+        while True:
+            try:
+                total = total + term(self, i)
+            except KeyError:
+                return total
+            i += 1
+
+    def metric(self, key):
+        """Return the raw series of a metric, raising KeyError if any of the
+        events it needs is missing.
+        """
+        formula = self.metric_set.metrics[key].formula
+        return self._memoized(("metric", key), lambda: formula(self))
+
+    def evaluate(self):
+        """Evaluate all metrics in order, skipping those whose events were
+        not collected.
+        """
+        metrics = []
+        for key, metric in self.metric_set.metrics.items():
+            try:
+                series = self.metric(key)
+            except KeyError:
+                continue
+            if not isinstance(series, pd.Series):
+                # formula made of constants only
+                continue
+            metrics.append(
+                {"name": metric.name, "series": series, "prefix": metric.prefix}
+            )
+        rows = self.source_rows()
+        if rows is not None and all(
+            m["series"].index.isin(rows.index).all() for m in metrics
+        ):
+            for m in metrics:
+                m["series"] = m["series"].set_axis(
+                    rows.loc[m["series"].index].to_numpy()
+                )
+        return metrics
+
+    def source_rows(self):
+        """Input row numbers of the samples of the index event of the metric
+        set, None if it has none or it was not read.
+        """
+        event = self.metric_set.index
+        if event is None or event not in self.events:
+            return None
+        try:
+            rows = self.events.field(ROW_FIELD, event)
+        except KeyError:
+            return None
+        return rows.dropna().astype("int64")
+
+
+def evaluate_perf_csv(metric_set, path, constants=None, chunksize=CHUNK_ROWS):
+    events = read_perf_csv(
+        path, metric_set.fields(), metric_set.event_filter(), chunksize
+    )
+    return MetricContext(metric_set, events, constants).evaluate()
+
+
+def aggregate_stats(derived_metric):
+    derived_series = derived_metric["series"]
+    prefix = derived_metric.get("prefix", 1.0)
+    return {
+        "min": derived_series.min() * prefix,
+        "mean": derived_series.mean() * prefix,
+        "std": derived_series.std() * prefix,
+        "p95": derived_series.quantile(0.95) * prefix,
+        "max": derived_series.max() * prefix,
+    }
+
+
+def render_as_csv(metrics, delimiter=","):
+    output = io.StringIO()
+    csv_writer = csv.writer(output, delimiter=delimiter)
+    csv_writer.writerow(["metric", "mean", "stddev", "min", "p95", "max"])
+    for metric in metrics:
+        stats = aggregate_stats(metric)
+        csv_writer.writerow(
+            [
+                metric["name"],
+                stats["mean"],
+                stats["std"],
+                stats["min"],
+                stats["p95"],
+                stats["max"],
+            ]
+        )
+    return output.getvalue()
+
+
+def render_as_table(metrics):
+    headers = ["Metric", "Mean", "StdDev", "Min", "P95", "Max"]
+    table = []
+    for metric in metrics:
+        stats = aggregate_stats(metric)
+        row = [
+            metric["name"],
+            round(stats["mean"], 4),
+            round(stats["std"], 4),
+            round(stats["min"], 4),
+            round(stats["p95"], 4),
+            round(stats["max"], 4),
+        ]
+        table.append(row)
+    return tabulate.tabulate(
+        table, headers, tablefmt="simple", stralign="left", numalign="right"
+    )
+
+
+def concat_series(metrics):
+    # all series are indexed the same way, so they line up as they are
+    series = [(m["series"] * m.get("prefix", 1.0)).rename(m["name"]) for m in metrics]
+    return pd.concat(series, axis=1).reset_index()
+
+
+def write_report(metrics, series_file, format):
+    """Write the time series to `series_file` if given and return the
+    summary rendered in `format` ("table" or "csv").
+    """
+    if series_file:
+        series_file.write(concat_series(metrics).to_csv(index=False))
+    if format == "table":
+        return render_as_table(metrics)
+    return render_as_csv(metrics)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import argparse
+import contextlib
+import datetime
+import io
+import tempfile
+import unittest
+
+from benchpress.cli.commands.run import RunCommand
+from benchpress.lib.history import History, HISTORY_BACKENDS
+
+
+class FakeJob:
+    def __init__(self, uuid):
+        self.name = "job"
+        self.safe_name = "job"
+        self.uuid = uuid
+        self.config = {"uuid": uuid, "args": ["-x"], "iteration_num": 1}
+        self.tolerances = {"score": {"direction": "higher"}}
+
+
+class TestRepeatedRunRegressions(unittest.TestCase):
+    """`run --repeat-until ... --check-regressions`: the iterations of the
+    checked run are saved under its uuid and must neither crowd out the
+    baseline nor be compared one by one.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.now = datetime.datetime(2024, 1, 1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def save_run(self, history, uuid, scores):
+        job = FakeJob(uuid)
+        for i, score in enumerate(scores, 1):
+            job.config = dict(job.config, iteration_num=i)
+            history.save_job_result(job, {"score": score}, self.now)
+            self.now += datetime.timedelta(seconds=1)
+        return job
+
+    def check(self, backend, current_scores, baseline=20):
+        path = f"{self.tmpdir.name}/{backend}"
+        history = History(path, backend)
+        for i in range(3):
+            self.save_run(history, f"earlier{i}", [99, 100, 101])
+        job = self.save_run(history, "current", current_scores)
+        args = argparse.Namespace(
+            results=path,
+            results_backend=backend,
+            regression_baseline=baseline,
+            regression_tolerance=5.0,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            return RunCommand().check_regressions(args, job)
+
+    def test_repeated_drop_is_a_regression(self):
+        for backend in HISTORY_BACKENDS:
+            with self.subTest(backend=backend):
+                report = self.check(backend, [50] * 20)
+                self.assertEqual(report.baseline_runs, 3)
+                self.assertEqual(report.unchecked, [])
+                self.assertFalse(report.passed)
+                (check,) = report.checks
+                self.assertEqual(check.value, 50)
+                self.assertEqual(check.median, 100)
+
+    def test_median_of_iterations_is_compared(self):
+        # the last iteration alone would be a regression
+        for backend in HISTORY_BACKENDS:
+            with self.subTest(backend=backend):
+                report = self.check(backend, [100, 101, 99, 100, 50])
+                self.assertTrue(report.passed)
+                self.assertEqual(report.checks[0].value, 100)
+
+    def test_baseline_limit_counts_runs(self):
+        report = self.check("sqlite", [50] * 20, baseline=2)
+        self.assertEqual(report.baseline_runs, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from benchpress.lib.history import History, HISTORY_BACKENDS, SQLITE_DB_NAME
+
+
+class FakeJob:
+    def __init__(self, name, config):
+        self.name = name
+        self.safe_name = name
+        self.config = config
+
+
+class TestRepeatedIterations(unittest.TestCase):
+    """Iterations of a repeated job share its uuid and can finish within
+    the same second, none of them may replace another.
+    """
+
+    ITERATIONS = 5
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = self.tmpdir.name
+        self.now = datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def save_iterations(self, history):
+        job = FakeJob("job", {"uuid": "abcd1234", "args": ["-x"]})
+        for i in range(1, self.ITERATIONS + 1):
+            job.config = dict(job.config, iteration_num=i)
+            history.save_job_result(job, {"qps": i}, self.now)
+        return job
+
+    def test_backends_keep_every_iteration(self):
+        for backend in HISTORY_BACKENDS:
+            with self.subTest(backend=backend):
+                history = History(os.path.join(self.path, backend), backend)
+                job = self.save_iterations(history)
+                records = history.load_records(job)
+                self.assertEqual(len(records), self.ITERATIONS)
+                # most recent first
+                self.assertEqual(
+                    [r["metrics"]["qps"] for r in records],
+                    list(range(self.ITERATIONS, 0, -1)),
+                )
+
+    def test_resaving_an_iteration_replaces_it(self):
+        for backend in HISTORY_BACKENDS:
+            with self.subTest(backend=backend):
+                history = History(os.path.join(self.path, backend), backend)
+                job = self.save_iterations(history)
+                records = history.load_records(job)
+                for record in records:
+                    record["metrics"]["qps"] *= 10
+                history.update_records(job, records)
+                self.assertEqual(
+                    sorted(r["metrics"]["qps"] for r in history.load_records(job)),
+                    [10 * i for i in range(1, self.ITERATIONS + 1)],
+                )
+
+    def test_archive_paths_are_distinct(self):
+        history = History(self.path)
+        paths = {
+            history.output_archive_path("job", self.now, "abcd1234", i)
+            for i in range(1, self.ITERATIONS + 1)
+        }
+        self.assertEqual(len(paths), self.ITERATIONS)
+        # single runs keep their original archive path
+        self.assertEqual(
+            history.output_archive_path("job", self.now, "abcd1234", 1),
+            history.output_archive_path("job", self.now, "abcd1234"),
+        )
+
+    def test_upgrade_from_v1(self):
+        conn = sqlite3.connect(os.path.join(self.path, SQLITE_DB_NAME))
+        conn.executescript(
+            """
+            CREATE TABLE results (
+                id INTEGER PRIMARY KEY,
+                job TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                uuid TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                config TEXT NOT NULL,
+                metrics TEXT NOT NULL,
+                UNIQUE (job, timestamp, uuid)
+            );
+            CREATE INDEX results_job_timestamp ON results (job, timestamp);
+            CREATE INDEX results_uuid ON results (uuid);
+            CREATE INDEX results_job_config_hash ON results (job, config_hash);
+            INSERT INTO results (job, timestamp, uuid, config_hash, config, metrics)
+                VALUES ('job', '2024-01-01T00:00:00Z', 'old', '',
+                        '{"uuid": "old"}', '{"qps": 0}');
+            PRAGMA user_version = 1;
+            """
+        )
+        conn.close()
+
+        history = History(self.path)
+        job = self.save_iterations(history)
+        self.assertEqual(len(history.load_records(job)), self.ITERATIONS + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-unsafe
+
+import random
+import unittest
+
+from benchpress.lib import regression
+from benchpress.lib.regression import (
+    BOTH_WAYS,
+    HIGHER_IS_BETTER,
+    LOWER_IS_BETTER,
+    MetricCheck,
+)
+
+
+class TestBootstrapMedianCI(unittest.TestCase):
+    def test_constant_values(self):
+        self.assertEqual(regression.bootstrap_median_ci([5.0] * 7), (5.0, 5.0))
+
+    def test_interval_contains_median(self):
+        values = [float(v) for v in range(1, 10)]
+        low, high = regression.bootstrap_median_ci(values)
+        self.assertLess(low, high)
+        self.assertLessEqual(low, 5.0)
+        self.assertGreaterEqual(high, 5.0)
+        self.assertGreaterEqual(low, 1.0)
+        self.assertLessEqual(high, 9.0)
+
+    def test_reproducible(self):
+        values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+        self.assertEqual(
+            regression.bootstrap_median_ci(values),
+            regression.bootstrap_median_ci(values),
+        )
+        self.assertEqual(
+            regression.bootstrap_median_ci(values, rng=random.Random(1)),
+            regression.bootstrap_median_ci(values, rng=random.Random(1)),
+        )
+
+    def test_wider_at_higher_confidence(self):
+        values = [float(v) for v in range(20)]
+        low, high = regression.bootstrap_median_ci(values, confidence=0.5)
+        wide_low, wide_high = regression.bootstrap_median_ci(values, confidence=0.99)
+        self.assertLessEqual(wide_low, low)
+        self.assertGreaterEqual(wide_high, high)
+
+
+class TestMetricCheck(unittest.TestCase):
+    BASELINE = [99.0, 100.0, 101.0]
+
+    # direction -> (regressed, improved) of a drop and of a rise
+    EXPECTED = {
+        HIGHER_IS_BETTER: ((True, False), (False, True)),
+        LOWER_IS_BETTER: ((False, True), (True, False)),
+        BOTH_WAYS: ((True, False), (True, False)),
+        None: ((False, False), (False, False)),
+    }
+
+    def check(self, value, direction):
+        return MetricCheck("score", value, self.BASELINE, 5.0, direction)
+
+    def test_accepted_range(self):
+        check = self.check(100.0, HIGHER_IS_BETTER)
+        self.assertEqual(check.median, 100.0)
+        self.assertEqual(check.mad, 1.0)
+        # confidence interval of the median widened by 5% of it
+        self.assertEqual(check.low, check.ci[0] - 5.0)
+        self.assertEqual(check.high, check.ci[1] + 5.0)
+        self.assertTrue(94.0 <= check.low <= 95.0)
+        self.assertTrue(105.0 <= check.high <= 106.0)
+
+    def test_directions(self):
+        for direction, (drop, rise) in self.EXPECTED.items():
+            with self.subTest(direction=direction):
+                for value, expected in ((80.0, drop), (120.0, rise)):
+                    check = self.check(value, direction)
+                    self.assertFalse(check.in_range)
+                    self.assertEqual((check.regressed, check.improved), expected)
+                    self.assertEqual(check.passed, not expected[0])
+                in_range = self.check(100.0, direction)
+                self.assertTrue(in_range.in_range)
+                self.assertFalse(in_range.regressed or in_range.improved)
+                self.assertEqual(in_range.result, "PASS")
+
+    def test_results(self):
+        self.assertEqual(self.check(80.0, HIGHER_IS_BETTER).result, "FAIL")
+        self.assertEqual(self.check(120.0, HIGHER_IS_BETTER).result, "IMPROVED")
+        self.assertEqual(self.check(80.0, LOWER_IS_BETTER).result, "IMPROVED")
+        self.assertEqual(self.check(120.0, None).result, "CHANGED")
+
+    def test_deviation(self):
+        check = self.check(80.0, None)
+        self.assertEqual(check.deviation, -20.0)
+        self.assertEqual(check.robust_z, -20.0 / regression.MAD_SCALE)
+
+
+class TestFlattenTolerances(unittest.TestCase):
+    def test_nesting(self):
+        tolerances = {
+            "score": 3,
+            "latency": {
+                "p50": 2,
+                "p99": {"tolerance": 10, "direction": "lower"},
+            },
+            "qps": {"direction": "higher"},
+            "hit_ratio": {"tolerance": "1.5"},
+        }
+        self.assertEqual(
+            regression.flatten_tolerances(tolerances),
+            {
+                "score": (3.0, None),
+                "latency.p50": (2.0, None),
+                "latency.p99": (10.0, LOWER_IS_BETTER),
+                "qps": (None, HIGHER_IS_BETTER),
+                "hit_ratio": (1.5, None),
+            },
+        )
+
+    def test_invalid_direction(self):
+        for tolerances in (
+            {"score": {"direction": "up"}},
+            {"latency": {"p99": {"tolerance": 10, "direction": "down"}}},
+        ):
+            with self.subTest(tolerances=tolerances):
+                with self.assertRaises(ValueError):
+                    regression.flatten_tolerances(tolerances)
+
+
+if __name__ == "__main__":
+    unittest.main()